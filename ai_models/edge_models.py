@@ -3,74 +3,295 @@ import logging
 import numpy as np
 import pickle
 import json
+import threading
+import warnings
+from types import MappingProxyType
 from datetime import datetime
+from utils.crop_catalog import CROP_CODES, crop_code, crop_params, crop_section, crop_table
+from utils.request_rng import DETERMINISTIC_INFERENCE, request_date, request_rng
+from ai_models.model_utils import FeatureSchema
 
 logger = logging.getLogger(__name__)
 
+# Crop-specific yield model parameters
+YIELD_CROP_PARAMS = crop_section("yield")
+
+# Column order of the feature matrices accepted by predict_yield_batch
+YIELD_SOIL_FEATURES = ["moisture", "temperature", "nitrogen", "phosphorus", "potassium"]
+YIELD_WEATHER_FEATURES = ["temperature", "rain", "humidity"]
+
+# Schema writing YIELD_SOIL_FEATURES then YIELD_WEATHER_FEATURES into one
+# matrix, named as in model_utils.FEATURE_NAMES
+YIELD_FEATURE_SCHEMA = FeatureSchema((
+    "moisture", "temperature", "nitrogen", "phosphorus", "potassium",
+    "mean_temp", "mean_rain", "mean_humidity"
+))
+
+# Values the yield model assumes for inputs a source does not report
+YIELD_SOIL_DEFAULTS = {"moisture": 50, "temperature": 25, "nitrogen": 20, "phosphorus": 10, "potassium": 15}
+YIELD_WEATHER_DEFAULTS = {"temperature": {"day": 25}, "rain": 0, "humidity": 60}
+
+# Parameter table indexed by crop code (last row holds the default parameters)
+_YIELD_PARAM_TABLE = crop_table("yield", ("base_yield", "ndvi_weight", "soil_weight", "weather_weight"))
+
+def encode_crop_types(crop_types):
+    """
+    Convert crop names to the integer codes used by the batch APIs
+    
+    Args:
+        crop_types (list): List of crop names
+        
+    Returns:
+        numpy.ndarray: Crop codes (len(CROP_CODES) for crops not in the catalog)
+    """
+    return np.array([crop_code(str(crop).lower()) for crop in crop_types], dtype=np.int64)
+
+def yield_features(sources, out=None):
+    """
+    Build the yield model's feature matrix from raw soil and weather data
+    
+    Args:
+        sources (list): (soil_data, weather_data) per farm, as passed to predict_yield
+        out (numpy.ndarray): Preallocated matrix to fill (default: allocate)
+        
+    Returns:
+        numpy.ndarray: float32 matrix of shape (farms, 8), YIELD_SOIL_FEATURES
+            columns followed by YIELD_WEATHER_FEATURES columns
+    """
+    return YIELD_FEATURE_SCHEMA.transform_batch(
+        [
+            (
+                None,
+                {**YIELD_WEATHER_DEFAULTS, **weather_data} if isinstance(weather_data, dict) else weather_data,
+                {**YIELD_SOIL_DEFAULTS, **soil_data}
+            )
+            for soil_data, weather_data in sources
+        ],
+        out=out
+    )
+
+# Pest and disease conditions per crop; crops not listed use "default"
+PEST_DISEASE_CONDITIONS = crop_section("pest_disease")
+
+# Daily variables of the forecast tensors accepted by predict_pest_disease_risk_batch
+PEST_FORECAST_VARIABLES = ["temperature_day", "temperature_max", "temperature_min", "humidity", "rain"]
+
+# Forecast days considered by the pest/disease model
+PEST_FORECAST_DAYS = 5
+
+def _compile_pest_conditions():
+    """
+    Build the pest/disease condition tensor indexed by crop code
+    
+    Returns:
+        tuple: (conditions, names) where conditions has shape
+            (crops, pests, 6) with columns temp_min, temp_max, humidity_min,
+            humidity_max, rain_threshold and ndvi_threshold (NaN padding), and
+            names holds the pest/disease names ("" padding); the last row is
+            the default crop
+    """
+    crop_lists = [
+        crop_params("pest_disease", name)
+        for name in CROP_CODES + ("default",)
+    ]
+    width = max(len(conditions) for conditions in crop_lists)
+    
+    table = np.full((len(crop_lists), width, 6), np.nan)
+    names = np.full((len(crop_lists), width), "", dtype=object)
+    
+    for row, conditions in enumerate(crop_lists):
+        for column, condition in enumerate(conditions):
+            table[row, column] = (
+                *condition["temp_range"],
+                *condition["humidity_range"],
+                condition["rain_threshold"],
+                condition["ndvi_threshold"]
+            )
+            names[row, column] = condition["name"]
+    
+    table.setflags(write=False)
+    names.setflags(write=False)
+    return table, names
+
+_PEST_CONDITION_TABLE, _PEST_NAME_TABLE = _compile_pest_conditions()
+
+def encode_weather_forecasts(forecasts, days=PEST_FORECAST_DAYS):
+    """
+    Convert daily forecasts into a (farms, days, variables) tensor
+    
+    Args:
+        forecasts (list): Daily forecast lists (as from get_weather_forecast), one per farm
+        days (int): Number of days to keep
+        
+    Returns:
+        numpy.ndarray: Tensor with columns ordered as PEST_FORECAST_VARIABLES;
+            days missing from shorter forecasts are NaN, missing rain is 0
+    """
+    tensor = np.full((len(forecasts), days, len(PEST_FORECAST_VARIABLES)), np.nan)
+    
+    for farm, forecast in enumerate(forecasts):
+        for day, values in enumerate(forecast[:days]):
+            temperature = values["temperature"]
+            tensor[farm, day] = (
+                temperature["day"],
+                temperature["max"],
+                temperature["min"],
+                values["humidity"],
+                values.get("rain", 0)
+            )
+    
+    return tensor
+
+# Built-in model metadata
+MODEL_DEFINITIONS = {
+    "crop_yield": {
+        "type": "yield_prediction",
+        "crops_supported": ["maize", "rice", "sorghum", "millet", "cassava"],
+        "input_features": ["ndvi_time_series", "soil_data", "weather_data"],
+        "version": "1.0"
+    },
+    "irrigation": {
+        "type": "irrigation_recommendation",
+        "crops_supported": ["maize", "rice", "sorghum", "millet", "cassava"],
+        "input_features": ["soil_moisture", "weather_forecast", "crop_type", "crop_stage"],
+        "version": "1.0"
+    },
+    "pest_disease": {
+        "type": "pest_disease_risk",
+        "crops_supported": ["maize", "rice", "sorghum", "millet", "cassava"],
+        "input_features": ["weather_forecast", "ndvi", "crop_type"],
+        "version": "1.0"
+    }
+}
+
+# Process-wide registry of loaded models, keyed by (model_dir, model_name)
+_model_registry = {}
+_model_registry_lock = threading.Lock()
+
+def _freeze(value):
+    """Recursively convert model data into read-only structures"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, np.ndarray):
+        value.setflags(write=False)
+    return value
+
+def clear_model_registry():
+    """Drop all loaded models so the next load_model call rebuilds them"""
+    with _model_registry_lock:
+        _model_registry.clear()
+
 class EdgeModelManager:
     """Manager class for Edge AI models"""
     
-    def __init__(self, model_dir="ai_models/saved_models"):
+    def __init__(self, model_dir="ai_models/saved_models", deterministic=None):
+        """
+        Initialize the model manager
+        
+        Args:
+            model_dir (str): Directory of saved model files
+            deterministic (bool): Seed simulated model noise from each request
+                (default: DETERMINISTIC_INFERENCE)
+        """
         self.model_dir = model_dir
+        self.deterministic = DETERMINISTIC_INFERENCE if deterministic is None else deterministic
         self.logger = logging.getLogger(__name__)
         self.models = {}
         
         # Check if model directory exists, if not create it
         if not os.path.exists(model_dir):
             os.makedirs(model_dir)
+        
+        # Warm the shared registry so requests never pay the model setup cost
+        for model_name in MODEL_DEFINITIONS:
+            self.load_model(model_name)
             
     def load_model(self, model_name):
         """
-        Load a model (simplified version without TensorFlow)
+        Load a model through the shared model registry
+        
+        Each model is built once per process and the same frozen instance is
+        handed to every EdgeModelManager using the same model directory.
+        Parameter arrays saved as <model_dir>/<model_name>/*.npy are
+        memory-mapped read-only, and an optional metadata.json in the same
+        directory overrides the built-in metadata (e.g. the version).
         
         Args:
             model_name (str): Name of the model to load
             
         Returns:
-            dict: Model metadata and parameters
+            mappingproxy: Read-only model metadata and parameters
         """
+        key = (os.path.abspath(self.model_dir), model_name)
+        
         try:
-            # For demonstration purposes, we'll use a simplified approach
-            # In a real implementation, this would load an actual model file
-            
-            # Create model parameters based on model_name
-            if model_name == "crop_yield":
-                model_params = {
-                    "type": "yield_prediction",
-                    "crops_supported": ["maize", "rice", "sorghum", "millet", "cassava"],
-                    "input_features": ["ndvi_time_series", "soil_data", "weather_data"],
-                    "version": "1.0"
-                }
-            elif model_name == "irrigation":
-                model_params = {
-                    "type": "irrigation_recommendation",
-                    "crops_supported": ["maize", "rice", "sorghum", "millet", "cassava"],
-                    "input_features": ["soil_moisture", "weather_forecast", "crop_type", "crop_stage"],
-                    "version": "1.0"
-                }
-            elif model_name == "pest_disease":
-                model_params = {
-                    "type": "pest_disease_risk",
-                    "crops_supported": ["maize", "rice", "sorghum", "millet", "cassava"],
-                    "input_features": ["weather_forecast", "ndvi", "crop_type"],
-                    "version": "1.0"
-                }
-            else:
-                model_params = {
-                    "type": "unknown",
-                    "version": "1.0"
-                }
-            
-            self.models[model_name] = model_params
-            self.logger.info(f"Model {model_name} loaded successfully")
+            with _model_registry_lock:
+                model = _model_registry.get(key)
+                
+                if model is None:
+                    model = _freeze(self._build_model(model_name))
+                    _model_registry[key] = model
+                    self.logger.info(f"Model {model_name} (version {model['version']}) loaded successfully")
             
-            return model_params
+            self.models[model_name] = model
+            return model
             
         except Exception as e:
             self.logger.error(f"Error loading model {model_name}: {str(e)}")
             return None
+    
+    def _build_model(self, model_name):
+        """Build model metadata and parameters from definitions and saved files"""
+        # For demonstration purposes, the metadata comes from MODEL_DEFINITIONS
+        # In a real implementation, this would load an actual model file
+        model = dict(MODEL_DEFINITIONS.get(model_name, {"type": "unknown", "version": "1.0"}))
+        model["name"] = model_name
+        model["parameters"] = {}
+        
+        saved_dir = os.path.join(self.model_dir, model_name)
+        if os.path.isdir(saved_dir):
+            metadata_path = os.path.join(saved_dir, "metadata.json")
+            if os.path.exists(metadata_path):
+                with open(metadata_path) as f:
+                    model.update(json.load(f))
+            
+            # Memory-map parameter arrays so workers share the page cache
+            for filename in sorted(os.listdir(saved_dir)):
+                if filename.endswith(".npy"):
+                    model["parameters"][filename[:-4]] = np.load(
+                        os.path.join(saved_dir, filename),
+                        mmap_mode="r"
+                    )
+        
+        model["version"] = str(model.get("version", "1.0"))
+        return model
+    
+    def request_rng(self, model_name, farm_id=None, date=None):
+        """
+        Get the random number generator for one prediction
+        
+        In deterministic mode the generator is seeded from the model name and
+        version, the farm and the date, so repeating a request repeats its
+        result; otherwise the global NumPy RNG is used.
+        
+        Args:
+            model_name (str): Name of the model making the prediction
+            farm_id (int): Farm the prediction is for
+            date (str): Date the prediction is for ('YYYY-MM-DD', default today)
+            
+        Returns:
+            numpy.random.Generator or the numpy.random module (see request_rng)
+        """
+        if not self.deterministic:
+            return request_rng(deterministic=False)
+        
+        model = self.models.get(model_name) or self.load_model(model_name)
+        version = model["version"] if model else None
+        return request_rng(model_name, version, farm_id, request_date(date), deterministic=True)
             
-    def predict_yield(self, ndvi_time_series, soil_data, weather_data, crop_type):
+    def predict_yield(self, ndvi_time_series, soil_data, weather_data, crop_type, farm_id=None, date=None):
         """
         Predict crop yield based on NDVI time series, soil data, and weather data
         
@@ -79,6 +300,8 @@ class EdgeModelManager:
             soil_data (dict): Soil sensor data
             weather_data (dict): Weather data
             crop_type (str): Type of crop
+            farm_id (int): Farm ID, seeding the model noise in deterministic mode
+            date (str): Prediction date, seeding the model noise in deterministic mode
             
         Returns:
             dict: Yield prediction results
@@ -87,29 +310,19 @@ class EdgeModelManager:
         # In real implementation, this would use an actual TensorFlow Lite model
         
         try:
-            # Crop-specific parameters
-            crop_params = {
-                "maize": {"base_yield": 3.5, "ndvi_weight": 0.6, "soil_weight": 0.2, "weather_weight": 0.2},
-                "rice": {"base_yield": 4.0, "ndvi_weight": 0.5, "soil_weight": 0.3, "weather_weight": 0.2},
-                "sorghum": {"base_yield": 2.5, "ndvi_weight": 0.5, "soil_weight": 0.2, "weather_weight": 0.3},
-                "millet": {"base_yield": 1.5, "ndvi_weight": 0.5, "soil_weight": 0.2, "weather_weight": 0.3},
-                "cassava": {"base_yield": 10.0, "ndvi_weight": 0.4, "soil_weight": 0.4, "weather_weight": 0.2},
-                "default": {"base_yield": 3.0, "ndvi_weight": 0.5, "soil_weight": 0.25, "weather_weight": 0.25}
-            }
-            
             # Get parameters for the specified crop
-            params = crop_params.get(crop_type.lower(), crop_params["default"])
+            params = YIELD_CROP_PARAMS.get(crop_type.lower(), YIELD_CROP_PARAMS["default"])
             
             # Calculate NDVI component
             avg_ndvi = np.mean(ndvi_time_series)
             ndvi_component = (avg_ndvi / 0.7) * params["ndvi_weight"]  # Normalize NDVI to 0-1 range
             
+            # Build the soil and weather features through the yield schema
+            features = yield_features([(soil_data, weather_data)])[0].astype(np.float64)
+            soil_moisture, soil_temp, nitrogen, phosphorus, potassium = features[:len(YIELD_SOIL_FEATURES)]
+            avg_temp, precipitation, humidity = features[len(YIELD_SOIL_FEATURES):]
+            
             # Calculate soil component
-            soil_moisture = soil_data.get("moisture", 50)
-            soil_temp = soil_data.get("temperature", 25)
-            nitrogen = soil_data.get("nitrogen", 20)
-            phosphorus = soil_data.get("phosphorus", 10)
-            potassium = soil_data.get("potassium", 15)
             
             # Normalize soil parameters
             moisture_score = 1.0 - abs((soil_moisture - 60) / 60)
@@ -121,11 +334,6 @@ class EdgeModelManager:
             soil_score = (moisture_score + temp_score + n_score + p_score + k_score) / 5
             soil_component = soil_score * params["soil_weight"]
             
-            # Calculate weather component
-            avg_temp = weather_data.get("temperature", {}).get("day", 25)
-            precipitation = weather_data.get("rain", 0)
-            humidity = weather_data.get("humidity", 60)
-            
             # Normalize weather parameters
             temp_score = 1.0 - abs((avg_temp - 25) / 25)
             rain_score = min(1.0, precipitation / 20)
@@ -140,7 +348,8 @@ class EdgeModelManager:
             predicted_yield = base_yield * yield_factor
             
             # Add some random variation to simulate model uncertainty
-            predicted_yield *= (0.9 + 0.2 * np.random.random())
+            rng = self.request_rng("crop_yield", farm_id, date)
+            predicted_yield *= (0.9 + 0.2 * rng.random())
             
             # Determine yield quality based on the predicted yield
             if predicted_yield > base_yield * 1.2:
@@ -169,6 +378,107 @@ class EdgeModelManager:
             self.logger.error(f"Error predicting yield: {str(e)}")
             return None
             
+    def predict_yield_batch(self, ndvi_matrix, soil_features, weather_features, crop_codes, farm_ids=None, date=None):
+        """
+        Predict crop yield for many farms in a single vectorized pass
+        
+        Applies the same model as predict_yield. For a fixed NumPy seed the
+        per-farm results match calling predict_yield once per farm in order;
+        in deterministic mode they match predict_yield with the same farm ID
+        and date.
+        
+        Args:
+            ndvi_matrix (numpy.ndarray): NDVI series, shape (n_farms, n_observations);
+                pad shorter series with NaN
+            soil_features (numpy.ndarray): Soil features, shape (n_farms, 5), columns
+                ordered as YIELD_SOIL_FEATURES; or the (n_farms, 8) matrix from
+                yield_features when weather_features is None
+            weather_features (numpy.ndarray): Weather features, shape (n_farms, 3),
+                columns ordered as YIELD_WEATHER_FEATURES
+            crop_codes (numpy.ndarray): Crop codes (see CROP_CODES and encode_crop_types)
+            farm_ids (list): Farm ID per row, seeding each farm's model noise in
+                deterministic mode
+            date (str): Prediction date, seeding the model noise in deterministic mode
+            
+        Returns:
+            dict: Arrays of yield predictions, qualities, confidences and contributions
+        """
+        try:
+            ndvi_matrix = np.asarray(ndvi_matrix, dtype=np.float64)
+            soil = np.asarray(soil_features, dtype=np.float64)
+            if weather_features is None:
+                soil, weather = np.hsplit(soil, [len(YIELD_SOIL_FEATURES)])
+            else:
+                weather = np.asarray(weather_features, dtype=np.float64)
+            crop_codes = np.asarray(crop_codes, dtype=np.int64)
+            
+            # Look up parameter rows; unknown codes use the default row
+            default_row = len(CROP_CODES)
+            rows = np.where((crop_codes >= 0) & (crop_codes < default_row), crop_codes, default_row)
+            base_yield, ndvi_weight, soil_weight, weather_weight = _YIELD_PARAM_TABLE[rows].T
+            
+            # NDVI component
+            avg_ndvi = np.nanmean(ndvi_matrix, axis=1)
+            ndvi_component = (avg_ndvi / 0.7) * ndvi_weight
+            
+            # Soil component
+            moisture, soil_temp, nitrogen, phosphorus, potassium = soil.T
+            soil_score = (
+                (1.0 - np.abs((moisture - 60) / 60))
+                + (1.0 - np.abs((soil_temp - 25) / 25))
+                + np.minimum(1.0, nitrogen / 30)
+                + np.minimum(1.0, phosphorus / 15)
+                + np.minimum(1.0, potassium / 25)
+            ) / 5
+            soil_component = soil_score * soil_weight
+            
+            # Weather component
+            avg_temp, precipitation, humidity = weather.T
+            weather_score = (
+                (1.0 - np.abs((avg_temp - 25) / 25))
+                + np.minimum(1.0, precipitation / 20)
+                + (1.0 - np.abs((humidity - 60) / 60))
+            ) / 3
+            weather_component = weather_score * weather_weight
+            
+            # Final yield with the same simulated model uncertainty as predict_yield
+            yield_factor = ndvi_component + soil_component + weather_component
+            predicted_yield = base_yield * yield_factor
+            predicted_yield *= (0.9 + 0.2 * self._yield_noise(len(predicted_yield), farm_ids, date))
+            
+            quality = np.select(
+                [predicted_yield > base_yield * 1.2, predicted_yield > base_yield, predicted_yield > base_yield * 0.8],
+                ["Excellent", "Good", "Average"],
+                default="Poor"
+            )
+            
+            return {
+                "predicted_yield": np.round(predicted_yield, 2),
+                "yield_unit": "tons/hectare",
+                "yield_quality": quality,
+                "confidence": np.full(len(predicted_yield), 0.7),
+                "contribution": {
+                    "ndvi": np.round(ndvi_component / yield_factor * 100, 1),
+                    "soil": np.round(soil_component / yield_factor * 100, 1),
+                    "weather": np.round(weather_component / yield_factor * 100, 1)
+                }
+            }
+            
+        except Exception as e:
+            self.logger.error(f"Error predicting batch yield: {str(e)}")
+            return None
+            
+    def _yield_noise(self, count, farm_ids, date):
+        """Draw the uniform yield noise of a batch, one generator per farm in deterministic mode"""
+        if not self.deterministic:
+            return np.random.random(count)
+        
+        if farm_ids is None:
+            return self.request_rng("crop_yield", None, date).random(count)
+        
+        date = request_date(date)
+        return np.array([self.request_rng("crop_yield", farm_id, date).random() for farm_id in farm_ids])
+        
     def predict_irrigation_needs(self, soil_moisture, weather_forecast, crop_type, crop_stage):
         """
         Predict irrigation needs based on soil moisture and weather forecast
@@ -183,30 +493,8 @@ class EdgeModelManager:
             dict: Irrigation recommendation
         """
         try:
-            # Crop-specific parameters for different growth stages
-            crop_params = {
-                "maize": {
-                    "germination": {"min_moisture": 50, "optimal_moisture": 70, "daily_et": 2.5},
-                    "vegetative": {"min_moisture": 45, "optimal_moisture": 65, "daily_et": 4.0},
-                    "reproductive": {"min_moisture": 55, "optimal_moisture": 75, "daily_et": 6.0},
-                    "maturity": {"min_moisture": 40, "optimal_moisture": 60, "daily_et": 3.0}
-                },
-                "rice": {
-                    "germination": {"min_moisture": 70, "optimal_moisture": 90, "daily_et": 3.0},
-                    "vegetative": {"min_moisture": 80, "optimal_moisture": 100, "daily_et": 5.0},
-                    "reproductive": {"min_moisture": 80, "optimal_moisture": 100, "daily_et": 6.0},
-                    "maturity": {"min_moisture": 70, "optimal_moisture": 90, "daily_et": 4.0}
-                },
-                "default": {
-                    "germination": {"min_moisture": 50, "optimal_moisture": 70, "daily_et": 2.5},
-                    "vegetative": {"min_moisture": 45, "optimal_moisture": 65, "daily_et": 4.0},
-                    "reproductive": {"min_moisture": 50, "optimal_moisture": 70, "daily_et": 5.0},
-                    "maturity": {"min_moisture": 40, "optimal_moisture": 60, "daily_et": 3.0}
-                }
-            }
-            
             # Get parameters for the specified crop and stage
-            crop_specifics = crop_params.get(crop_type.lower(), crop_params["default"])
+            crop_specifics = crop_params("irrigation_stages", crop_type.lower())
             stage_params = crop_specifics.get(crop_stage.lower(), crop_specifics["vegetative"])
             
             # Calculate expected precipitation from forecast
@@ -281,130 +569,35 @@ class EdgeModelManager:
             dict: Pest and disease risk assessment
         """
         try:
-            # Common pest and disease conditions for different crops
-            pest_disease_conditions = {
-                "maize": [
-                    {
-                        "name": "Fall Armyworm",
-                        "temp_range": (20, 32),
-                        "humidity_range": (60, 95),
-                        "rain_threshold": 5,
-                        "ndvi_threshold": 0.6
-                    },
-                    {
-                        "name": "Maize Streak Virus",
-                        "temp_range": (25, 35),
-                        "humidity_range": (70, 100),
-                        "rain_threshold": 0,
-                        "ndvi_threshold": 0.5
-                    },
-                    {
-                        "name": "Gray Leaf Spot",
-                        "temp_range": (22, 30),
-                        "humidity_range": (85, 100),
-                        "rain_threshold": 10,
-                        "ndvi_threshold": 0.55
-                    }
-                ],
-                "rice": [
-                    {
-                        "name": "Rice Blast",
-                        "temp_range": (24, 30),
-                        "humidity_range": (85, 100),
-                        "rain_threshold": 5,
-                        "ndvi_threshold": 0.6
-                    },
-                    {
-                        "name": "Brown Plant Hopper",
-                        "temp_range": (25, 32),
-                        "humidity_range": (70, 95),
-                        "rain_threshold": 0,
-                        "ndvi_threshold": 0.65
-                    }
-                ],
-                "default": [
-                    {
-                        "name": "Aphids",
-                        "temp_range": (20, 30),
-                        "humidity_range": (60, 90),
-                        "rain_threshold": 0,
-                        "ndvi_threshold": 0.6
-                    },
-                    {
-                        "name": "Fungal Diseases",
-                        "temp_range": (18, 28),
-                        "humidity_range": (80, 100),
-                        "rain_threshold": 5,
-                        "ndvi_threshold": 0.55
-                    }
-                ]
-            }
+            if not weather_forecast:
+                raise ValueError("Weather forecast is empty")
             
-            # Get pest and disease conditions for the specified crop
-            conditions = pest_disease_conditions.get(crop_type.lower(), pest_disease_conditions["default"])
+            # Score every pest/disease of the crop in one vectorized pass
+            scores = self.predict_pest_disease_risk_batch(
+                encode_weather_forecasts([weather_forecast]),
+                [ndvi],
+                encode_crop_types([crop_type.lower()])
+            )
             
-            # Extract weather parameters for the next 5 days
-            avg_temp = np.mean([day["temperature"]["day"] for day in weather_forecast[:5]])
-            max_temp = max([day["temperature"]["max"] for day in weather_forecast[:5]])
-            min_temp = min([day["temperature"]["min"] for day in weather_forecast[:5]])
-            avg_humidity = np.mean([day["humidity"] for day in weather_forecast[:5]])
-            max_humidity = max([day["humidity"] for day in weather_forecast[:5]])
-            total_rain = sum([day.get("rain", 0) for day in weather_forecast[:5]])
-            rain_days = sum([1 for day in weather_forecast[:5] if day.get("rain", 0) > 1])
+            weather = {name: values[0] for name, values in scores["weather_conditions"].items()}
             
-            # Calculate risk for each pest/disease
+            # Collect medium and high risks in condition order
             risks = []
             
-            for condition in conditions:
-                # Check if temperature is in range
-                temp_in_range = (condition["temp_range"][0] <= avg_temp <= condition["temp_range"][1])
-                
-                # Check if humidity is in range
-                humidity_in_range = (condition["humidity_range"][0] <= max_humidity <= condition["humidity_range"][1])
-                
-                # Check rainfall condition
-                rain_condition = (total_rain >= condition["rain_threshold"])
-                
-                # Check NDVI condition (lower NDVI indicates more vulnerable plants)
-                ndvi_condition = (ndvi < condition["ndvi_threshold"])
-                
-                # Calculate risk score (0-100)
-                risk_score = 0
-                
-                if temp_in_range:
-                    risk_score += 30
-                
-                if humidity_in_range:
-                    risk_score += 30
-                
-                if rain_condition:
-                    risk_score += 20
+            for column in np.flatnonzero(scores["risk_score"][0] >= 50):
+                name = scores["pest_disease"][0, column]
+                risk_level = scores["risk_level"][0, column]
                 
-                if ndvi_condition:
-                    risk_score += 20
-                
-                # Determine risk level
-                if risk_score >= 80:
-                    risk_level = "High"
-                elif risk_score >= 50:
-                    risk_level = "Medium"
-                else:
-                    risk_level = "Low"
-                
-                # Only include medium or high risks
-                if risk_score >= 50:
-                    risks.append({
-                        "pest_disease": condition["name"],
-                        "risk_level": risk_level,
-                        "risk_score": risk_score,
-                        "factors": {
-                            "temperature": temp_in_range,
-                            "humidity": humidity_in_range,
-                            "rainfall": rain_condition,
-                            "crop_health": ndvi_condition
-                        },
-                        "recommendations": self._get_pest_disease_recommendations(condition["name"], risk_level)
-                    })
+                risks.append({
+                    "pest_disease": name,
+                    "risk_level": risk_level,
+                    "risk_score": int(scores["risk_score"][0, column]),
+                    "factors": {
+                        factor: bool(values[0, column])
+                        for factor, values in scores["factors"].items()
+                    },
+                    "recommendations": self._get_pest_disease_recommendations(name, risk_level)
+                })
             
             # Sort risks by score (descending)
             risks.sort(key=lambda x: x["risk_score"], reverse=True)
@@ -421,13 +614,13 @@ class EdgeModelManager:
                 "crop_type": crop_type,
                 "overall_risk": overall_risk,
                 "weather_conditions": {
-                    "avg_temperature": round(avg_temp, 1),
-                    "max_temperature": round(max_temp, 1),
-                    "min_temperature": round(min_temp, 1),
-                    "avg_humidity": round(avg_humidity, 1),
-                    "max_humidity": round(max_humidity, 1),
-                    "total_rainfall": round(total_rain, 1),
-                    "rainy_days": rain_days
+                    "avg_temperature": round(float(weather["avg_temperature"]), 1),
+                    "max_temperature": round(float(weather["max_temperature"]), 1),
+                    "min_temperature": round(float(weather["min_temperature"]), 1),
+                    "avg_humidity": round(float(weather["avg_humidity"]), 1),
+                    "max_humidity": round(float(weather["max_humidity"]), 1),
+                    "total_rainfall": round(float(weather["total_rainfall"]), 1),
+                    "rainy_days": int(weather["rainy_days"])
                 },
                 "crop_health_ndvi": round(ndvi, 2),
                 "specific_risks": risks
@@ -437,6 +630,94 @@ class EdgeModelManager:
             self.logger.error(f"Error predicting pest/disease risk: {str(e)}")
             return None
     
+    def predict_pest_disease_risk_batch(self, forecast, ndvi, crop_codes):
+        """
+        Score pest and disease risk for many farms in a single vectorized pass
+        
+        Applies the same model as predict_pest_disease_risk against the
+        precompiled condition tensor of each farm's crop.
+        
+        Args:
+            forecast (numpy.ndarray): Weather tensor, shape (n_farms, n_days, 5),
+                variables ordered as PEST_FORECAST_VARIABLES (see
+                encode_weather_forecasts); only the first PEST_FORECAST_DAYS
+                days are used and NaN days are ignored
+            ndvi (numpy.ndarray): Current NDVI per farm
+            crop_codes (numpy.ndarray): Crop codes (see CROP_CODES and encode_crop_types)
+            
+        Returns:
+            dict: Arrays of shape (n_farms, n_pests) for pest_disease names,
+                risk_score, risk_level, factors and valid (False for padding),
+                plus per-farm overall_risk and weather_conditions
+        """
+        try:
+            forecast = np.asarray(forecast, dtype=np.float64)[:, :PEST_FORECAST_DAYS]
+            ndvi = np.asarray(ndvi, dtype=np.float64)
+            crop_codes = np.asarray(crop_codes, dtype=np.int64)
+            
+            # Look up condition rows; unknown codes use the default row
+            default_row = len(CROP_CODES)
+            rows = np.where((crop_codes >= 0) & (crop_codes < default_row), crop_codes, default_row)
+            conditions = _PEST_CONDITION_TABLE[rows]
+            names = _PEST_NAME_TABLE[rows]
+            
+            # Weather aggregates per farm
+            day_temp, max_temp, min_temp, humidity, rain = np.moveaxis(forecast, 2, 0)
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)
+                avg_temp = np.nanmean(day_temp, axis=1)
+                avg_humidity = np.nanmean(humidity, axis=1)
+                max_humidity = np.nanmax(humidity, axis=1)
+                weather_conditions = {
+                    "avg_temperature": avg_temp,
+                    "max_temperature": np.nanmax(max_temp, axis=1),
+                    "min_temperature": np.nanmin(min_temp, axis=1),
+                    "avg_humidity": avg_humidity,
+                    "max_humidity": max_humidity,
+                    "total_rainfall": np.nansum(rain, axis=1),
+                    "rainy_days": np.sum(rain > 1, axis=1)
+                }
+            total_rain = weather_conditions["total_rainfall"]
+            
+            # Evaluate every pest/disease condition of every farm at once
+            temp_min, temp_max, humidity_min, humidity_max, rain_threshold, ndvi_threshold = np.moveaxis(conditions, 2, 0)
+            factors = {
+                "temperature": (temp_min <= avg_temp[:, None]) & (avg_temp[:, None] <= temp_max),
+                "humidity": (humidity_min <= max_humidity[:, None]) & (max_humidity[:, None] <= humidity_max),
+                "rainfall": total_rain[:, None] >= rain_threshold,
+                "crop_health": ndvi[:, None] < ndvi_threshold
+            }
+            
+            risk_score = (
+                30 * factors["temperature"]
+                + 30 * factors["humidity"]
+                + 20 * factors["rainfall"]
+                + 20 * factors["crop_health"]
+            )
+            risk_level = np.select(
+                [risk_score >= 80, risk_score >= 50],
+                ["High", "Medium"],
+                default="Low"
+            ).astype(object)
+            
+            valid = names != ""
+            top_score = np.where(valid, risk_score, 0).max(axis=1)
+            overall_risk = np.select([top_score >= 80, top_score >= 50], ["High", "Medium"], default="Low")
+            
+            return {
+                "pest_disease": names,
+                "risk_score": risk_score,
+                "risk_level": risk_level,
+                "factors": factors,
+                "valid": valid,
+                "overall_risk": overall_risk,
+                "weather_conditions": weather_conditions
+            }
+            
+        except Exception as e:
+            self.logger.error(f"Error predicting batch pest/disease risk: {str(e)}")
+            return None
+    
     def _get_pest_disease_recommendations(self, pest_disease, risk_level):
         """Get recommendations for pest/disease control based on risk level"""
         recommendations = {
@@ -2,16 +2,38 @@ import os
 import logging
 import numpy as np
 import json
+from collections.abc import Sequence
 from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
+# Combined feature vector layout, grouped by source
+SATELLITE_FEATURES = ("mean_ndvi", "min_ndvi", "max_ndvi", "std_ndvi", "ndvi_trend")
+WEATHER_FEATURES = (
+    "mean_temp", "min_temp", "max_temp", "total_rain", "mean_rain",
+    "mean_humidity", "min_humidity", "max_humidity"
+)
+SOIL_FEATURES = (
+    "moisture", "temperature", "ph", "electrical_conductivity",
+    "nitrogen", "phosphorus", "potassium",
+    "mean_moisture", "min_moisture", "max_moisture", "std_moisture",
+    "mean_soil_temp", "min_soil_temp", "max_soil_temp"
+)
+FEATURE_NAMES = SATELLITE_FEATURES + WEATHER_FEATURES + SOIL_FEATURES
+
+# Latest soil reading fields and their defaults, in SOIL_FEATURES order
+SOIL_READING_DEFAULTS = (
+    ("moisture", 0), ("temperature", 0), ("ph", 7), ("electrical_conductivity", 0),
+    ("nitrogen", 0), ("phosphorus", 0), ("potassium", 0)
+)
+
 def preprocess_satellite_data(satellite_data):
     """
     Preprocess satellite data for machine learning models
     
     Args:
-        satellite_data (dict): Raw satellite data
+        satellite_data (dict): Raw satellite data; precomputed "ndvi_stats"
+            (NDVIStatsStore.get) take precedence over "ndvi_series"
         
     Returns:
         dict: Preprocessed satellite data
@@ -20,8 +42,14 @@ def preprocess_satellite_data(satellite_data):
         # Extract relevant features
         features = {}
         
+        # Use running statistics if available (see utils.ndvi_stats)
+        if satellite_data.get("ndvi_stats"):
+            stats = satellite_data["ndvi_stats"]
+            for name in SATELLITE_FEATURES:
+                features[name] = stats[name]
+        
         # Extract NDVI time series if available
-        if "ndvi_series" in satellite_data:
+        elif "ndvi_series" in satellite_data:
             features["ndvi_values"] = [item["average_ndvi"] for item in satellite_data["ndvi_series"]]
             features["ndvi_dates"] = [item["date"] for item in satellite_data["ndvi_series"]]
             
@@ -140,7 +168,7 @@ def preprocess_soil_data(soil_data):
         features = {}
         
         # Handle different soil data formats
-        if "data" in soil_data and isinstance(soil_data["data"], list):
+        if "data" in soil_data and isinstance(soil_data["data"], Sequence):
             # Time series soil data
             
             # Use the most recent soil data point
@@ -204,26 +232,12 @@ def combine_features(satellite_features, weather_features, soil_features):
         list: Combined feature vector
     """
     try:
-        # Define the feature structure (in a specific order)
-        feature_names = [
-            # Satellite features
-            "mean_ndvi", "min_ndvi", "max_ndvi", "std_ndvi", "ndvi_trend",
-            # Weather features
-            "mean_temp", "min_temp", "max_temp", "total_rain", "mean_rain",
-            "mean_humidity", "min_humidity", "max_humidity",
-            # Soil features
-            "moisture", "temperature", "ph", "electrical_conductivity",
-            "nitrogen", "phosphorus", "potassium",
-            "mean_moisture", "min_moisture", "max_moisture", "std_moisture",
-            "mean_soil_temp", "min_soil_temp", "max_soil_temp"
-        ]
-        
         # Combine all features
         all_features = {**satellite_features, **weather_features, **soil_features}
         
         # Create feature vector with default values
         feature_vector = []
-        for name in feature_names:
+        for name in FEATURE_NAMES:
             feature_vector.append(all_features.get(name, 0))
             
         return feature_vector
@@ -232,6 +246,219 @@ def combine_features(satellite_features, weather_features, soil_features):
         logger.error(f"Error combining features: {str(e)}")
         return []
 
+def _satellite_block(satellite_data):
+    """Satellite features in SATELLITE_FEATURES order"""
+    if satellite_data.get("ndvi_stats"):
+        stats = satellite_data["ndvi_stats"]
+        return tuple(stats[name] for name in SATELLITE_FEATURES)
+    
+    if "ndvi_series" in satellite_data:
+        values = np.array([item["average_ndvi"] for item in satellite_data["ndvi_series"]], dtype=np.float64)
+        if len(values) == 0:
+            return None
+        
+        # Least-squares slope against the observation index
+        trend = 0.0
+        if len(values) > 1:
+            x = np.arange(len(values)) - (len(values) - 1) / 2
+            trend = np.dot(x, values - values.mean()) / np.dot(x, x)
+        
+        return (values.mean(), values.min(), values.max(), values.std(), trend)
+    
+    ndvi = satellite_data.get("average_ndvi", 0)
+    return (ndvi, ndvi, ndvi, 0, 0)
+
+def _weather_block(weather_data):
+    """Weather features in WEATHER_FEATURES order (missing values are 0)"""
+    if isinstance(weather_data, list):
+        first = weather_data[0]
+        
+        temp = (0, 0, 0)
+        if "temperature" in first:
+            temps = np.array([
+                day["temperature"].get("day", 0) if isinstance(day["temperature"], dict) else day["temperature"]
+                for day in weather_data
+            ], dtype=np.float64)
+            temp = (temps.mean(), temps.min(), temps.max())
+        
+        rain = np.array([day.get("rain", 0) for day in weather_data], dtype=np.float64)
+        
+        humidity = (0, 0, 0)
+        if "humidity" in first:
+            humidities = np.array([day["humidity"] for day in weather_data], dtype=np.float64)
+            humidity = (humidities.mean(), humidities.min(), humidities.max())
+        
+        return temp + (rain.sum(), rain.mean()) + humidity
+    
+    temp = 0
+    if "temperature" in weather_data:
+        temp = weather_data["temperature"]
+        if isinstance(temp, dict):
+            temp = temp.get("day", 0)
+    
+    rain = weather_data.get("rain", 0)
+    humidity = weather_data.get("humidity", 0)
+    return (temp, temp, temp, rain, rain, humidity, humidity, humidity)
+
+def _soil_block(soil_data):
+    """Soil features in SOIL_FEATURES order"""
+    readings = soil_data.get("data") if "data" in soil_data else None
+    
+    if not isinstance(readings, Sequence):
+        latest = tuple(soil_data.get(name, default) for name, default in SOIL_READING_DEFAULTS)
+        moisture, temperature = latest[0], latest[1]
+        return latest + (moisture, moisture, moisture, 0) + (temperature, temperature, temperature)
+    
+    columns = getattr(readings, "columns", None)
+    if columns is not None:
+        # Columnar readings from the sensor store
+        count = len(readings)
+        latest = tuple(
+            columns[name][-1] if name in columns else default
+            for name, default in SOIL_READING_DEFAULTS
+        )
+        moisture = np.asarray(columns["moisture"], dtype=np.float64) if "moisture" in columns else np.zeros(count)
+        temperature = np.asarray(columns["temperature"], dtype=np.float64) if "temperature" in columns else np.zeros(count)
+    else:
+        latest_reading = readings[-1]
+        latest = tuple(latest_reading.get(name, default) for name, default in SOIL_READING_DEFAULTS)
+        moisture = np.array([item.get("moisture", 0) for item in readings], dtype=np.float64)
+        temperature = np.array([item.get("temperature", 0) for item in readings], dtype=np.float64)
+    
+    if len(moisture) == 0:
+        return None
+    
+    return latest + (
+        moisture.mean(), moisture.min(), moisture.max(), moisture.std(),
+        temperature.mean(), temperature.min(), temperature.max()
+    )
+
+class FeatureSchema:
+    """
+    Compiled layout of a float32 feature matrix
+    
+    Each source (satellite, weather, soil) computes its features as one
+    block in a fixed order; the schema maps block positions to matrix
+    columns once, so writing a source is a single indexed assignment into
+    a preallocated row. Feature names the sources do not produce stay 0,
+    as in combine_features.
+    """
+    
+    def __init__(self, feature_names=FEATURE_NAMES):
+        """
+        Compile the schema
+        
+        Args:
+            feature_names (tuple): Matrix columns, by feature name
+        """
+        self.feature_names = tuple(feature_names)
+        self.logger = logging.getLogger(__name__)
+        
+        columns = {name: column for column, name in enumerate(self.feature_names)}
+        self._sources = {
+            "satellite": (_satellite_block, self._compile(SATELLITE_FEATURES, columns)),
+            "weather": (_weather_block, self._compile(WEATHER_FEATURES, columns)),
+            "soil": (_soil_block, self._compile(SOIL_FEATURES, columns))
+        }
+    
+    @staticmethod
+    def _compile(source_features, columns):
+        """Map block positions to matrix columns; a slice pair when contiguous"""
+        positions = [position for position, name in enumerate(source_features) if name in columns]
+        targets = [columns[source_features[position]] for position in positions]
+        
+        if positions and positions == list(range(len(source_features))) and targets == list(range(targets[0], targets[0] + len(targets))):
+            return slice(0, len(positions)), slice(targets[0], targets[0] + len(targets))
+        
+        return np.array(positions, dtype=np.intp), np.array(targets, dtype=np.intp)
+    
+    @property
+    def width(self):
+        """Number of feature columns"""
+        return len(self.feature_names)
+    
+    def allocate(self, rows):
+        """
+        Allocate a zeroed feature matrix
+        
+        Args:
+            rows (int): Number of farms
+            
+        Returns:
+            numpy.ndarray: float32 matrix of shape (rows, width)
+        """
+        return np.zeros((rows, self.width), dtype=np.float32)
+    
+    def write_source(self, row, source, data):
+        """
+        Write one source's features into a matrix row
+        
+        Args:
+            row (numpy.ndarray): Row view of a matrix from allocate()
+            source (str): "satellite", "weather" or "soil"
+            data (dict or list): Raw source data as accepted by preprocess_*
+            
+        Returns:
+            bool: True if written; on failure the source's columns are zeroed
+        """
+        block_function, (positions, targets) = self._sources[source]
+        
+        try:
+            block = block_function(data) if data is not None else None
+        except Exception as e:
+            self.logger.error(f"Error extracting {source} features: {str(e)}")
+            block = None
+        
+        if block is None:
+            row[targets] = 0
+            return False
+        
+        row[targets] = np.asarray(block, dtype=np.float64)[positions]
+        return True
+    
+    def write(self, row, satellite_data, weather_data, soil_data):
+        """
+        Write all sources' features into a matrix row
+        
+        Args:
+            row (numpy.ndarray): Row view of a matrix from allocate()
+            satellite_data (dict): Raw satellite data
+            weather_data (dict or list): Raw weather data
+            soil_data (dict): Raw soil data
+        """
+        self.write_source(row, "satellite", satellite_data)
+        self.write_source(row, "weather", weather_data)
+        self.write_source(row, "soil", soil_data)
+    
+    def transform(self, satellite_data, weather_data, soil_data):
+        """
+        Build the feature vector of a single farm
+        
+        Returns:
+            numpy.ndarray: float32 vector of length width
+        """
+        matrix = self.allocate(1)
+        self.write(matrix[0], satellite_data, weather_data, soil_data)
+        return matrix[0]
+    
+    def transform_batch(self, sources, out=None):
+        """
+        Build the feature matrix of many farms
+        
+        Args:
+            sources (list): (satellite_data, weather_data, soil_data) per farm
+            out (numpy.ndarray): Preallocated matrix to fill (default: allocate)
+            
+        Returns:
+            numpy.ndarray: float32 matrix of shape (farms, width)
+        """
+        matrix = self.allocate(len(sources)) if out is None else out
+        
+        for row, (satellite_data, weather_data, soil_data) in zip(matrix, sources):
+            self.write(row, satellite_data, weather_data, soil_data)
+        
+        return matrix
+
 def format_recommendation(recommendation_type, recommendation_data):
     """
     Format recommendation data for user presentation
@@ -1,15 +1,23 @@
 import os
+import hmac
 import logging
-from flask import Blueprint, request, jsonify, current_app
+import numpy as np
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 from datetime import datetime, timedelta
 import json
+import math
+import struct
 
 from utils.satellite_processing import SatelliteProcessor
-from utils.weather_forecasting import WeatherForecaster
+from utils.aoi_tiling import plan_tiles
+from utils.weather_forecasting import WeatherForecaster, weather_cache
 from utils.soil_sensor import SoilSensorManager
+from utils.sensor_ingest import SensorIngestBuffer, parse_ndjson, parse_binary_frames
 from utils.data_fusion import DataFusionEngine
+from utils.fanout import gather_with_deadlines
+from utils.json_safe import json_safe
+from utils.dashboard_snapshots import get_dashboard_snapshot, request_refresh
 from ai_models.edge_models import EdgeModelManager
-from ai_models.model_utils import preprocess_satellite_data, preprocess_weather_data, preprocess_soil_data, combine_features
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +30,20 @@ weather_forecaster = WeatherForecaster()
 soil_sensor_manager = SoilSensorManager()
 data_fusion_engine = DataFusionEngine()
 edge_model_manager = EdgeModelManager()
+sensor_ingest_buffer = SensorIngestBuffer(soil_sensor_manager.store)
+
+# Per-source deadlines (seconds) for /fused_recommendations
+FUSION_SATELLITE_DEADLINE = float(os.environ.get('FUSION_SATELLITE_DEADLINE', 10))
+FUSION_WEATHER_DEADLINE = float(os.environ.get('FUSION_WEATHER_DEADLINE', 5))
+FUSION_SOIL_DEADLINE = float(os.environ.get('FUSION_SOIL_DEADLINE', 3))
+
+# Full-resolution AOI analysis runs inside the request, so it is limited to a
+# few tiles; Sentinel-2 bands are not finer than 10 m
+SYNC_AOI_MAX_TILES = int(os.environ.get('SATELLITE_SYNC_AOI_MAX_TILES', 4))
+MIN_AOI_RESOLUTION_M = 10
+
+# Largest accepted ingestion payload in bytes
+MAX_INGEST_BYTES = int(os.environ.get('SOIL_INGEST_MAX_BYTES', 8 * 1024 * 1024))
 
 @api_bp.route('/satellite_data', methods=['GET'])
 def get_satellite_data():
@@ -39,6 +61,27 @@ def get_satellite_data():
         date_from = request.args.get('date_from', (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d'))
         date_to = request.args.get('date_to', datetime.now().strftime('%Y-%m-%d'))
         
+        # Validate the optional full-resolution analysis before any upstream call
+        resolution_m = request.args.get('resolution_m')
+        if resolution_m:
+            try:
+                resolution_m = float(resolution_m)
+            except ValueError:
+                return jsonify({'error': 'resolution_m must be a number'}), 400
+            
+            if not math.isfinite(resolution_m) or resolution_m < MIN_AOI_RESOLUTION_M:
+                return jsonify({'error': f'resolution_m must be at least {MIN_AOI_RESOLUTION_M}'}), 400
+            
+            try:
+                tiles = len(plan_tiles(bbox, resolution_m)["tiles"])
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            if tiles > SYNC_AOI_MAX_TILES:
+                return jsonify({
+                    'error': f'Area of interest needs {tiles} tiles at {resolution_m} m resolution '
+                             f'(limit {SYNC_AOI_MAX_TILES}); use a coarser resolution or a smaller bbox'
+                }), 400
+        
         # Get satellite image
         image_data = satellite_processor.get_satellite_image(bbox, date_from, date_to)
         
@@ -48,9 +91,19 @@ def get_satellite_data():
         # Calculate current NDVI (using latest value from series if available)
         current_ndvi = ndvi_series[-1]['average_ndvi'] if ndvi_series else 0.5
         
+        # Full-resolution analysis of the whole AOI, tiled (optional)
+        aoi_analysis = None
+        if resolution_m:
+            aoi_analysis = satellite_processor.process_large_aoi(
+                bbox, date_from, date_to, resolution_m, max_tiles=SYNC_AOI_MAX_TILES
+            )
+        
         # Analyze crop health based on NDVI
-        mock_ndvi_values = np.array([current_ndvi] * 100)  # Create array for analysis
-        crop_health = satellite_processor.analyze_crop_health(mock_ndvi_values)
+        if aoi_analysis:
+            crop_health = aoi_analysis['crop_health']
+        else:
+            mock_ndvi_values = np.array([current_ndvi] * 100)  # Create array for analysis
+            crop_health = satellite_processor.analyze_crop_health(mock_ndvi_values)
         
         # Create response
         response = {
@@ -60,7 +113,8 @@ def get_satellite_data():
             'date_to': date_to,
             'ndvi_series': ndvi_series,
             'current_ndvi': current_ndvi,
-            'crop_health': crop_health
+            'crop_health': crop_health,
+            'aoi_analysis': aoi_analysis
         }
         
         return jsonify(response)
@@ -81,21 +135,15 @@ def get_weather_data():
         lat = float(lat)
         lon = float(lon)
         
-        # Get current weather
-        current_weather = weather_forecaster.get_current_weather(lat, lon)
-        
-        # Get daily forecast
-        daily_forecast = weather_forecaster.get_weather_forecast(lat, lon, days=7)
-        
-        # Get hourly forecast
-        hourly_forecast = weather_forecaster.get_hourly_forecast(lat, lon, hours=24)
+        # Get current weather, daily and hourly forecasts from one API response
+        bundle = weather_forecaster.get_weather_bundle(lat, lon, days=7, hours=24) or {}
         
         # Create response
         response = {
             'location': {'lat': lat, 'lon': lon},
-            'current_weather': current_weather,
-            'daily_forecast': daily_forecast,
-            'hourly_forecast': hourly_forecast
+            'current_weather': bundle.get('current_weather'),
+            'daily_forecast': bundle.get('daily_forecast'),
+            'hourly_forecast': bundle.get('hourly_forecast')
         }
         
         return jsonify(response)
@@ -104,6 +152,16 @@ def get_weather_data():
         logger.error(f"Error getting weather data: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@api_bp.route('/weather_cache/stats', methods=['GET'])
+def get_weather_cache_stats():
+    """API endpoint to get weather response cache metrics"""
+    try:
+        return jsonify(weather_cache.stats())
+    
+    except Exception as e:
+        logger.error(f"Error getting weather cache stats: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @api_bp.route('/soil_data', methods=['GET'])
 def get_soil_data():
     """API endpoint to get soil sensor data"""
@@ -116,7 +174,8 @@ def get_soil_data():
         # Get soil data
         soil_data = soil_sensor_manager.get_sensor_data(sensor_id, start_date, end_date)
         
-        return jsonify(soil_data)
+        # Materialize the columnar readings for the JSON response
+        return jsonify(json_safe({**soil_data, 'data': soil_data['data'].to_list()}))
     
     except Exception as e:
         logger.error(f"Error getting soil data: {str(e)}")
@@ -149,12 +208,110 @@ def get_soil_analysis():
             'fertility_analysis': fertility_analysis
         }
         
-        return jsonify(response)
+        return jsonify(json_safe(response))
     
     except Exception as e:
         logger.error(f"Error analyzing soil data: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@api_bp.route('/soil_fleet_analysis', methods=['GET'])
+def get_soil_fleet_analysis():
+    """API endpoint to analyze every soil sensor of a farm or region, streamed as NDJSON"""
+    try:
+        from models import Farm
+        
+        # Get parameters
+        farm_id = request.args.get('farm_id')
+        region = request.args.get('region')
+        crop_type = request.args.get('crop_type', 'maize')
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        
+        if farm_id:
+            farm_ids = [farm_id]
+        elif region:
+            farms = Farm.query.filter(Farm.location.ilike(f"%{region}%")).all()
+            farm_ids = [str(farm.id) for farm in farms]
+        else:
+            return jsonify({'error': 'farm_id or region is required'}), 400
+        
+        # Stored sensors of each farm, or its default sensor
+        sensors = []
+        for fid in farm_ids:
+            sensor_ids = soil_sensor_manager.store.list_sensors(fid) or [f"sensor_{fid}"]
+            sensors.extend((fid, sensor_id) for sensor_id in sensor_ids)
+        
+        def generate():
+            # Headers are already sent once streaming starts, so failures
+            # are reported as an error line rather than a cut-off stream
+            try:
+                for result in soil_sensor_manager.analyze_fleet_fertility(sensors, crop_type, start_date, end_date):
+                    yield json.dumps(json_safe(result), allow_nan=False) + '\n'
+            except Exception as e:
+                logger.error(f"Error streaming soil fleet analysis: {str(e)}")
+                yield json.dumps({'error': str(e)}) + '\n'
+        
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    
+    except Exception as e:
+        logger.error(f"Error analyzing soil fleet: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/soil_ingest', methods=['POST'])
+def ingest_soil_readings():
+    """API endpoint for soil probes to push batched readings (NDJSON or packed binary frames)"""
+    try:
+        # Probes authenticate with a shared token when one is configured
+        token = os.environ.get('SOIL_INGEST_TOKEN')
+        if token and not hmac.compare_digest(request.headers.get('X-Ingest-Token', ''), token):
+            return jsonify({'error': 'Invalid ingest token'}), 401
+        
+        if request.content_length is None or request.content_length > MAX_INGEST_BYTES:
+            return jsonify({'error': f'Payload must declare a length of at most {MAX_INGEST_BYTES} bytes'}), 413
+        
+        body = request.get_data(cache=False)
+        
+        # Parse the payload according to its content type
+        if request.mimetype == 'application/octet-stream':
+            batches = parse_binary_frames(body, sensor_ingest_buffer.store)
+        elif request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+            batches = parse_ndjson(body, sensor_ingest_buffer.store)
+        else:
+            return jsonify({'error': 'Content-Type must be application/x-ndjson or application/octet-stream'}), 415
+        
+        # Refuse the batch while the buffer is full so probes back off and retry
+        result = sensor_ingest_buffer.add(batches)
+        if not result['accepted']:
+            response = jsonify({'error': 'Ingest buffer full', 'stats': sensor_ingest_buffer.stats()})
+            response.headers['Retry-After'] = str(max(1, int(sensor_ingest_buffer.max_delay_seconds)))
+            return response, 429
+        
+        # Readings not newer than the stored ones are refused, not buffered;
+        # stale_sensors gives each affected sensor's last stored reading time
+        return jsonify({
+            'accepted_rows': result['accepted_rows'],
+            'stale_rows': result['stale_rows'],
+            'stale_sensors': result['stale_sensors'],
+            'sensors': len(batches)
+        }), 202
+    
+    except (ValueError, KeyError, IndexError, struct.error) as e:
+        logger.error(f"Error parsing soil readings: {str(e)}")
+        return jsonify({'error': f'Malformed payload: {str(e)}'}), 400
+    except Exception as e:
+        logger.error(f"Error ingesting soil readings: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/soil_ingest/stats', methods=['GET'])
+def get_soil_ingest_stats():
+    """API endpoint to get soil ingestion and backpressure counters"""
+    try:
+        return jsonify(sensor_ingest_buffer.stats())
+    
+    except Exception as e:
+        logger.error(f"Error getting ingest stats: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @api_bp.route('/planting_recommendation', methods=['GET'])
 def get_planting_recommendation():
     """API endpoint to get planting recommendations based on weather trends"""
@@ -237,14 +394,18 @@ def get_yield_prediction():
         weather_data = weather_forecaster.get_weather_forecast(lat, lon)[0]  # Use first day
         
         # Get soil data
-        soil_data = soil_sensor_manager.get_sensor_data(f"sensor_{farm_id}")['data'][-1]  # Use latest data
+        soil_data = soil_sensor_manager.get_latest_reading(f"sensor_{farm_id}")  # Use latest data
+        if soil_data is None:
+            return jsonify({'error': f'No recent soil readings for farm {farm_id}'}), 404
         
         # Predict yield
         yield_prediction = edge_model_manager.predict_yield(
             ndvi_values,
             soil_data,
             weather_data,
-            crop_type
+            crop_type,
+            farm_id=farm_id,
+            date=date_to
         )
         
         return jsonify(yield_prediction)
@@ -305,7 +466,27 @@ def get_fused_recommendations():
         date_from = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
         date_to = datetime.now().strftime('%Y-%m-%d')
         
-        ndvi_series = satellite_processor.get_historical_ndvi_series(bbox, date_from, date_to)
+        # Fetch the independent sources concurrently; a source that fails or
+        # misses its deadline falls back so the others still produce a result
+        sources_data, sources = gather_with_deadlines({
+            'satellite': (
+                lambda: satellite_processor.get_historical_ndvi_series(bbox, date_from, date_to),
+                FUSION_SATELLITE_DEADLINE,
+                []
+            ),
+            'weather': (
+                lambda: (weather_forecaster.get_weather_forecast(lat, lon) or [None])[0],  # Use first day
+                FUSION_WEATHER_DEADLINE,
+                None
+            ),
+            'soil': (
+                lambda: soil_sensor_manager.get_latest_reading(f"sensor_{farm_id}"),  # Use latest data
+                FUSION_SOIL_DEADLINE,
+                None
+            )
+        })
+        
+        ndvi_series = sources_data['satellite']
         current_ndvi = ndvi_series[-1]['average_ndvi'] if ndvi_series else 0.65
         
         mock_ndvi_values = np.array([current_ndvi] * 100)  # Create array for analysis
@@ -317,11 +498,8 @@ def get_fused_recommendations():
             'overall_status': crop_health['overall_status']
         }
         
-        # Get weather data
-        weather_data = weather_forecaster.get_weather_forecast(lat, lon)[0]  # Use first day
-        
-        # Get soil data
-        soil_data = soil_sensor_manager.get_sensor_data(f"sensor_{farm_id}")['data'][-1]  # Use latest data
+        weather_data = sources_data['weather']
+        soil_data = sources_data['soil']
         
         # Fuse data
         fused_data = data_fusion_engine.fuse_satellite_weather_soil(
@@ -330,18 +508,22 @@ def get_fused_recommendations():
             soil_data
         )
         
-        # Generate crop recommendations
-        recommendations = data_fusion_engine.generate_crop_recommendations(
-            fused_data,
-            crop_type
-        )
+        # Generate crop recommendations (fusion needs every source)
+        recommendations = []
+        if fused_data:
+            recommendations = data_fusion_engine.generate_crop_recommendations(
+                fused_data,
+                crop_type
+            )
         
         # Create response
         response = {
             'farm_id': farm_id,
             'crop_type': crop_type,
             'fused_data': fused_data,
-            'recommendations': recommendations
+            'recommendations': recommendations,
+            'sources': sources,
+            'partial': any(source['status'] != 'ok' for source in sources.values())
         }
         
         return jsonify(response)
@@ -350,6 +532,42 @@ def get_fused_recommendations():
         logger.error(f"Error generating fused recommendations: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@api_bp.route('/dashboard_snapshot', methods=['GET'])
+def get_dashboard_snapshot_data():
+    """API endpoint to get the materialized dashboard snapshot of a farm"""
+    try:
+        farm_id = int(request.args.get('farm_id', '1'))
+        
+        snapshot = get_dashboard_snapshot(farm_id)
+        
+        if snapshot is None:
+            return jsonify({'error': 'No snapshot available yet', 'farm_id': farm_id}), 404
+        
+        return jsonify(snapshot)
+    
+    except Exception as e:
+        logger.error(f"Error getting dashboard snapshot: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/dashboard_snapshot/refresh', methods=['POST'])
+def refresh_dashboard_snapshot():
+    """API endpoint to queue the dashboard snapshot of a farm for refresh"""
+    try:
+        farm_id = int(request.args.get('farm_id', '1'))
+        
+        # The background refresher recomputes the snapshot; poll
+        # /dashboard_snapshot for the result
+        queued = request_refresh(farm_id)
+        
+        if not queued:
+            return jsonify({'error': 'Failed to queue snapshot refresh', 'farm_id': farm_id}), 500
+        
+        return jsonify({'farm_id': farm_id, 'refresh_pending': True}), 202
+    
+    except Exception as e:
+        logger.error(f"Error refreshing dashboard snapshot: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @api_bp.route('/chat', methods=['POST'])
 def chat():
     """API endpoint for the AI chatbot assistant"""
@@ -9,6 +9,7 @@ from utils.satellite_processing import SatelliteProcessor
 from utils.weather_forecasting import WeatherForecaster
 from utils.soil_sensor import SoilSensorManager
 from utils.data_fusion import DataFusionEngine
+from utils.dashboard_snapshots import get_dashboard_snapshot, request_refresh
 from ai_models.edge_models import EdgeModelManager
 
 logger = logging.getLogger(__name__)
@@ -35,18 +36,11 @@ def dashboard():
     # Initialize default data
     farm_id = request.args.get('farm_id', '1')
     
-    # Get farm location (default to Kenya)
-    farm_location = (0.0236, 37.9062)  # Kenya coordinates
-    
     # Get current date
     current_date = datetime.now().strftime('%B %d, %Y')
     
-    # Get weather data for the farm location
-    weather_data = weather_forecaster.get_current_weather(farm_location[0], farm_location[1])
-    weather_forecast = weather_forecaster.get_weather_forecast(farm_location[0], farm_location[1], days=7)
-    
-    # Get soil data
-    soil_data = soil_sensor_manager.get_sensor_data(f"sensor_{farm_id}")
+    # Get the materialized snapshot instead of calling upstreams per render
+    snapshot = _load_dashboard_snapshot(farm_id)
     
     # Mock farms and crops data for user dashboard
     farms = [
@@ -88,7 +82,8 @@ def dashboard():
         'level_progress': level_progress,
         'points_to_next_level': points_to_next_level,
         'points_to_next_level_percent': points_to_next_level_percent,
-        'recommendations': get_sample_recommendations(farm_id)
+        'recommendations': _sorted_recommendations(snapshot["recommendations"]) if snapshot and snapshot["recommendations"] else get_sample_recommendations(farm_id),
+        'snapshot': snapshot
     }
     
     # Use our new dashboard template
@@ -275,20 +270,14 @@ def recommendations():
     # Initialize default data
     farm_id = request.args.get('farm_id', '1')
     
-    # Get farm location (default to Kenya)
-    farm_location = (0.0236, 37.9062)  # Kenya coordinates
-    
-    # Get weather forecast
-    weather_forecast = weather_forecaster.get_weather_forecast(farm_location[0], farm_location[1], days=7)
-    
-    # Get soil data
-    soil_data = soil_sensor_manager.get_sensor_data(f"sensor_{farm_id}")
+    # Get the materialized snapshot instead of calling upstreams per render
+    snapshot = _load_dashboard_snapshot(farm_id)
     
     # Generate recommendations
     all_recommendations = []
     
     # Add crop recommendations
-    crop_recommendations = [
+    crop_recommendations = snapshot["recommendations"] if snapshot and snapshot["recommendations"] else [
         {
             "category": "irrigation",
             "description": "Irrigation recommended within the next 48 hours. Soil moisture is below optimal levels.",
@@ -319,13 +308,13 @@ def recommendations():
     all_recommendations.extend(crop_recommendations)
     
     # Sort recommendations by priority
-    priority_order = {"high": 0, "medium": 1, "low": 2}
-    all_recommendations.sort(key=lambda x: priority_order[x["priority"]])
+    all_recommendations = _sorted_recommendations(all_recommendations)
     
     # Prepare data for the recommendations page
     context = {
         'farm_id': farm_id,
         'recommendations': all_recommendations,
+        'snapshot': snapshot,
         'now': datetime.now()  # Add current datetime for date calculations in template
     }
     
@@ -739,6 +728,34 @@ def set_language():
     # Redirect back to the referring page
     return redirect(request.referrer or url_for('main.dashboard'))
 
+def _load_dashboard_snapshot(farm_id):
+    """
+    Get the dashboard snapshot of a farm, queueing a refresh if requested
+
+    Pass ?refresh=1 to queue the farm for the background refresher; the
+    current snapshot is rendered without waiting for it.
+
+    Args:
+        farm_id (str): Farm ID from the request
+
+    Returns:
+        dict: Snapshot data with staleness metadata, or None if unavailable
+    """
+    try:
+        farm_id = int(farm_id)
+    except (TypeError, ValueError):
+        return None
+    
+    if request.args.get('refresh') == '1':
+        request_refresh(farm_id)
+    
+    return get_dashboard_snapshot(farm_id)
+
+def _sorted_recommendations(recommendations):
+    """Sort recommendations by priority, high first"""
+    priority_order = {"high": 0, "medium": 1, "low": 2}
+    return sorted(recommendations, key=lambda x: priority_order.get(x.get("priority"), len(priority_order)))
+
 def get_sample_recommendations(farm_id):
     """Get sample recommendations for the dashboard"""
     return [
@@ -1,9 +1,9 @@
 import os
 import json
 import logging
-import requests
 from datetime import datetime
 from utils.service_proxy import get_ai_response_proxy
+from utils.http_client import get_session
 
 logger = logging.getLogger(__name__)
 
@@ -174,7 +174,7 @@ def get_ai_response(user_query, context="general_farming", conversation_history=
     
     try:
         # Make request to Perplexity API
-        response = requests.post(
+        response = get_session("perplexity", read_timeout=60).post(
             PERPLEXITY_API_URL,
             headers=headers,
             json=payload
@@ -0,0 +1,60 @@
+import math
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Approximate length of one degree of latitude in metres
+METERS_PER_DEGREE = 111320
+
+def plan_tiles(bbox, resolution_m=10, tile_px=512):
+    """
+    Split an area of interest into a grid of raster tiles
+
+    Args:
+        bbox (list): Bounding box coordinates [min_lon, min_lat, max_lon, max_lat]
+        resolution_m (float): Ground resolution of one pixel in metres
+        tile_px (int): Maximum tile width/height in pixels
+
+    Returns:
+        dict: Full raster shape and a list of tiles, each with its bbox and
+            pixel window (row, col, height, width) in the full raster
+    """
+    min_lon, min_lat, max_lon, max_lat = [float(x) for x in bbox]
+    if max_lon <= min_lon or max_lat <= min_lat:
+        raise ValueError(f"Invalid bounding box: {bbox}")
+
+    # Degrees per pixel, correcting longitude for the latitude of the AOI centre
+    mid_lat = math.radians((min_lat + max_lat) / 2)
+    lat_step = resolution_m / METERS_PER_DEGREE
+    lon_step = resolution_m / (METERS_PER_DEGREE * max(math.cos(mid_lat), 1e-6))
+
+    height = max(1, math.ceil((max_lat - min_lat) / lat_step))
+    width = max(1, math.ceil((max_lon - min_lon) / lon_step))
+
+    tiles = []
+
+    for row in range(0, height, tile_px):
+        tile_height = min(tile_px, height - row)
+
+        # Raster rows run north to south
+        tile_max_lat = max_lat - row * lat_step
+        tile_min_lat = max(min_lat, tile_max_lat - tile_height * lat_step)
+
+        for col in range(0, width, tile_px):
+            tile_width = min(tile_px, width - col)
+            tile_min_lon = min_lon + col * lon_step
+            tile_max_lon = min(max_lon, tile_min_lon + tile_width * lon_step)
+
+            tiles.append({
+                "bbox": [tile_min_lon, tile_min_lat, tile_max_lon, tile_max_lat],
+                "row": row,
+                "col": col,
+                "height": tile_height,
+                "width": tile_width
+            })
+
+    return {
+        "height": height,
+        "width": width,
+        "tiles": tiles
+    }
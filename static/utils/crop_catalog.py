@@ -0,0 +1,342 @@
+"""
+Crop agronomy catalog shared by the models, sensor analysis and forecasts
+
+Every per-crop parameter lives in one record per crop. The catalog is
+built once at import, frozen into read-only mappings and tuples, and
+exposed both as per-crop lookups and as NumPy tables indexed by crop code
+so hot paths never rebuild parameter dicts per call.
+"""
+import numpy as np
+from functools import lru_cache
+from types import MappingProxyType
+
+# Integer crop codes; code len(CROP_CODES) is the default crop
+CROP_CODES = ("maize", "rice", "sorghum", "millet", "cassava", "yam", "sweet_potato", "groundnut", "cowpea", "soybean")
+
+# Agronomic parameters per crop, by section. A crop without a section uses
+# the "default" record's section; "planting" has no default.
+CROP_AGRONOMY = {
+    "maize": {
+        "yield": {"base_yield": 3.5, "ndvi_weight": 0.6, "soil_weight": 0.2, "weather_weight": 0.2},
+        "moisture_range": (40, 60),
+        "moisture_limits": {"min_moisture": 40, "optimal_moisture": 60, "max_moisture": 80},
+        "irrigation_stages": {
+            "germination": {"min_moisture": 50, "optimal_moisture": 70, "daily_et": 2.5},
+            "vegetative": {"min_moisture": 45, "optimal_moisture": 65, "daily_et": 4.0},
+            "reproductive": {"min_moisture": 55, "optimal_moisture": 75, "daily_et": 6.0},
+            "maturity": {"min_moisture": 40, "optimal_moisture": 60, "daily_et": 3.0}
+        },
+        "fertility": {"nitrogen": (20, 30), "phosphorus": (10, 15), "potassium": (15, 25), "ph": (5.8, 7.0)},
+        "recommendation_thresholds": {
+            "optimal_soil_moisture": (40, 60),
+            "optimal_soil_temp": (18, 32),
+            "optimal_air_temp": (18, 32),
+            "optimal_nitrogen": (20, 30),
+            "optimal_phosphorus": (10, 15),
+            "optimal_potassium": (15, 25),
+            "optimal_ph": (5.8, 7.0)
+        },
+        "pest_disease": (
+            {
+                "name": "Fall Armyworm",
+                "temp_range": (20, 32),
+                "humidity_range": (60, 95),
+                "rain_threshold": 5,
+                "ndvi_threshold": 0.6
+            },
+            {
+                "name": "Maize Streak Virus",
+                "temp_range": (25, 35),
+                "humidity_range": (70, 100),
+                "rain_threshold": 0,
+                "ndvi_threshold": 0.5
+            },
+            {
+                "name": "Gray Leaf Spot",
+                "temp_range": (22, 30),
+                "humidity_range": (85, 100),
+                "rain_threshold": 10,
+                "ndvi_threshold": 0.55
+            }
+        ),
+        "planting": {
+            "min_temp": 10,
+            "optimal_temp": 25,
+            "max_temp": 35,
+            "min_rain": 10,
+            "optimal_rain": 30.0,
+            "max_rain": 50
+        }
+    },
+    "rice": {
+        "yield": {"base_yield": 4.0, "ndvi_weight": 0.5, "soil_weight": 0.3, "weather_weight": 0.2},
+        "moisture_range": (60, 80),
+        "moisture_limits": {"min_moisture": 60, "optimal_moisture": 80, "max_moisture": 100},
+        "irrigation_stages": {
+            "germination": {"min_moisture": 70, "optimal_moisture": 90, "daily_et": 3.0},
+            "vegetative": {"min_moisture": 80, "optimal_moisture": 100, "daily_et": 5.0},
+            "reproductive": {"min_moisture": 80, "optimal_moisture": 100, "daily_et": 6.0},
+            "maturity": {"min_moisture": 70, "optimal_moisture": 90, "daily_et": 4.0}
+        },
+        "fertility": {"nitrogen": (15, 25), "phosphorus": (8, 13), "potassium": (15, 25), "ph": (5.5, 6.5)},
+        "recommendation_thresholds": {
+            "optimal_soil_moisture": (60, 80),
+            "optimal_soil_temp": (20, 30),
+            "optimal_air_temp": (20, 32),
+            "optimal_nitrogen": (15, 25),
+            "optimal_phosphorus": (8, 13),
+            "optimal_potassium": (15, 25),
+            "optimal_ph": (5.5, 6.5)
+        },
+        "pest_disease": (
+            {
+                "name": "Rice Blast",
+                "temp_range": (24, 30),
+                "humidity_range": (85, 100),
+                "rain_threshold": 5,
+                "ndvi_threshold": 0.6
+            },
+            {
+                "name": "Brown Plant Hopper",
+                "temp_range": (25, 32),
+                "humidity_range": (70, 95),
+                "rain_threshold": 0,
+                "ndvi_threshold": 0.65
+            }
+        ),
+        "planting": {
+            "min_temp": 15,
+            "optimal_temp": 30,
+            "max_temp": 35,
+            "min_rain": 20,
+            "optimal_rain": 60.0,
+            "max_rain": 100
+        }
+    },
+    "sorghum": {
+        "yield": {"base_yield": 2.5, "ndvi_weight": 0.5, "soil_weight": 0.2, "weather_weight": 0.3},
+        "moisture_range": (35, 55),
+        "moisture_limits": {"min_moisture": 35, "optimal_moisture": 55, "max_moisture": 75},
+        "fertility": {"nitrogen": (15, 25), "phosphorus": (10, 15), "potassium": (15, 20), "ph": (5.5, 7.5)},
+        "planting": {
+            "min_temp": 12,
+            "optimal_temp": 27,
+            "max_temp": 38,
+            "min_rain": 5,
+            "optimal_rain": 22.5,
+            "max_rain": 40
+        }
+    },
+    "millet": {
+        "yield": {"base_yield": 1.5, "ndvi_weight": 0.5, "soil_weight": 0.2, "weather_weight": 0.3},
+        "moisture_range": (30, 50),
+        "moisture_limits": {"min_moisture": 30, "optimal_moisture": 50, "max_moisture": 70},
+        "planting": {
+            "min_temp": 12,
+            "optimal_temp": 28,
+            "max_temp": 40,
+            "min_rain": 5,
+            "optimal_rain": 17.5,
+            "max_rain": 30
+        }
+    },
+    "cassava": {
+        "yield": {"base_yield": 10.0, "ndvi_weight": 0.4, "soil_weight": 0.4, "weather_weight": 0.2},
+        "moisture_range": (35, 55),
+        "moisture_limits": {"min_moisture": 35, "optimal_moisture": 55, "max_moisture": 75},
+        "planting": {
+            "min_temp": 18,
+            "optimal_temp": 28,
+            "max_temp": 35,
+            "min_rain": 10,
+            "optimal_rain": 35.0,
+            "max_rain": 60
+        }
+    },
+    "yam": {
+        "moisture_range": (45, 65),
+        "moisture_limits": {"min_moisture": 45, "optimal_moisture": 65, "max_moisture": 85},
+        "planting": {
+            "min_temp": 20,
+            "optimal_temp": 30,
+            "max_temp": 35,
+            "min_rain": 15,
+            "optimal_rain": 42.5,
+            "max_rain": 70
+        }
+    },
+    "sweet_potato": {
+        "moisture_range": (40, 60),
+        "moisture_limits": {"min_moisture": 40, "optimal_moisture": 60, "max_moisture": 80},
+        "planting": {
+            "min_temp": 15,
+            "optimal_temp": 24,
+            "max_temp": 35,
+            "min_rain": 10,
+            "optimal_rain": 30.0,
+            "max_rain": 50
+        }
+    },
+    "groundnut": {
+        "moisture_range": (35, 55),
+        "moisture_limits": {"min_moisture": 35, "optimal_moisture": 55, "max_moisture": 75},
+        "planting": {
+            "min_temp": 15,
+            "optimal_temp": 28,
+            "max_temp": 35,
+            "min_rain": 5,
+            "optimal_rain": 22.5,
+            "max_rain": 40
+        }
+    },
+    "cowpea": {
+        "moisture_range": (30, 50),
+        "moisture_limits": {"min_moisture": 30, "optimal_moisture": 50, "max_moisture": 70},
+        "planting": {
+            "min_temp": 18,
+            "optimal_temp": 28,
+            "max_temp": 35,
+            "min_rain": 5,
+            "optimal_rain": 17.5,
+            "max_rain": 30
+        }
+    },
+    "soybean": {
+        "moisture_range": (40, 60),
+        "moisture_limits": {"min_moisture": 40, "optimal_moisture": 60, "max_moisture": 80},
+        "planting": {
+            "min_temp": 15,
+            "optimal_temp": 26,
+            "max_temp": 35,
+            "min_rain": 10,
+            "optimal_rain": 30.0,
+            "max_rain": 50
+        }
+    },
+    "default": {
+        "yield": {"base_yield": 3.0, "ndvi_weight": 0.5, "soil_weight": 0.25, "weather_weight": 0.25},
+        "moisture_range": (40, 60),
+        "moisture_limits": {"min_moisture": 40, "optimal_moisture": 60, "max_moisture": 80},
+        "irrigation_stages": {
+            "germination": {"min_moisture": 50, "optimal_moisture": 70, "daily_et": 2.5},
+            "vegetative": {"min_moisture": 45, "optimal_moisture": 65, "daily_et": 4.0},
+            "reproductive": {"min_moisture": 50, "optimal_moisture": 70, "daily_et": 5.0},
+            "maturity": {"min_moisture": 40, "optimal_moisture": 60, "daily_et": 3.0}
+        },
+        "fertility": {"nitrogen": (15, 25), "phosphorus": (10, 15), "potassium": (15, 20), "ph": (6.0, 7.0)},
+        "recommendation_thresholds": {
+            "optimal_soil_moisture": (40, 60),
+            "optimal_soil_temp": (18, 30),
+            "optimal_air_temp": (18, 30),
+            "optimal_nitrogen": (15, 25),
+            "optimal_phosphorus": (10, 15),
+            "optimal_potassium": (15, 20),
+            "optimal_ph": (6.0, 7.0)
+        },
+        "pest_disease": (
+            {
+                "name": "Aphids",
+                "temp_range": (20, 30),
+                "humidity_range": (60, 90),
+                "rain_threshold": 0,
+                "ndvi_threshold": 0.6
+            },
+            {
+                "name": "Fungal Diseases",
+                "temp_range": (18, 28),
+                "humidity_range": (80, 100),
+                "rain_threshold": 5,
+                "ndvi_threshold": 0.55
+            }
+        )
+    }
+}
+
+def _freeze(value):
+    """Recursively convert catalog data into read-only structures"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+CROP_AGRONOMY = _freeze(CROP_AGRONOMY)
+
+_CROP_INDEX = MappingProxyType({name: code for code, name in enumerate(CROP_CODES)})
+
+def crop_code(crop):
+    """
+    Get the integer code of a crop
+
+    Args:
+        crop (str): Crop name (case-sensitive)
+
+    Returns:
+        int: Crop code, or len(CROP_CODES) for crops not in CROP_CODES
+    """
+    return _CROP_INDEX.get(crop, len(CROP_CODES))
+
+@lru_cache(maxsize=None)
+def crop_section(section):
+    """
+    Get one section of the catalog for every crop that defines it
+
+    Args:
+        section (str): Section name, e.g. "fertility"
+
+    Returns:
+        mappingproxy: Crop -> read-only section data, including "default"
+            when the default record has the section
+    """
+    return MappingProxyType({
+        crop: record[section]
+        for crop, record in CROP_AGRONOMY.items()
+        if section in record
+    })
+
+def crop_params(section, crop):
+    """
+    Get one section of the catalog for a crop
+
+    Args:
+        section (str): Section name, e.g. "fertility"
+        crop (str): Crop name (case-sensitive, like the original lookups)
+
+    Returns:
+        Read-only section data of the crop, the default section for crops
+        without one, or None if neither exists
+    """
+    entries = crop_section(section)
+    return entries.get(crop, entries.get("default"))
+
+@lru_cache(maxsize=None)
+def crop_table(section, fields):
+    """
+    Get numeric parameters of a section as a table indexed by crop code
+
+    Args:
+        section (str): Section name, e.g. "yield"
+        fields (tuple): Keys of the section; a (key, index) pair selects one
+            bound of a range
+
+    Returns:
+        numpy.ndarray: Read-only array of shape (len(CROP_CODES) + 1,
+            len(fields)); the last row is the default crop, and crops without
+            parameters get NaN
+    """
+    rows = []
+    for name in CROP_CODES + ("default",):
+        params = crop_params(section, name)
+        row = []
+        for field in fields:
+            if params is None:
+                row.append(np.nan)
+            elif isinstance(field, tuple):
+                row.append(params[field[0]][field[1]])
+            else:
+                row.append(params[field])
+        rows.append(row)
+
+    table = np.array(rows, dtype=np.float64).reshape(len(rows), len(fields))
+    table.setflags(write=False)
+    return table
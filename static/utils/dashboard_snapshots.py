@@ -0,0 +1,265 @@
+"""
+Per-farm dashboard snapshots kept fresh by a background refresher
+
+Web workers only read snapshots; explicit refresh requests are queued in
+the database. A single designated process runs the refresher, which
+drains that queue and periodically sweeps stale farms:
+
+    python -m utils.dashboard_snapshots
+
+Deployments that refresh from cron instead run one pass per invocation,
+which also drains the queue:
+
+    python -m utils.dashboard_snapshots --once
+"""
+import os
+import sys
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+from app import db
+from models import DashboardRefreshRequest
+from utils.fusion_batch import get_farm_snapshot, run_fusion_batch
+
+logger = logging.getLogger(__name__)
+
+# Snapshots older than this are served but flagged stale
+DASHBOARD_SNAPSHOT_MAX_AGE = float(os.environ.get('DASHBOARD_SNAPSHOT_MAX_AGE', 3600))
+
+# Seconds between background sweeps over stale farms (0 disables the sweep,
+# e.g. when the fusion batch runs from cron; the queue is still drained)
+DASHBOARD_REFRESH_INTERVAL = float(os.environ.get('DASHBOARD_REFRESH_INTERVAL', 900))
+
+# Seconds between checks of the refresh queue
+DASHBOARD_QUEUE_POLL_INTERVAL = float(os.environ.get('DASHBOARD_QUEUE_POLL_INTERVAL', 5))
+
+_wake = threading.Event()
+_refresher = None
+_refresher_lock = threading.Lock()
+
+def get_dashboard_snapshot(farm_id):
+    """
+    Get the materialized dashboard snapshot of a farm
+
+    This only reads the database. Stale and missing snapshots are
+    recomputed by the refresher's periodic sweep (or the cron batch); use
+    request_refresh to queue a farm explicitly.
+
+    Args:
+        farm_id (int): Farm ID
+
+    Returns:
+        dict: Snapshot data with staleness metadata, or None if the farm has
+            no snapshot yet
+    """
+    try:
+        snapshot = get_farm_snapshot(farm_id)
+    except Exception as e:
+        logger.error(f"Error reading dashboard snapshot for farm {farm_id}: {str(e)}")
+        return None
+
+    if snapshot is None or snapshot["computed_at"] is None:
+        return None
+
+    age = (datetime.utcnow() - datetime.fromisoformat(snapshot["computed_at"])).total_seconds()
+    snapshot["age_seconds"] = round(max(0.0, age), 1)
+    snapshot["max_age_seconds"] = DASHBOARD_SNAPSHOT_MAX_AGE
+    snapshot["stale"] = age > DASHBOARD_SNAPSHOT_MAX_AGE
+    snapshot["refresh_pending"] = is_refresh_pending(farm_id)
+
+    return snapshot
+
+def request_refresh(farm_id):
+    """
+    Queue a farm for the next background refresh without waiting for it
+
+    Args:
+        farm_id (int): Farm ID
+
+    Returns:
+        bool: True if the farm is queued
+    """
+    try:
+        if DashboardRefreshRequest.query.filter_by(farm_id=int(farm_id)).first() is None:
+            db.session.add(DashboardRefreshRequest(farm_id=int(farm_id)))
+            db.session.commit()
+    except Exception as e:
+        # Another process may have queued the farm first
+        db.session.rollback()
+        logger.error(f"Error queueing dashboard refresh for farm {farm_id}: {str(e)}")
+        return is_refresh_pending(farm_id)
+
+    _wake.set()
+    return True
+
+def is_refresh_pending(farm_id):
+    """
+    Check whether a farm is queued for refresh
+
+    Args:
+        farm_id (int): Farm ID
+
+    Returns:
+        bool: True if the farm is queued
+    """
+    try:
+        return DashboardRefreshRequest.query.filter_by(farm_id=int(farm_id)).first() is not None
+    except Exception as e:
+        logger.error(f"Error reading dashboard refresh queue: {str(e)}")
+        return False
+
+def refresh_snapshot(farm_id):
+    """
+    Recompute the snapshot of one farm immediately
+
+    This blocks on upstream calls; request handlers should use
+    request_refresh instead.
+
+    Args:
+        farm_id (int): Farm ID
+
+    Returns:
+        dict: Fresh snapshot data with staleness metadata, or None if the farm
+            could not be processed
+    """
+    try:
+        run_fusion_batch(farm_ids=[farm_id], fusion_workers=1)
+    except Exception as e:
+        logger.error(f"Error refreshing dashboard snapshot for farm {farm_id}: {str(e)}")
+        return None
+
+    return get_dashboard_snapshot(farm_id)
+
+def drain_refresh_queue():
+    """
+    Refresh the queued farms and remove them from the queue
+
+    Returns:
+        int: Number of farms refreshed
+    """
+    queued = DashboardRefreshRequest.query.all()
+    if not queued:
+        return 0
+
+    read_at = datetime.utcnow()
+    farm_ids = sorted(queued_request.farm_id for queued_request in queued)
+
+    # Fuse inline: forking a process pool from the refresher thread is not safe
+    run_fusion_batch(farm_ids=farm_ids, fusion_workers=1)
+
+    # The batch clears the farms it covered; this also drops requests for
+    # farms that no longer exist, but keeps requests made while it ran
+    DashboardRefreshRequest.query.filter(
+        DashboardRefreshRequest.farm_id.in_(farm_ids),
+        DashboardRefreshRequest.requested_at <= read_at
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return len(farm_ids)
+
+def sweep_stale_snapshots():
+    """
+    Refresh every farm whose snapshot is missing or older than DASHBOARD_SNAPSHOT_MAX_AGE
+
+    Returns:
+        dict: Batch summary
+    """
+    stale_before = datetime.utcnow() - timedelta(seconds=DASHBOARD_SNAPSHOT_MAX_AGE)
+    return run_fusion_batch(stale_before=stale_before, fusion_workers=1)
+
+def _refresh_loop(app):
+    """Refresh queued farms as they arrive and sweep stale farms periodically"""
+    sweep = DASHBOARD_REFRESH_INTERVAL > 0
+
+    # The first sweep waits a full interval so restarts do not hammer upstreams
+    next_sweep = datetime.utcnow() + timedelta(seconds=DASHBOARD_REFRESH_INTERVAL)
+
+    while True:
+        timeout = DASHBOARD_QUEUE_POLL_INTERVAL
+        if sweep:
+            timeout = max(0.0, min(timeout, (next_sweep - datetime.utcnow()).total_seconds()))
+        _wake.wait(timeout)
+        _wake.clear()
+
+        try:
+            with app.app_context():
+                drain_refresh_queue()
+
+                if sweep and datetime.utcnow() >= next_sweep:
+                    sweep_stale_snapshots()
+                    next_sweep = datetime.utcnow() + timedelta(seconds=DASHBOARD_REFRESH_INTERVAL)
+        except Exception as e:
+            logger.error(f"Error in dashboard snapshot refresher: {str(e)}")
+            # Back off before retrying a failing queue or sweep
+            time.sleep(DASHBOARD_QUEUE_POLL_INTERVAL)
+            if sweep and datetime.utcnow() >= next_sweep:
+                next_sweep = datetime.utcnow() + timedelta(seconds=DASHBOARD_REFRESH_INTERVAL)
+
+def start_refresher(app):
+    """
+    Start the background refresher thread in this process
+
+    Call this once from the single process designated to refresh snapshots
+    (see run_refresher), never from request handlers: every web worker
+    would otherwise repeat the same upstream sweep.
+
+    Args:
+        app (Flask): Application whose context the refresher runs in
+
+    Returns:
+        bool: True if the refresher is running
+    """
+    global _refresher
+
+    with _refresher_lock:
+        if _refresher is None:
+            _refresher = threading.Thread(
+                target=_refresh_loop,
+                args=(app,),
+                name="dashboard-snapshot-refresher",
+                daemon=True
+            )
+            _refresher.start()
+            logger.info("Dashboard snapshot refresher started")
+
+    return True
+
+def run_refresher(app):
+    """
+    Run the refresher in the foreground, as a dedicated process
+
+    The refresh queue is always drained; the periodic stale sweep only runs
+    when DASHBOARD_REFRESH_INTERVAL is positive.
+
+    Args:
+        app (Flask): Application whose context the refresher runs in
+    """
+    if DASHBOARD_REFRESH_INTERVAL <= 0:
+        logger.info("Dashboard snapshot refresher running (queue only, stale sweep disabled)")
+    else:
+        logger.info("Dashboard snapshot refresher running")
+    _refresh_loop(app)
+
+def run_once(app):
+    """
+    Drain the refresh queue and sweep stale farms once, e.g. from cron
+
+    Args:
+        app (Flask): Application whose context the pass runs in
+
+    Returns:
+        dict: Number of queued farms refreshed and the stale sweep summary
+    """
+    with app.app_context():
+        return {
+            "queued_farms": drain_refresh_queue(),
+            "stale_sweep": sweep_stale_snapshots()
+        }
+
+if __name__ == "__main__":
+    from app import app
+    logging.basicConfig(level=logging.INFO)
+    if "--once" in sys.argv[1:]:
+        print(run_once(app))
+    else:
+        run_refresher(app)
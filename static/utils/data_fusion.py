@@ -3,6 +3,7 @@ import logging
 import numpy as np
 from datetime import datetime, timedelta
 import json
+from utils.fusion_rules import INSIGHT_RULE_TABLE, RECOMMENDATION_RULE_TABLE
 
 logger = logging.getLogger(__name__)
 
@@ -53,6 +54,13 @@ class DataFusionEngine:
                 }
             }
             
+            # Add the farm's NDVI history summary when running statistics are available
+            ndvi_stats = satellite_data.get("ndvi_stats")
+            if ndvi_stats:
+                fused_data["satellite"]["mean_ndvi"] = ndvi_stats["mean_ndvi"]
+                fused_data["satellite"]["ndvi_trend"] = ndvi_stats["ndvi_trend"]
+                fused_data["satellite"]["ndvi_observations"] = ndvi_stats["count"]
+            
             # Generate integrated insights
             insights = self._generate_integrated_insights(fused_data)
             
@@ -67,82 +75,7 @@ class DataFusionEngine:
     
     def _generate_integrated_insights(self, fused_data):
         """Generate integrated insights from fused data"""
-        insights = []
-        
-        # Example: Detect water stress by combining NDVI, soil moisture, and weather
-        ndvi = fused_data["satellite"]["ndvi"]
-        soil_moisture = fused_data["soil"]["moisture"]
-        precipitation = fused_data["weather"]["precipitation"]
-        
-        if ndvi < 0.4 and soil_moisture < 30 and precipitation < 5:
-            insights.append({
-                "type": "warning",
-                "category": "water_stress",
-                "description": "Critical water stress detected. Immediate irrigation recommended.",
-                "confidence": "high"
-            })
-        elif ndvi < 0.5 and soil_moisture < 40 and precipitation < 10:
-            insights.append({
-                "type": "warning",
-                "category": "water_stress",
-                "description": "Moderate water stress detected. Consider irrigation in the next 1-2 days.",
-                "confidence": "medium"
-            })
-            
-        # Example: Detect nutrient deficiency by combining NDVI and soil nutrient levels
-        nitrogen = fused_data["soil"]["nitrogen"]
-        phosphorus = fused_data["soil"]["phosphorus"]
-        potassium = fused_data["soil"]["potassium"]
-        
-        if ndvi < 0.4 and nitrogen < 15:
-            insights.append({
-                "type": "warning",
-                "category": "nutrient_deficiency",
-                "description": "Nitrogen deficiency detected. Apply nitrogen-rich fertilizer.",
-                "confidence": "medium"
-            })
-            
-        if ndvi < 0.4 and phosphorus < 10:
-            insights.append({
-                "type": "warning",
-                "category": "nutrient_deficiency",
-                "description": "Phosphorus deficiency detected. Apply phosphorus-rich fertilizer.",
-                "confidence": "medium"
-            })
-            
-        if ndvi < 0.4 and potassium < 15:
-            insights.append({
-                "type": "warning",
-                "category": "nutrient_deficiency",
-                "description": "Potassium deficiency detected. Apply potassium-rich fertilizer.",
-                "confidence": "medium"
-            })
-            
-        # Example: Detect optimal conditions for planting
-        soil_temp = fused_data["soil"]["temperature"]
-        air_temp = fused_data["weather"]["temperature"]
-        
-        if 20 <= soil_temp <= 30 and 20 <= air_temp <= 30 and 40 <= soil_moisture <= 60:
-            insights.append({
-                "type": "opportunity",
-                "category": "planting_conditions",
-                "description": "Optimal conditions for planting. Consider planting in the next few days.",
-                "confidence": "high"
-            })
-            
-        # Example: Detect pest/disease risk based on weather and crop health
-        humidity = fused_data["weather"]["humidity"]
-        crop_health = fused_data["satellite"]["crop_health_status"]
-        
-        if humidity > 80 and 22 <= air_temp <= 28 and crop_health in ["Fair", "Poor"]:
-            insights.append({
-                "type": "warning",
-                "category": "pest_disease_risk",
-                "description": "High risk of fungal disease due to high humidity and temperature. Consider preventive fungicide application.",
-                "confidence": "medium"
-            })
-            
-        return insights
+        return INSIGHT_RULE_TABLE.apply([fused_data])[0]
     
     def generate_crop_recommendations(self, fused_data, crop_type):
         """
@@ -156,179 +89,63 @@ class DataFusionEngine:
             list: List of recommendations
         """
         try:
-            recommendations = []
-            
-            # Extract key metrics
-            ndvi = fused_data["fused_data"]["satellite"]["ndvi"]
-            soil_moisture = fused_data["fused_data"]["soil"]["moisture"]
-            soil_temp = fused_data["fused_data"]["soil"]["temperature"]
-            air_temp = fused_data["fused_data"]["weather"]["temperature"]
-            precipitation = fused_data["fused_data"]["weather"]["precipitation"]
-            nitrogen = fused_data["fused_data"]["soil"]["nitrogen"]
-            phosphorus = fused_data["fused_data"]["soil"]["phosphorus"]
-            potassium = fused_data["fused_data"]["soil"]["potassium"]
-            ph = fused_data["fused_data"]["soil"]["ph"]
-            
-            # Define crop-specific thresholds
-            crop_thresholds = {
-                "maize": {
-                    "optimal_soil_moisture": (40, 60),
-                    "optimal_soil_temp": (18, 32),
-                    "optimal_air_temp": (18, 32),
-                    "optimal_nitrogen": (20, 30),
-                    "optimal_phosphorus": (10, 15),
-                    "optimal_potassium": (15, 25),
-                    "optimal_ph": (5.8, 7.0)
-                },
-                "rice": {
-                    "optimal_soil_moisture": (60, 80),
-                    "optimal_soil_temp": (20, 30),
-                    "optimal_air_temp": (20, 32),
-                    "optimal_nitrogen": (15, 25),
-                    "optimal_phosphorus": (8, 13),
-                    "optimal_potassium": (15, 25),
-                    "optimal_ph": (5.5, 6.5)
-                },
-                # Default thresholds for other crops
-                "default": {
-                    "optimal_soil_moisture": (40, 60),
-                    "optimal_soil_temp": (18, 30),
-                    "optimal_air_temp": (18, 30),
-                    "optimal_nitrogen": (15, 25),
-                    "optimal_phosphorus": (10, 15),
-                    "optimal_potassium": (15, 20),
-                    "optimal_ph": (6.0, 7.0)
-                }
-            }
-            
-            # Get thresholds for the specified crop
-            thresholds = crop_thresholds.get(crop_type.lower(), crop_thresholds["default"])
-            
-            # Irrigation recommendation
-            if soil_moisture < thresholds["optimal_soil_moisture"][0]:
-                if soil_moisture < thresholds["optimal_soil_moisture"][0] - 10:
-                    priority = "high"
-                    description = f"Critical soil moisture level ({soil_moisture}%). Immediate irrigation required."
-                else:
-                    priority = "medium"
-                    description = f"Low soil moisture level ({soil_moisture}%). Irrigation recommended in the next 1-2 days."
-                
-                recommendations.append({
-                    "category": "irrigation",
-                    "description": description,
-                    "priority": priority
-                })
-            elif soil_moisture > thresholds["optimal_soil_moisture"][1]:
-                if soil_moisture > thresholds["optimal_soil_moisture"][1] + 10:
-                    priority = "medium"
-                    description = f"Excessive soil moisture level ({soil_moisture}%). Avoid irrigation and improve drainage if possible."
-                else:
-                    priority = "low"
-                    description = f"High soil moisture level ({soil_moisture}%). Delay irrigation until moisture decreases."
-                
-                recommendations.append({
-                    "category": "irrigation",
-                    "description": description,
-                    "priority": priority
-                })
-                
-            # Fertilization recommendations
-            if nitrogen < thresholds["optimal_nitrogen"][0]:
-                if nitrogen < thresholds["optimal_nitrogen"][0] - 5:
-                    priority = "high"
-                    description = f"Severe nitrogen deficiency detected ({nitrogen} ppm). Apply nitrogen-rich fertilizer as soon as possible."
-                else:
-                    priority = "medium"
-                    description = f"Nitrogen deficiency detected ({nitrogen} ppm). Apply nitrogen-rich fertilizer."
-                
-                recommendations.append({
-                    "category": "fertilization",
-                    "description": description,
-                    "priority": priority
-                })
-                
-            if phosphorus < thresholds["optimal_phosphorus"][0]:
-                if phosphorus < thresholds["optimal_phosphorus"][0] - 3:
-                    priority = "high"
-                    description = f"Severe phosphorus deficiency detected ({phosphorus} ppm). Apply phosphorus-rich fertilizer as soon as possible."
-                else:
-                    priority = "medium"
-                    description = f"Phosphorus deficiency detected ({phosphorus} ppm). Apply phosphorus-rich fertilizer."
-                
-                recommendations.append({
-                    "category": "fertilization",
-                    "description": description,
-                    "priority": priority
-                })
-                
-            if potassium < thresholds["optimal_potassium"][0]:
-                if potassium < thresholds["optimal_potassium"][0] - 5:
-                    priority = "high"
-                    description = f"Severe potassium deficiency detected ({potassium} ppm). Apply potassium-rich fertilizer as soon as possible."
-                else:
-                    priority = "medium"
-                    description = f"Potassium deficiency detected ({potassium} ppm). Apply potassium-rich fertilizer."
-                
-                recommendations.append({
-                    "category": "fertilization",
-                    "description": description,
-                    "priority": priority
-                })
-                
-            # pH management
-            if ph < thresholds["optimal_ph"][0]:
-                if ph < thresholds["optimal_ph"][0] - 0.5:
-                    priority = "medium"
-                    description = f"Soil pH is too acidic ({ph}). Apply agricultural lime to increase pH."
-                else:
-                    priority = "low"
-                    description = f"Soil pH is slightly acidic ({ph}). Consider applying lime to increase pH."
-                
-                recommendations.append({
-                    "category": "soil_amendment",
-                    "description": description,
-                    "priority": priority
-                })
-            elif ph > thresholds["optimal_ph"][1]:
-                if ph > thresholds["optimal_ph"][1] + 0.5:
-                    priority = "medium"
-                    description = f"Soil pH is too alkaline ({ph}). Apply sulfur or acidic organic matter to decrease pH."
-                else:
-                    priority = "low"
-                    description = f"Soil pH is slightly alkaline ({ph}). Consider applying acidic organic matter to decrease pH."
-                
-                recommendations.append({
-                    "category": "soil_amendment",
-                    "description": description,
-                    "priority": priority
-                })
-                
-            # Crop health recommendations based on NDVI
-            if ndvi < 0.3:
-                priority = "high"
-                description = f"Critical crop health issue detected (NDVI: {ndvi:.2f}). Check for pests, diseases, or severe nutrient deficiencies."
-                
-                recommendations.append({
-                    "category": "crop_health",
-                    "description": description,
-                    "priority": priority
-                })
-            elif ndvi < 0.5:
-                priority = "medium"
-                description = f"Potential crop health issue detected (NDVI: {ndvi:.2f}). Monitor for pests, diseases, or nutrient deficiencies."
-                
-                recommendations.append({
-                    "category": "crop_health",
-                    "description": description,
-                    "priority": priority
-                })
-                
-            # Sort recommendations by priority
-            priority_order = {"high": 0, "medium": 1, "low": 2}
-            recommendations.sort(key=lambda x: priority_order[x["priority"]])
-            
-            return recommendations
+            return self.generate_crop_recommendations_batch([fused_data], [crop_type])[0]
             
         except Exception as e:
             self.logger.error(f"Error generating crop recommendations: {str(e)}")
             return []
+    
+    def generate_crop_recommendations_batch(self, fused_records, crop_types):
+        """
+        Generate crop-specific recommendations for many fused records at once
+        
+        All records are checked against the compiled RECOMMENDATION_RULES in
+        one vectorized pass, using the thresholds of each record's crop.
+        
+        Args:
+            fused_records (list): Fused data from fuse_satellite_weather_soil
+            crop_types (str or list): Crop type for all records, or one per record
+            
+        Returns:
+            list: List of recommendations per record, high priority first
+        """
+        records = [fused_data["fused_data"] for fused_data in fused_records]
+        
+        # The table emits each record's recommendations sorted by priority
+        return RECOMMENDATION_RULE_TABLE.apply(records, crop_types)
+
+def fuse_farm_batch(items):
+    """
+    Fuse data and generate recommendations for a batch of farms
+    
+    Defined at module level so it can run in a process pool worker.
+    
+    Args:
+        items (list): (farm_id, crop_type, satellite_data, weather_data, soil_data) tuples
+        
+    Returns:
+        list: (farm_id, fused_data, recommendations) tuples
+    """
+    engine = DataFusionEngine()
+    fused = [
+        engine.fuse_satellite_weather_soil(satellite_data, weather_data, soil_data)
+        for _, _, satellite_data, weather_data, soil_data in items
+    ]
+    
+    # Evaluate the recommendation rules for the whole batch at once
+    ready = [index for index, fused_data in enumerate(fused) if fused_data]
+    try:
+        batch = engine.generate_crop_recommendations_batch(
+            [fused[index] for index in ready],
+            [items[index][1] for index in ready]
+        )
+    except Exception as e:
+        logger.warning(f"Batch recommendations failed, falling back per farm: {str(e)}")
+        batch = [engine.generate_crop_recommendations(fused[index], items[index][1]) for index in ready]
+    
+    recommendations = dict(zip(ready, batch))
+    
+    return [
+        (item[0], fused_data, recommendations.get(index, []))
+        for index, (item, fused_data) in enumerate(zip(items, fused))
+    ]
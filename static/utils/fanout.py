@@ -0,0 +1,108 @@
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+logger = logging.getLogger(__name__)
+
+# Worker threads per fan-out source (task name)
+FANOUT_SOURCE_WORKERS = int(os.environ.get('FANOUT_SOURCE_WORKERS', 8))
+
+# One bounded pool per source, so tasks of a slow upstream that outlive their
+# deadline can only tie up that source's threads, never those of the others
+_executors = {}
+_in_flight = {}
+_executors_lock = threading.Lock()
+
+def _reserve_worker(name):
+    """Get the pool of a source and reserve a thread, or None if all are busy"""
+    with _executors_lock:
+        if _in_flight.get(name, 0) >= FANOUT_SOURCE_WORKERS:
+            return None
+
+        executor = _executors.get(name)
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=FANOUT_SOURCE_WORKERS, thread_name_prefix=f"fanout-{name}")
+            _executors[name] = executor
+
+        _in_flight[name] = _in_flight.get(name, 0) + 1
+        return executor
+
+def _release_worker(name):
+    with _executors_lock:
+        _in_flight[name] -= 1
+
+def gather_with_deadlines(tasks):
+    """
+    Run independent data fetches concurrently, each with its own deadline
+
+    Every task gets its fallback value if it fails, returns None or is
+    still running when its deadline (measured from the start of the call)
+    passes. Tasks that miss their deadline keep running in the background,
+    so any caches they fill still benefit later requests. Each task name
+    has its own pool of FANOUT_SOURCE_WORKERS threads; while all of them
+    are still busy, further tasks of that source get their fallback
+    immediately instead of queueing behind the stuck calls.
+
+    Args:
+        tasks (dict): Task name -> (function, deadline in seconds, fallback value)
+
+    Returns:
+        tuple: (results, sources) where results maps task names to values and
+            sources maps task names to their status ("ok", "empty",
+            "timeout", "busy" or "error") and elapsed milliseconds
+    """
+    start = time.monotonic()
+    finished = {}
+
+    def run(name, function):
+        try:
+            return function()
+        finally:
+            finished[name] = time.monotonic()
+            _release_worker(name)
+
+    futures = {}
+    for name, (function, _, _) in tasks.items():
+        executor = _reserve_worker(name)
+        if executor is None:
+            futures[name] = None
+            continue
+        try:
+            futures[name] = executor.submit(run, name, function)
+        except Exception:
+            _release_worker(name)
+            raise
+
+    results = {}
+    sources = {}
+
+    for name, (_, deadline, fallback) in tasks.items():
+        future = futures[name]
+        if future is None:
+            logger.warning(f"Fan-out task {name} skipped: all {FANOUT_SOURCE_WORKERS} workers are busy")
+            results[name] = fallback
+            sources[name] = {"status": "busy", "elapsed_ms": 0.0}
+            continue
+
+        try:
+            value = future.result(timeout=max(0, start + deadline - time.monotonic()))
+            status = "ok" if value is not None else "empty"
+        except FutureTimeoutError:
+            future.cancel()
+            logger.warning(f"Fan-out task {name} missed its {deadline}s deadline")
+            value = None
+            status = "timeout"
+        except Exception as e:
+            logger.error(f"Error in fan-out task {name}: {str(e)}")
+            value = None
+            status = "error"
+
+        results[name] = fallback if value is None else value
+        sources[name] = {
+            "status": status,
+            "elapsed_ms": round((finished.get(name, time.monotonic()) - start) * 1000, 1)
+        }
+
+    return results, sources
@@ -0,0 +1,268 @@
+"""
+Batch job that precomputes fused recommendations for every registered farm
+"""
+import os
+import json
+import time
+import logging
+import numpy as np
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from app import app, db
+from models import DashboardRefreshRequest, Farm, FarmRecommendationSnapshot
+from utils.response_cache import snap_to_grid
+from utils.satellite_processing import SatelliteProcessor
+from utils.weather_forecasting import WeatherForecaster, WEATHER_GRID_DEG
+from utils.soil_sensor import SoilSensorManager
+from utils.data_fusion import fuse_farm_batch
+from utils.ndvi_stats import NDVIStatsStore
+
+logger = logging.getLogger(__name__)
+
+# Satellite tile size in degrees; farms in one tile share an NDVI series
+SATELLITE_TILE_DEG = float(os.environ.get('FUSION_BATCH_TILE_DEG', 0.2))
+
+# Farms fused per process pool task
+BATCH_CHUNK_SIZE = 64
+
+# NDVI composite length in days; series windows start on an epoch-aligned
+# grid so each nightly run sees the same interval boundaries
+NDVI_INTERVAL_DAYS = 15
+
+def get_farm_snapshot(farm_id):
+    """
+    Get the precomputed recommendations of a farm
+
+    Args:
+        farm_id (int): Farm ID
+
+    Returns:
+        dict: Snapshot data, or None if the batch has not covered the farm yet
+    """
+    snapshot = FarmRecommendationSnapshot.query.filter_by(farm_id=int(farm_id)).first()
+    return snapshot.to_dict() if snapshot else None
+
+def _parse_coordinates(coordinates):
+    """Parse a "lat,long" coordinate string, returning None if invalid"""
+    try:
+        lat, lon = [float(x) for x in coordinates.split(',')]
+        return lat, lon
+    except (AttributeError, ValueError):
+        return None
+
+def _fetch_satellite(satellite_processor, tile, date_from, date_to):
+    """Get the NDVI series and crop health summary of a satellite tile"""
+    tile_lat, tile_lon = tile
+    half = SATELLITE_TILE_DEG / 2
+    bbox = [tile_lon - half, tile_lat - half, tile_lon + half, tile_lat + half]
+
+    ndvi_series = satellite_processor.get_historical_ndvi_series(
+        bbox, date_from, date_to, interval_days=NDVI_INTERVAL_DAYS
+    ) or []
+    current_ndvi = ndvi_series[-1]['average_ndvi'] if ndvi_series else 0.65
+    crop_health = satellite_processor.analyze_crop_health(np.array([current_ndvi] * 100))
+
+    return {
+        'average_ndvi': current_ndvi,
+        'ndvi_series': ndvi_series,
+        'overall_status': crop_health['overall_status'] if crop_health else 'Unknown'
+    }
+
+def run_fusion_batch(farm_ids=None, stale_before=None, fetch_workers=None, fusion_workers=None):
+    """
+    Compute fused data and crop recommendations for every farm
+
+    Farms are grouped by weather grid cell and satellite tile so each is
+    fetched once, fusion runs in a process pool, and the results are
+    upserted into the farm_recommendation_snapshot table.
+
+    Args:
+        farm_ids (list): Only process these farms
+        stale_before (datetime): Only process farms without a snapshot
+            computed at or after this time
+        fetch_workers (int): Concurrent upstream fetches
+        fusion_workers (int): Fusion worker processes
+
+    Returns:
+        dict: Batch summary
+    """
+    started = time.monotonic()
+    started_at = datetime.utcnow()
+    fetch_workers = fetch_workers or int(os.environ.get('FUSION_BATCH_FETCH_WORKERS', 8))
+    fusion_workers = fusion_workers or int(os.environ.get('FUSION_BATCH_WORKERS', os.cpu_count() or 1))
+
+    satellite_processor = SatelliteProcessor()
+    weather_forecaster = WeatherForecaster()
+    soil_sensor_manager = SoilSensorManager()
+
+    today = datetime.now().date()
+    window_start = today - timedelta(days=30)
+    window_start -= timedelta(days=window_start.toordinal() % NDVI_INTERVAL_DAYS)
+    date_from = window_start.strftime('%Y-%m-%d')
+    date_to = today.strftime('%Y-%m-%d')
+
+    query = Farm.query
+    if farm_ids is not None:
+        query = query.filter(Farm.id.in_([int(farm_id) for farm_id in farm_ids]))
+    if stale_before is not None:
+        fresh = db.session.query(FarmRecommendationSnapshot.farm_id).filter(
+            FarmRecommendationSnapshot.computed_at >= stale_before
+        )
+        query = query.filter(~Farm.id.in_(fresh))
+
+    # Group farms by weather cell and satellite tile
+    farms = []
+    skipped = 0
+    farm_rows = query.all()
+    for farm in farm_rows:
+        location = _parse_coordinates(farm.coordinates)
+        if location is None:
+            skipped += 1
+            continue
+
+        crop_type = farm.crops[0].name.lower() if farm.crops else 'maize'
+        farms.append({
+            "farm_id": farm.id,
+            "crop_type": crop_type,
+            "weather_cell": snap_to_grid(*location, WEATHER_GRID_DEG),
+            "satellite_tile": snap_to_grid(*location, SATELLITE_TILE_DEG)
+        })
+
+    weather_cells = sorted({farm["weather_cell"] for farm in farms})
+    satellite_tiles = sorted({farm["satellite_tile"] for farm in farms})
+
+    # Fetch each cell and tile once; upstream calls are I/O bound, so threads
+    with ThreadPoolExecutor(max_workers=fetch_workers) as executor:
+        weather_futures = {
+            cell: executor.submit(weather_forecaster.get_weather_forecast, cell[0], cell[1])
+            for cell in weather_cells
+        }
+        satellite_futures = {
+            tile: executor.submit(_fetch_satellite, satellite_processor, tile, date_from, date_to)
+            for tile in satellite_tiles
+        }
+
+        weather = {}
+        for cell, future in weather_futures.items():
+            forecast = future.result()
+            weather[cell] = forecast[0] if forecast else None
+
+        satellite = {}
+        for tile, future in satellite_futures.items():
+            try:
+                satellite[tile] = future.result()
+            except Exception as e:
+                logger.error(f"Error fetching satellite tile {tile}: {str(e)}")
+                satellite[tile] = None
+
+    # Fold each farm's completed NDVI intervals into its running statistics.
+    # The last interval is still open (its composite date lies in the
+    # future), so it only feeds current_ndvi; completed intervals are
+    # deduplicated by their end date, which is stable across runs.
+    ndvi_stats = NDVIStatsStore()
+    ndvi_updates = 0
+    try:
+        updates = []
+        for farm in farms:
+            tile_data = satellite[farm["satellite_tile"]]
+            completed = [
+                entry for entry in (tile_data["ndvi_series"] if tile_data else [])
+                if entry["date"] < date_to
+            ]
+            if not completed:
+                continue
+
+            if ndvi_stats.get(farm["farm_id"]) is None:
+                # First sighting: backfill the farm's full history
+                ndvi_updates += ndvi_stats.extend(
+                    farm["farm_id"],
+                    [entry["average_ndvi"] for entry in completed],
+                    [entry["date"] for entry in completed]
+                )
+            else:
+                updates.extend((farm["farm_id"], entry) for entry in completed)
+
+        if updates:
+            ndvi_updates += ndvi_stats.update(
+                [farm_id for farm_id, _ in updates],
+                [entry["average_ndvi"] for _, entry in updates],
+                [entry["date"] for _, entry in updates]
+            )
+        if ndvi_updates:
+            ndvi_stats.save()
+    except Exception as e:
+        logger.error(f"Error updating NDVI statistics: {str(e)}")
+
+    items = []
+    for farm in farms:
+        satellite_data = satellite[farm["satellite_tile"]]
+        if satellite_data:
+            # Per-farm view of the tile with the farm's running NDVI statistics
+            satellite_data = {
+                "average_ndvi": satellite_data["average_ndvi"],
+                "overall_status": satellite_data["overall_status"],
+                "ndvi_stats": ndvi_stats.get(farm["farm_id"])
+            }
+        items.append((
+            farm["farm_id"],
+            farm["crop_type"],
+            satellite_data,
+            weather[farm["weather_cell"]],
+            soil_sensor_manager.get_latest_reading(f"sensor_{farm['farm_id']}")
+        ))
+
+    # Fuse in worker processes (inline when a single chunk)
+    chunks = [items[i:i + BATCH_CHUNK_SIZE] for i in range(0, len(items), BATCH_CHUNK_SIZE)]
+    if len(chunks) > 1 and fusion_workers > 1:
+        with ProcessPoolExecutor(max_workers=min(fusion_workers, len(chunks))) as executor:
+            results = [result for chunk in executor.map(fuse_farm_batch, chunks) for result in chunk]
+    else:
+        results = [result for chunk in chunks for result in fuse_farm_batch(chunk)]
+
+    # Upsert one snapshot row per farm
+    existing = {
+        snapshot.farm_id: snapshot
+        for snapshot in FarmRecommendationSnapshot.query.filter(
+            FarmRecommendationSnapshot.farm_id.in_([farm["farm_id"] for farm in farms])
+        )
+    }
+    computed_at = datetime.utcnow()
+
+    for farm, (farm_id, fused_data, recommendations) in zip(farms, results):
+        snapshot = existing.get(farm_id)
+        if snapshot is None:
+            snapshot = FarmRecommendationSnapshot(farm_id=farm_id)
+            db.session.add(snapshot)
+
+        snapshot.crop_type = farm["crop_type"]
+        snapshot.weather_cell = "{},{}".format(*farm["weather_cell"])
+        snapshot.satellite_tile = "{},{}".format(*farm["satellite_tile"])
+        snapshot.fused_data = json.dumps(fused_data, default=float) if fused_data else None
+        snapshot.recommendations = json.dumps(recommendations or [], default=float)
+        snapshot.status = "complete" if fused_data else "partial"
+        snapshot.computed_at = computed_at
+
+    # Refresh requests made before this run started are now satisfied (farms
+    # with invalid coordinates can never be refreshed); later ones stay queued
+    DashboardRefreshRequest.query.filter(
+        DashboardRefreshRequest.farm_id.in_([farm.id for farm in farm_rows]),
+        DashboardRefreshRequest.requested_at <= started_at
+    ).delete(synchronize_session=False)
+
+    db.session.commit()
+
+    summary = {
+        "farms": len(farms),
+        "skipped_farms": skipped,
+        "weather_cells": len(weather_cells),
+        "satellite_tiles": len(satellite_tiles),
+        "partial": sum(1 for _, fused_data, _ in results if not fused_data),
+        "ndvi_updates": ndvi_updates,
+        "elapsed_seconds": round(time.monotonic() - started, 2)
+    }
+    logger.info(f"Fusion batch completed: {summary}")
+    return summary
+
+if __name__ == "__main__":
+    with app.app_context():
+        print(run_fusion_batch())
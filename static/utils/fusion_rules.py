@@ -0,0 +1,517 @@
+"""
+Declarative rule tables for fused-data insights and crop recommendations
+
+Rules are plain data: each lists the conditions that must all hold and the
+output it produces. A RuleTable compiles a rule list into condition arrays
+so any number of fused records is evaluated in one vectorized pass. Adding
+a crop means adding recommendation thresholds to its crop catalog record,
+not more branches.
+"""
+import numpy as np
+from string import Formatter
+from utils.crop_catalog import crop_section
+
+# Numeric fields of a fused record: name -> (section, key)
+FUSION_FIELDS = {
+    "ndvi": ("satellite", "ndvi"),
+    "air_temperature": ("weather", "temperature"),
+    "precipitation": ("weather", "precipitation"),
+    "humidity": ("weather", "humidity"),
+    "soil_moisture": ("soil", "moisture"),
+    "soil_temperature": ("soil", "temperature"),
+    "ph": ("soil", "ph"),
+    "nitrogen": ("soil", "nitrogen"),
+    "phosphorus": ("soil", "phosphorus"),
+    "potassium": ("soil", "potassium")
+}
+
+# Categorical fields of a fused record: name -> ((section, key), categories)
+FUSION_CATEGORIES = {
+    "crop_health": (("satellite", "crop_health_status"), ("Excellent", "Good", "Fair", "Poor"))
+}
+
+# Optimal ranges per crop; crops not listed use "default"
+CROP_THRESHOLDS = crop_section("recommendation_thresholds")
+
+# Integrated insights. Conditions are (field, operator, bound) and must all
+# hold; within a group only the first matching rule fires.
+INSIGHT_RULES = (
+    {
+        "group": "water_stress",
+        "when": (("ndvi", "<", 0.4), ("soil_moisture", "<", 30), ("precipitation", "<", 5)),
+        "output": {
+            "type": "warning",
+            "category": "water_stress",
+            "description": "Critical water stress detected. Immediate irrigation recommended.",
+            "confidence": "high"
+        }
+    },
+    {
+        "group": "water_stress",
+        "when": (("ndvi", "<", 0.5), ("soil_moisture", "<", 40), ("precipitation", "<", 10)),
+        "output": {
+            "type": "warning",
+            "category": "water_stress",
+            "description": "Moderate water stress detected. Consider irrigation in the next 1-2 days.",
+            "confidence": "medium"
+        }
+    },
+    {
+        "when": (("ndvi", "<", 0.4), ("nitrogen", "<", 15)),
+        "output": {
+            "type": "warning",
+            "category": "nutrient_deficiency",
+            "description": "Nitrogen deficiency detected. Apply nitrogen-rich fertilizer.",
+            "confidence": "medium"
+        }
+    },
+    {
+        "when": (("ndvi", "<", 0.4), ("phosphorus", "<", 10)),
+        "output": {
+            "type": "warning",
+            "category": "nutrient_deficiency",
+            "description": "Phosphorus deficiency detected. Apply phosphorus-rich fertilizer.",
+            "confidence": "medium"
+        }
+    },
+    {
+        "when": (("ndvi", "<", 0.4), ("potassium", "<", 15)),
+        "output": {
+            "type": "warning",
+            "category": "nutrient_deficiency",
+            "description": "Potassium deficiency detected. Apply potassium-rich fertilizer.",
+            "confidence": "medium"
+        }
+    },
+    {
+        "when": (
+            ("soil_temperature", ">=", 20), ("soil_temperature", "<=", 30),
+            ("air_temperature", ">=", 20), ("air_temperature", "<=", 30),
+            ("soil_moisture", ">=", 40), ("soil_moisture", "<=", 60)
+        ),
+        "output": {
+            "type": "opportunity",
+            "category": "planting_conditions",
+            "description": "Optimal conditions for planting. Consider planting in the next few days.",
+            "confidence": "high"
+        }
+    },
+    {
+        "when": (
+            ("humidity", ">", 80), ("air_temperature", ">=", 22), ("air_temperature", "<=", 28),
+            ("crop_health", "in", ("Fair", "Poor"))
+        ),
+        "output": {
+            "type": "warning",
+            "category": "pest_disease_risk",
+            "description": "High risk of fungal disease due to high humidity and temperature. Consider preventive fungicide application.",
+            "confidence": "medium"
+        }
+    }
+)
+
+# Crop recommendations. A bound may be a (threshold, index, offset) reference
+# into CROP_THRESHOLDS; descriptions are formatted with the record's fields.
+RECOMMENDATION_RULES = (
+    {
+        "group": "irrigation",
+        "when": (("soil_moisture", "<", ("optimal_soil_moisture", 0, -10)),),
+        "output": {
+            "category": "irrigation",
+            "description": "Critical soil moisture level ({soil_moisture}%). Immediate irrigation required.",
+            "priority": "high"
+        }
+    },
+    {
+        "group": "irrigation",
+        "when": (("soil_moisture", "<", ("optimal_soil_moisture", 0, 0)),),
+        "output": {
+            "category": "irrigation",
+            "description": "Low soil moisture level ({soil_moisture}%). Irrigation recommended in the next 1-2 days.",
+            "priority": "medium"
+        }
+    },
+    {
+        "group": "irrigation",
+        "when": (("soil_moisture", ">", ("optimal_soil_moisture", 1, 10)),),
+        "output": {
+            "category": "irrigation",
+            "description": "Excessive soil moisture level ({soil_moisture}%). Avoid irrigation and improve drainage if possible.",
+            "priority": "medium"
+        }
+    },
+    {
+        "group": "irrigation",
+        "when": (("soil_moisture", ">", ("optimal_soil_moisture", 1, 0)),),
+        "output": {
+            "category": "irrigation",
+            "description": "High soil moisture level ({soil_moisture}%). Delay irrigation until moisture decreases.",
+            "priority": "low"
+        }
+    },
+    {
+        "group": "nitrogen",
+        "when": (("nitrogen", "<", ("optimal_nitrogen", 0, -5)),),
+        "output": {
+            "category": "fertilization",
+            "description": "Severe nitrogen deficiency detected ({nitrogen} ppm). Apply nitrogen-rich fertilizer as soon as possible.",
+            "priority": "high"
+        }
+    },
+    {
+        "group": "nitrogen",
+        "when": (("nitrogen", "<", ("optimal_nitrogen", 0, 0)),),
+        "output": {
+            "category": "fertilization",
+            "description": "Nitrogen deficiency detected ({nitrogen} ppm). Apply nitrogen-rich fertilizer.",
+            "priority": "medium"
+        }
+    },
+    {
+        "group": "phosphorus",
+        "when": (("phosphorus", "<", ("optimal_phosphorus", 0, -3)),),
+        "output": {
+            "category": "fertilization",
+            "description": "Severe phosphorus deficiency detected ({phosphorus} ppm). Apply phosphorus-rich fertilizer as soon as possible.",
+            "priority": "high"
+        }
+    },
+    {
+        "group": "phosphorus",
+        "when": (("phosphorus", "<", ("optimal_phosphorus", 0, 0)),),
+        "output": {
+            "category": "fertilization",
+            "description": "Phosphorus deficiency detected ({phosphorus} ppm). Apply phosphorus-rich fertilizer.",
+            "priority": "medium"
+        }
+    },
+    {
+        "group": "potassium",
+        "when": (("potassium", "<", ("optimal_potassium", 0, -5)),),
+        "output": {
+            "category": "fertilization",
+            "description": "Severe potassium deficiency detected ({potassium} ppm). Apply potassium-rich fertilizer as soon as possible.",
+            "priority": "high"
+        }
+    },
+    {
+        "group": "potassium",
+        "when": (("potassium", "<", ("optimal_potassium", 0, 0)),),
+        "output": {
+            "category": "fertilization",
+            "description": "Potassium deficiency detected ({potassium} ppm). Apply potassium-rich fertilizer.",
+            "priority": "medium"
+        }
+    },
+    {
+        "group": "ph",
+        "when": (("ph", "<", ("optimal_ph", 0, -0.5)),),
+        "output": {
+            "category": "soil_amendment",
+            "description": "Soil pH is too acidic ({ph}). Apply agricultural lime to increase pH.",
+            "priority": "medium"
+        }
+    },
+    {
+        "group": "ph",
+        "when": (("ph", "<", ("optimal_ph", 0, 0)),),
+        "output": {
+            "category": "soil_amendment",
+            "description": "Soil pH is slightly acidic ({ph}). Consider applying lime to increase pH.",
+            "priority": "low"
+        }
+    },
+    {
+        "group": "ph",
+        "when": (("ph", ">", ("optimal_ph", 1, 0.5)),),
+        "output": {
+            "category": "soil_amendment",
+            "description": "Soil pH is too alkaline ({ph}). Apply sulfur or acidic organic matter to decrease pH.",
+            "priority": "medium"
+        }
+    },
+    {
+        "group": "ph",
+        "when": (("ph", ">", ("optimal_ph", 1, 0)),),
+        "output": {
+            "category": "soil_amendment",
+            "description": "Soil pH is slightly alkaline ({ph}). Consider applying acidic organic matter to decrease pH.",
+            "priority": "low"
+        }
+    },
+    {
+        "group": "crop_health",
+        "when": (("ndvi", "<", 0.3),),
+        "output": {
+            "category": "crop_health",
+            "description": "Critical crop health issue detected (NDVI: {ndvi:.2f}). Check for pests, diseases, or severe nutrient deficiencies.",
+            "priority": "high"
+        }
+    },
+    {
+        "group": "crop_health",
+        "when": (("ndvi", "<", 0.5),),
+        "output": {
+            "category": "crop_health",
+            "description": "Potential crop health issue detected (NDVI: {ndvi:.2f}). Monitor for pests, diseases, or nutrient deficiencies.",
+            "priority": "medium"
+        }
+    }
+)
+
+_OPERATORS = {
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal
+}
+
+def _compile_template(template):
+    """
+    Rewrite a "{field}" output template to positional placeholders
+
+    Returns:
+        tuple: (positional template, (section, key) path per placeholder)
+    """
+    compiled = ""
+    paths = []
+
+    for literal, name, format_spec, conversion in Formatter().parse(template):
+        compiled += literal.replace("{", "{{").replace("}", "}}")
+        if name is None:
+            continue
+
+        compiled += "{" + str(len(paths))
+        compiled += "!" + conversion if conversion else ""
+        compiled += ":" + format_spec if format_spec else ""
+        compiled += "}"
+        paths.append(FUSION_FIELDS[name])
+
+    return compiled, paths
+
+class RuleTable:
+    """
+    Rule list compiled to condition arrays
+
+    Every condition of every rule becomes one column: the record field it
+    reads, its operator and its bound per crop. Evaluation gathers the field
+    columns, compares them against the bounds of each record's crop, and
+    AND-reduces the columns of each rule.
+    """
+
+    def __init__(self, rules, thresholds=None, output_key=None):
+        """
+        Compile a rule list
+
+        Args:
+            rules (tuple): Rule dicts with "when", "output" and optional "group"
+            thresholds (dict): Crop -> threshold ranges for threshold-relative
+                bounds; must include "default" if given
+            output_key (callable): Sort key on rules giving the order of each
+                record's outputs (default: rule order)
+        """
+        self.rules = rules
+        self._output_order = sorted(range(len(rules)), key=lambda index: output_key(rules[index])) if output_key else list(range(len(rules)))
+        used = {field for rule in rules for field, _, _ in rule["when"]}
+        self.fields = [field for field in FUSION_FIELDS if field in used]
+        self.categories = [field for field in FUSION_CATEGORIES if field in used]
+        self.crops = list(thresholds) if thresholds else ["default"]
+        self._default_crop = self.crops.index("default")
+
+        condition_fields = []
+        condition_bounds = []
+        operator_columns = {}
+        self._category_conditions = []
+        rule_starts = []
+
+        for rule in rules:
+            rule_starts.append(len(condition_fields))
+            for field, operator, bound in rule["when"]:
+                column = len(condition_fields)
+
+                if field in FUSION_CATEGORIES:
+                    values = FUSION_CATEGORIES[field][1]
+                    # The trailing slot matches unknown categories (code -1)
+                    lookup = np.array([value in bound for value in values] + [False])
+                    self._category_conditions.append((column, self.categories.index(field), lookup))
+                    condition_fields.append(0)
+                    condition_bounds.append([np.nan] * len(self.crops))
+                    continue
+
+                condition_fields.append(self.fields.index(field))
+                operator_columns.setdefault(operator, []).append(column)
+
+                if isinstance(bound, tuple):
+                    name, index, offset = bound
+                    condition_bounds.append([thresholds[crop][name][index] + offset for crop in self.crops])
+                else:
+                    condition_bounds.append([bound] * len(self.crops))
+
+        self._condition_fields = np.array(condition_fields, dtype=np.intp)
+        self._condition_bounds = np.array(condition_bounds, dtype=np.float64).T.copy()
+        self._operator_columns = {
+            operator: np.array(columns, dtype=np.intp)
+            for operator, columns in operator_columns.items()
+        }
+        self._rule_starts = np.array(rule_starts, dtype=np.intp)
+
+        groups = {}
+        for index, rule in enumerate(rules):
+            if rule.get("group"):
+                groups.setdefault(rule["group"], []).append(index)
+        self._groups = [indices for indices in groups.values() if len(indices) > 1]
+
+        self._templates = [
+            [
+                (key,) + _compile_template(value)
+                for key, value in rule["output"].items()
+                if isinstance(value, str) and "{" in value
+            ]
+            for rule in rules
+        ]
+
+    def crop_codes(self, crop_types, count):
+        """
+        Map crop names to threshold rows
+
+        Args:
+            crop_types (str or list): One crop for all records, or one per record
+            count (int): Number of records
+
+        Returns:
+            numpy.ndarray: Threshold row index per record
+        """
+        index = {crop: code for code, crop in enumerate(self.crops)}
+
+        if crop_types is None or isinstance(crop_types, str):
+            code = index.get(crop_types.lower(), self._default_crop) if crop_types else self._default_crop
+            return np.full(count, code, dtype=np.intp)
+
+        return np.array([index.get(crop.lower(), self._default_crop) for crop in crop_types], dtype=np.intp)
+
+    def record_arrays(self, records):
+        """
+        Extract the rule fields of fused records into arrays
+
+        Args:
+            records (list): Fused data dicts (satellite, weather and soil sections)
+
+        Returns:
+            tuple: (values, categories) arrays of shape (records, fields)
+        """
+        paths = [FUSION_FIELDS[field] for field in self.fields]
+        values = np.array(
+            [float(record[section][key]) for record in records for section, key in paths],
+            dtype=np.float64
+        ).reshape(len(records), len(paths))
+
+        if not self.categories:
+            return values, np.empty((len(records), 0), dtype=np.intp)
+
+        codes = [
+            {value: code for code, value in enumerate(FUSION_CATEGORIES[field][1])}
+            for field in self.categories
+        ]
+        category_paths = [FUSION_CATEGORIES[field][0] for field in self.categories]
+        categories = np.array(
+            [
+                [code.get(record[section][key], -1) for code, (section, key) in zip(codes, category_paths)]
+                for record in records
+            ],
+            dtype=np.intp
+        ).reshape(len(records), len(category_paths))
+
+        return values, categories
+
+    def evaluate(self, values, categories, crop_codes=None):
+        """
+        Evaluate all rules against all records
+
+        Args:
+            values (numpy.ndarray): Numeric fields, shape (records, fields)
+            categories (numpy.ndarray): Category codes, shape (records, categories)
+            crop_codes (numpy.ndarray): Threshold row per record (default crop if None)
+
+        Returns:
+            numpy.ndarray: Boolean matrix of shape (records, rules)
+        """
+        count = len(values)
+        if crop_codes is None:
+            crop_codes = np.full(count, self._default_crop, dtype=np.intp)
+
+        gathered = values[:, self._condition_fields]
+        bounds = self._condition_bounds[crop_codes]
+
+        passed = np.zeros((count, len(self._condition_fields)), dtype=bool)
+        for operator, columns in self._operator_columns.items():
+            passed[:, columns] = _OPERATORS[operator](gathered[:, columns], bounds[:, columns])
+        for column, category, lookup in self._category_conditions:
+            passed[:, column] = lookup[categories[:, category]]
+
+        matches = np.logical_and.reduceat(passed, self._rule_starts, axis=1)
+
+        # Within a group only the first matching rule fires
+        for indices in self._groups:
+            taken = np.zeros(count, dtype=bool)
+            for index in indices:
+                matches[:, index] &= ~taken
+                taken |= matches[:, index]
+
+        return matches
+
+    def apply(self, records, crop_types=None):
+        """
+        Get the outputs of all matching rules for each fused record
+
+        Args:
+            records (list): Fused data dicts
+            crop_types (str or list): One crop for all records, or one per record
+
+        Returns:
+            list: Output dicts per record, in output order
+        """
+        values, categories = self.record_arrays(records)
+        matches = self.evaluate(values, categories, self.crop_codes(crop_types, len(records)))
+
+        outputs = [[] for _ in records]
+
+        # Rules in output order, so each record's outputs come out sorted
+        for index in self._output_order:
+            rule = self.rules[index]
+            rows = np.flatnonzero(matches[:, index]).tolist()
+            templates = self._templates[index]
+
+            static = rule["output"]
+
+            if not templates:
+                for row in rows:
+                    outputs[row].append(dict(static))
+                continue
+
+            if len(templates) == 1 and len(templates[0][2]) == 1:
+                key, template, ((section, field),) = templates[0]
+                for row in rows:
+                    outputs[row].append({**static, key: template.format(records[row][section][field])})
+                continue
+
+            for row in rows:
+                record = records[row]
+                outputs[row].append({
+                    **static,
+                    **{
+                        key: template.format(*[record[section][field] for section, field in paths])
+                        for key, template, paths in templates
+                    }
+                })
+
+        return outputs
+
+# Recommendation priorities, most urgent first
+PRIORITY_ORDER = {"high": 0, "medium": 1, "low": 2}
+
+INSIGHT_RULE_TABLE = RuleTable(INSIGHT_RULES)
+RECOMMENDATION_RULE_TABLE = RuleTable(
+    RECOMMENDATION_RULES,
+    CROP_THRESHOLDS,
+    output_key=lambda rule: PRIORITY_ORDER[rule["output"]["priority"]]
+)
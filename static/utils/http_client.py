@@ -0,0 +1,92 @@
+import os
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# Defaults for every outbound client, overridable per client
+HTTP_CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', 5))
+HTTP_READ_TIMEOUT = float(os.environ.get('HTTP_READ_TIMEOUT', 30))
+HTTP_MAX_RETRIES = int(os.environ.get('HTTP_MAX_RETRIES', 2))
+HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', 16))
+
+# Responses worth retrying: rate limiting and transient upstream failures
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+class TimeoutSession(requests.Session):
+    """requests.Session that applies a default (connect, read) timeout"""
+
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
+
+def get_session(name, connect_timeout=None, read_timeout=None, retries=None,
+                retry_methods=None, pool_maxsize=None):
+    """
+    Get the shared HTTP session of an outbound client
+
+    Sessions keep connections alive in a pool per host and are created once
+    per name, so all instances of a client share them. Settings only apply
+    when the session is first created.
+
+    Args:
+        name (str): Client name (e.g. "weather", "sentinel")
+        connect_timeout (float): Seconds to wait for a connection
+        read_timeout (float): Seconds to wait for response data
+        retries (int): Retry budget per request for connection errors and
+            RETRY_STATUSES responses
+        retry_methods (iterable): HTTP methods that may be retried
+            (default: idempotent methods only)
+        pool_maxsize (int): Connections kept alive per host
+
+    Returns:
+        TimeoutSession: Shared session
+    """
+    with _sessions_lock:
+        session = _sessions.get(name)
+        if session is not None:
+            return session
+
+        retries = HTTP_MAX_RETRIES if retries is None else retries
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(retry_methods) if retry_methods else Retry.DEFAULT_ALLOWED_METHODS,
+            backoff_factor=0.3,
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+
+        session = TimeoutSession((
+            connect_timeout or HTTP_CONNECT_TIMEOUT,
+            read_timeout or HTTP_READ_TIMEOUT
+        ))
+        adapter = HTTPAdapter(
+            max_retries=retry,
+            pool_maxsize=pool_maxsize or HTTP_POOL_MAXSIZE
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+        _sessions[name] = session
+        return session
+
+def close_sessions():
+    """Close all shared sessions and their pooled connections"""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
@@ -0,0 +1,28 @@
+import math
+import numpy as np
+
+def json_safe(value):
+    """
+    Make analysis results serializable as strict JSON
+
+    NaN and infinite floats (which json.dumps would write as the invalid
+    tokens NaN and Infinity) become None, and NumPy scalars and arrays
+    become plain Python values.
+
+    Args:
+        value: Dict, list, tuple or scalar to convert
+
+    Returns:
+        Converted copy of the value
+    """
+    if isinstance(value, dict):
+        return {key: json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_safe(item) for item in value]
+    if isinstance(value, np.ndarray):
+        return json_safe(value.tolist())
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
@@ -0,0 +1,281 @@
+import os
+import logging
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# One row of running NDVI statistics per farm. Observations are indexed
+# 0, 1, 2, ... (x) as in preprocess_satellite_data, so the slope is per
+# observation; m2 and co_moment are Welford's sums of squares and cross
+# products about the running means.
+NDVI_STATS_DTYPE = np.dtype([
+    ("farm_id", "<i8"),
+    ("count", "<i8"),
+    ("mean", "<f8"),
+    ("m2", "<f8"),
+    ("min", "<f8"),
+    ("max", "<f8"),
+    ("x_mean", "<f8"),
+    ("x_m2", "<f8"),
+    ("co_moment", "<f8"),
+    ("last_date", "<M8[D]")
+])
+
+def summarize_ndvi_stats(rows):
+    """
+    Derive NDVI features from running statistics rows
+
+    Args:
+        rows (numpy.ndarray): Rows of NDVI_STATS_DTYPE
+
+    Returns:
+        dict: Arrays of count, mean_ndvi, min_ndvi, max_ndvi, std_ndvi and
+            ndvi_trend (0 where a farm has fewer than two observations)
+    """
+    count = rows["count"]
+    observed = count > 0
+    safe_count = np.where(observed, count, 1)
+    safe_x_m2 = np.where(rows["x_m2"] > 0, rows["x_m2"], 1)
+
+    return {
+        "count": count,
+        "mean_ndvi": np.where(observed, rows["mean"], 0.0),
+        "min_ndvi": np.where(observed, rows["min"], 0.0),
+        "max_ndvi": np.where(observed, rows["max"], 0.0),
+        "std_ndvi": np.sqrt(np.where(observed, rows["m2"], 0.0) / safe_count),
+        "ndvi_trend": np.where(count > 1, rows["co_moment"] / safe_x_m2, 0.0)
+    }
+
+class NDVIStatsStore:
+    """
+    Persistent running NDVI statistics per farm
+
+    Mean, min, max, standard deviation and the least-squares NDVI slope
+    are kept as running sums, so each new observation is an O(1) update
+    and no farm's history is rescanned. All farms live in one structured
+    NumPy array saved as a single .npy file.
+    """
+
+    def __init__(self, path=None):
+        """
+        Initialize the store, loading saved statistics if present
+
+        Args:
+            path (str): .npy file holding the statistics
+        """
+        self.path = path or os.environ.get('NDVI_STATS_PATH', 'instance/ndvi_stats.npy')
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+        self._rows = np.zeros(0, dtype=NDVI_STATS_DTYPE)
+        if os.path.exists(self.path):
+            try:
+                self._rows = np.load(self.path).astype(NDVI_STATS_DTYPE)
+            except Exception as e:
+                self.logger.error(f"Error loading NDVI statistics: {str(e)}")
+
+        self._index = {farm_id: row for row, farm_id in enumerate(self._rows["farm_id"].tolist())}
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _row_indices(self, farm_ids):
+        """Get the row of each farm, adding empty rows for new farms (lock held)"""
+        farm_ids = [int(farm_id) for farm_id in farm_ids]
+        new_ids = [farm_id for farm_id in dict.fromkeys(farm_ids) if farm_id not in self._index]
+
+        if new_ids:
+            rows = np.zeros(len(new_ids), dtype=NDVI_STATS_DTYPE)
+            rows["farm_id"] = new_ids
+            rows["min"] = np.inf
+            rows["max"] = -np.inf
+            rows["last_date"] = np.datetime64("NaT")
+
+            start = len(self._rows)
+            self._rows = np.concatenate([self._rows, rows])
+            for offset, farm_id in enumerate(new_ids):
+                self._index[farm_id] = start + offset
+
+        return np.array([self._index[farm_id] for farm_id in farm_ids], dtype=np.intp)
+
+    def update(self, farm_ids, values, dates=None):
+        """
+        Add one observation for each of many farms
+
+        Updates are vectorized across farms. Farms listed more than once get
+        their observations applied in order. NaN values are ignored, and when
+        dates are given so are observations not newer than the farm's last
+        recorded date, so re-running a refresh does not double count.
+
+        Args:
+            farm_ids (list): Farm IDs
+            values (numpy.ndarray): NDVI value per farm
+            dates (list): Observation date per farm ('YYYY-MM-DD' or datetime64)
+
+        Returns:
+            int: Number of observations applied
+        """
+        values = np.asarray(values, dtype=np.float64)
+        dates = np.asarray(dates, dtype="datetime64[D]") if dates is not None else None
+        applied = 0
+
+        with self._lock:
+            rows = self._row_indices(farm_ids)
+
+            # Repeated farms are applied in rounds, one observation per farm per round
+            pending = np.arange(len(rows))
+            while len(pending):
+                _, first = np.unique(rows[pending], return_index=True)
+                batch = pending[np.sort(first)]
+                pending = np.setdiff1d(pending, batch, assume_unique=True)
+
+                keep = ~np.isnan(values[batch])
+                if dates is not None:
+                    last = self._rows["last_date"][rows[batch]]
+                    keep &= np.isnat(last) | (dates[batch] > last)
+                batch = batch[keep]
+                if not len(batch):
+                    continue
+
+                target = rows[batch]
+                y = values[batch]
+                stats = self._rows[target]
+
+                count = stats["count"] + 1
+                x = stats["count"].astype(np.float64)
+
+                dx = x - stats["x_mean"]
+                x_mean = stats["x_mean"] + dx / count
+                dy = y - stats["mean"]
+                mean = stats["mean"] + dy / count
+
+                stats["count"] = count
+                stats["x_mean"] = x_mean
+                stats["mean"] = mean
+                stats["x_m2"] += dx * (x - x_mean)
+                stats["m2"] += dy * (y - mean)
+                stats["co_moment"] += dx * (y - mean)
+                stats["min"] = np.minimum(stats["min"], y)
+                stats["max"] = np.maximum(stats["max"], y)
+                if dates is not None:
+                    stats["last_date"] = dates[batch]
+
+                self._rows[target] = stats
+                applied += len(batch)
+
+        return applied
+
+    def extend(self, farm_id, values, dates=None):
+        """
+        Add a series of observations for one farm, e.g. to backfill history
+
+        The series is summarized in one pass and merged into the running
+        statistics with the pairwise (Chan et al.) combination formulas.
+
+        Args:
+            farm_id (int): Farm ID
+            values (numpy.ndarray): NDVI observations in date order
+            dates (list): Observation dates; observations not newer than the
+                farm's last recorded date are skipped
+
+        Returns:
+            int: Number of observations applied
+        """
+        values = np.asarray(values, dtype=np.float64)
+        dates = np.asarray(dates, dtype="datetime64[D]") if dates is not None else None
+
+        with self._lock:
+            row = self._row_indices([farm_id])[0]
+            stats = self._rows[row]
+
+            keep = ~np.isnan(values)
+            if dates is not None and not np.isnat(stats["last_date"]):
+                keep &= dates > stats["last_date"]
+            y = values[keep]
+            if not len(y):
+                return 0
+
+            n_a = int(stats["count"])
+            n_b = len(y)
+            n = n_a + n_b
+
+            x = np.arange(n_a, n, dtype=np.float64)
+            x_mean_b = x.mean()
+            y_mean_b = y.mean()
+            dx = x_mean_b - stats["x_mean"]
+            dy = y_mean_b - stats["mean"]
+            weight = n_a * n_b / n
+
+            stats["x_m2"] += np.dot(x - x_mean_b, x - x_mean_b) + dx * dx * weight
+            stats["m2"] += np.dot(y - y_mean_b, y - y_mean_b) + dy * dy * weight
+            stats["co_moment"] += np.dot(x - x_mean_b, y - y_mean_b) + dx * dy * weight
+            stats["x_mean"] += dx * n_b / n
+            stats["mean"] += dy * n_b / n
+            stats["count"] = n
+            stats["min"] = min(stats["min"], y.min())
+            stats["max"] = max(stats["max"], y.max())
+            if dates is not None:
+                stats["last_date"] = dates[keep][-1]
+
+            self._rows[row] = stats
+
+        return n_b
+
+    def get(self, farm_id):
+        """
+        Get the NDVI features of a farm
+
+        Args:
+            farm_id (int): Farm ID
+
+        Returns:
+            dict: count, mean_ndvi, min_ndvi, max_ndvi, std_ndvi, ndvi_trend
+                and last_date, or None if the farm has no observations
+        """
+        with self._lock:
+            row = self._index.get(int(farm_id))
+            if row is None or self._rows["count"][row] == 0:
+                return None
+            stats = self._rows[row:row + 1].copy()
+
+        summary = {name: values[0].item() for name, values in summarize_ndvi_stats(stats).items()}
+        last_date = stats["last_date"][0]
+        summary["last_date"] = None if np.isnat(last_date) else str(last_date)
+        return summary
+
+    def summarize(self, farm_ids=None):
+        """
+        Get the NDVI features of many farms as arrays
+
+        Args:
+            farm_ids (list): Farm IDs (default: all farms)
+
+        Returns:
+            dict: farm_id plus the summarize_ndvi_stats arrays
+        """
+        with self._lock:
+            if farm_ids is None:
+                rows = self._rows.copy()
+            else:
+                # Farms without observations get empty rows
+                indices = np.array([self._index.get(int(farm_id), -1) for farm_id in farm_ids], dtype=np.intp)
+                rows = np.zeros(len(indices), dtype=NDVI_STATS_DTYPE)
+                known = indices >= 0
+                rows[known] = self._rows[indices[known]]
+                rows["farm_id"] = [int(farm_id) for farm_id in farm_ids]
+
+        return {"farm_id": rows["farm_id"], **summarize_ndvi_stats(rows)}
+
+    def save(self):
+        """Write the statistics to disk atomically"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._lock:
+            rows = self._rows.copy()
+
+        tmp_path = f"{self.path}.tmp.npy"
+        np.save(tmp_path, rows)
+        os.replace(tmp_path, self.path)
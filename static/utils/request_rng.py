@@ -0,0 +1,72 @@
+"""
+Per-request random number generators for deterministic inference
+
+The simulated models add random noise to their outputs. In deterministic
+mode that noise comes from a numpy.random.Generator seeded from the request
+(farm, date and model version), so identical requests return identical
+results that can be cached and compared across benchmark runs.
+"""
+import os
+import hashlib
+import numpy as np
+from datetime import date, datetime
+
+# Enable with DETERMINISTIC_INFERENCE=1; managers can also opt in per instance
+DETERMINISTIC_INFERENCE = os.environ.get('DETERMINISTIC_INFERENCE', '').lower() in ('1', 'true', 'yes')
+
+def request_date(value=None):
+    """
+    Normalize the date a request is seeded with
+
+    Args:
+        value (str, date or datetime): Request date (default: today, UTC)
+
+    Returns:
+        str: Date as 'YYYY-MM-DD'
+    """
+    if value is None:
+        return datetime.utcnow().date().isoformat()
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)[:10]
+
+def request_seed(*parts):
+    """
+    Derive a stable 64-bit seed from request parts
+
+    Unlike hash(), the seed is the same in every process and Python version.
+    Parts are compared by their string form, so farm 1 and farm "1" match.
+
+    Args:
+        *parts: Values identifying the request (None allowed)
+
+    Returns:
+        int: Seed
+    """
+    key = "\x1f".join("" if part is None else str(part) for part in parts)
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+def request_rng(*parts, deterministic=None):
+    """
+    Get the random number generator for one request
+
+    Args:
+        *parts: Values identifying the request, e.g. model name and version,
+            farm ID and date
+        deterministic (bool): Seed from the request (default:
+            DETERMINISTIC_INFERENCE)
+
+    Returns:
+        numpy.random.Generator seeded from the parts in deterministic mode;
+        otherwise the numpy.random module, so the global RNG (and
+        np.random.seed) behaves as before
+    """
+    if deterministic is None:
+        deterministic = DETERMINISTIC_INFERENCE
+
+    if not deterministic:
+        return np.random
+
+    return np.random.default_rng(request_seed(*parts))
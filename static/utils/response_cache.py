@@ -0,0 +1,144 @@
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+def snap_to_grid(lat, lon, cell_deg=0.01):
+    """
+    Snap a coordinate to the centre of its grid cell
+
+    Args:
+        lat (float): Latitude
+        lon (float): Longitude
+        cell_deg (float): Grid cell size in degrees (0.01 is about 1.1 km)
+
+    Returns:
+        tuple: (lat, lon) of the cell centre
+    """
+    decimals = max(0, len(f"{cell_deg:f}".rstrip('0').split('.')[1]) + 1)
+    return (
+        round((int(float(lat) // cell_deg) + 0.5) * cell_deg, decimals),
+        round((int(float(lon) // cell_deg) + 0.5) * cell_deg, decimals)
+    )
+
+class _InFlight:
+    """A load in progress that concurrent callers for the same key wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+class TTLCache:
+    """
+    Thread-safe time-to-live cache with single-flight loading
+
+    Concurrent misses for the same key share one call to the loader; the
+    other callers wait for its result. None results are returned but not
+    cached, so failed calls are retried on the next request.
+    """
+
+    def __init__(self, ttl_seconds=600, max_entries=1024):
+        """
+        Initialize the cache
+
+        Args:
+            ttl_seconds (float): Lifetime of a cached value
+            max_entries (int): Maximum number of cached values
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._in_flight = {}
+        self._stats = {"hits": 0, "misses": 0, "shared": 0, "errors": 0, "evictions": 0}
+
+    def get_or_load(self, key, loader):
+        """
+        Get a cached value, calling the loader on a miss
+
+        Args:
+            key (hashable): Cache key
+            loader (callable): Function returning the value for the key
+
+        Returns:
+            object: Cached or freshly loaded value
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._stats["hits"] += 1
+                return entry[1]
+
+            call = self._in_flight.get(key)
+            if call is not None:
+                self._stats["shared"] += 1
+                owner = False
+            else:
+                self._stats["misses"] += 1
+                call = self._in_flight[key] = _InFlight()
+                owner = True
+
+        if not owner:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = loader()
+        except Exception as e:
+            call.error = e
+            with self._lock:
+                self._stats["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+                if call.error is None and call.value is not None:
+                    self._store(key, call.value)
+            call.done.set()
+
+        return call.value
+
+    def _store(self, key, value):
+        """Store a value, evicting expired then soonest-expiring entries (lock held)"""
+        now = time.monotonic()
+
+        if len(self._entries) >= self.max_entries:
+            for stale in [k for k, (expires, _) in self._entries.items() if expires <= now]:
+                del self._entries[stale]
+                self._stats["evictions"] += 1
+
+        while len(self._entries) >= self.max_entries:
+            oldest = min(self._entries, key=lambda k: self._entries[k][0])
+            del self._entries[oldest]
+            self._stats["evictions"] += 1
+
+        self._entries[key] = (now + self.ttl_seconds, value)
+
+    def clear(self):
+        """Drop all cached values"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Get cache metrics
+
+        Returns:
+            dict: Hit/miss counters, hit ratio and current size
+        """
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"] + self._stats["shared"]
+            return {
+                **self._stats,
+                "hit_ratio": round((self._stats["hits"] + self._stats["shared"]) / lookups, 3) if lookups else 0.0,
+                "entries": len(self._entries),
+                "in_flight": len(self._in_flight),
+                "ttl_seconds": self.ttl_seconds,
+                "max_entries": self.max_entries
+            }
@@ -1,29 +1,136 @@
 import os
+import time
 import logging
+import tempfile
+import threading
 import numpy as np
 from datetime import datetime, timedelta
-import requests
 from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from rasterio.io import MemoryFile
+
+from utils.scene_cache import SceneCache
+from utils.aoi_tiling import plan_tiles
+from utils.http_client import get_session
 
 logger = logging.getLogger(__name__)
 
+# Refresh cached auth tokens this many seconds before they expire
+TOKEN_REFRESH_MARGIN = 60
+
+# Evalscript rendering RGB plus NDVI for Sentinel-2 L2A scenes
+DEFAULT_EVALSCRIPT = """
+    //VERSION=3
+    function setup() {
+        return {
+            input: ["B02", "B03", "B04", "B08", "SCL"],
+            output: { bands: 4 }
+        };
+    }
+    
+    function evaluatePixel(sample) {
+        // Calculate NDVI: (NIR - RED) / (NIR + RED)
+        var ndvi = (sample.B08 - sample.B04) / (sample.B08 + sample.B04);
+        
+        // Return RGBA
+        return [sample.B04 * 2.5, sample.B03 * 2.5, sample.B02 * 2.5, ndvi];
+    }
+"""
+
+# Evalscript returning raw reflectance bands for index calculation (fetched as TIFF)
+BAND_EVALSCRIPT = """
+    //VERSION=3
+    function setup() {
+        return {
+            input: ["B04", "B08", "B11", "dataMask"],
+            output: { bands: 4, sampleType: "FLOAT32" }
+        };
+    }
+    
+    function evaluatePixel(sample) {
+        return [sample.B04, sample.B08, sample.B11, sample.dataMask];
+    }
+"""
+
+# Band order produced by BAND_EVALSCRIPT
+BAND_NAMES = ("red", "nir", "swir", "data_mask")
+
+# Pixels per tile when classifying index rasters (sized to stay in CPU cache)
+CLASSIFY_TILE_SIZE = 1 << 15
+
+# Upper bound on the number of tiles fetched for one area of interest
+MAX_AOI_TILES = int(os.environ.get('SATELLITE_MAX_AOI_TILES', 256))
+
+# Raster rows per chunk when computing indices over a tiled area of interest
+AOI_CHUNK_ROWS = 256
+
 class SatelliteProcessor:
     """Class for processing satellite imagery for agricultural insights"""
     
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, max_concurrent_requests=None, scene_cache=None):
         self.api_key = api_key or os.environ.get('SATELLITE_API_KEY', '')
         self.base_url = "https://api.sentinel-hub.com/oauth/token"
         self.sentinel_hub_url = "https://services.sentinel-hub.com/api/v1/process"
+        self.max_concurrent_requests = max_concurrent_requests or int(os.environ.get('SATELLITE_MAX_CONCURRENCY', 4))
+        self.scene_cache = scene_cache or SceneCache()
         self.logger = logging.getLogger(__name__)
         
+        # Pooled keep-alive connections; process requests are idempotent so POSTs may be retried
+        self.session = get_session(
+            "sentinel",
+            read_timeout=float(os.environ.get('SATELLITE_READ_TIMEOUT', 120)),
+            retry_methods=("GET", "POST"),
+            pool_maxsize=max(self.max_concurrent_requests, 4)
+        )
+        
+        # Cached OAuth token and its (monotonic) refresh deadline
+        self._token = None
+        self._token_refresh_at = 0
+        self._token_lock = threading.Lock()
+        
     def get_auth_token(self):
-        """Get authentication token for Sentinel Hub API"""
+        """
+        Get authentication token for Sentinel Hub API
+        
+        Tokens are cached until shortly before they expire. When several
+        threads need a new token at once, only one refresh request is made
+        and the others wait for its result.
+        
+        Returns:
+            str: Access token, or None if unavailable
+        """
         if not self.api_key:
             self.logger.warning("No Sentinel Hub API key provided")
             return None
+        
+        token = self._cached_token()
+        if token:
+            return token
+        
+        with self._token_lock:
+            # Another thread may have refreshed the token while we waited
+            token = self._cached_token()
+            if token:
+                return token
+            
+            token, expires_in = self._request_auth_token()
+            if token and expires_in:
+                margin = min(TOKEN_REFRESH_MARGIN, expires_in * 0.1)
+                self._token = token
+                self._token_refresh_at = time.monotonic() + expires_in - margin
             
+            return token
+    
+    def _cached_token(self):
+        """Return the cached token if it is not due for refresh"""
+        if self._token and time.monotonic() < self._token_refresh_at:
+            return self._token
+        return None
+    
+    def _request_auth_token(self):
+        """Request a new token, returning (access_token, expires_in seconds)"""
         try:
-            response = requests.post(
+            response = self.session.post(
                 self.base_url,
                 data={
                     'grant_type': 'client_credentials',
@@ -32,15 +139,17 @@ class SatelliteProcessor:
                 }
             )
             if response.status_code == 200:
-                return response.json().get('access_token')
+                data = response.json()
+                return data.get('access_token'), float(data.get('expires_in', 0))
             else:
                 self.logger.error(f"Failed to get auth token: {response.status_code}")
-                return None
+                return None, 0
         except Exception as e:
             self.logger.error(f"Error getting auth token: {str(e)}")
-            return None
+            return None, 0
     
-    def get_satellite_image(self, bbox, date_from, date_to, cloud_coverage_max=20):
+    def get_satellite_image(self, bbox, date_from, date_to, cloud_coverage_max=20, token=None,
+                            evalscript=DEFAULT_EVALSCRIPT, output_format="image/png", width=512, height=512):
         """
         Get satellite image for a specific bounding box and date range
         
@@ -49,11 +158,27 @@ class SatelliteProcessor:
             date_from (str): Start date in format 'YYYY-MM-DD'
             date_to (str): End date in format 'YYYY-MM-DD'
             cloud_coverage_max (int): Maximum cloud coverage percentage
+            token (str): Existing auth token to reuse (requested if not provided)
+            evalscript (str): Sentinel Hub evalscript rendering the output
+            output_format (str): MIME type of the returned image
+            width (int): Output width in pixels
+            height (int): Output height in pixels
             
         Returns:
-            dict: Dictionary with image data and metadata
+            dict: Dictionary with image data (BytesIO) and metadata
         """
-        token = self.get_auth_token()
+        # Serve repeated requests from the scene cache without a network call
+        cache_key = SceneCache.make_key(
+            bbox, date_from, date_to, cloud_coverage_max, evalscript, output_format, (width, height)
+        )
+        cached_image = self.get_cached_image(
+            bbox, date_from, date_to, cloud_coverage_max, evalscript, output_format, width, height
+        )
+        if cached_image is not None:
+            return cached_image
+        
+        if token is None:
+            token = self.get_auth_token()
         if not token:
             return None
             
@@ -78,34 +203,18 @@ class SatelliteProcessor:
                     ]
                 },
                 "output": {
-                    "width": 512,
-                    "height": 512,
+                    "width": width,
+                    "height": height,
                     "responses": [
                         {
                             "identifier": "default",
                             "format": {
-                                "type": "image/png"
+                                "type": output_format
                             }
                         }
                     ]
                 },
-                "evalscript": """
-                    //VERSION=3
-                    function setup() {
-                        return {
-                            input: ["B02", "B03", "B04", "B08", "SCL"],
-                            output: { bands: 4 }
-                        };
-                    }
-                    
-                    function evaluatePixel(sample) {
-                        // Calculate NDVI: (NIR - RED) / (NIR + RED)
-                        var ndvi = (sample.B08 - sample.B04) / (sample.B08 + sample.B04);
-                        
-                        // Return RGBA
-                        return [sample.B04 * 2.5, sample.B03 * 2.5, sample.B02 * 2.5, ndvi];
-                    }
-                """
+                "evalscript": evalscript
             }
             
             headers = {
@@ -113,17 +222,20 @@ class SatelliteProcessor:
                 "Content-Type": "application/json"
             }
             
-            response = requests.post(
+            response = self.session.post(
                 self.sentinel_hub_url,
                 json=payload,
                 headers=headers
             )
             
             if response.status_code == 200:
+                self.scene_cache.put(cache_key, response.content)
+                
                 return {
                     "image": BytesIO(response.content),
                     "date_acquired": date_to,
-                    "cloud_coverage": cloud_coverage_max
+                    "cloud_coverage": cloud_coverage_max,
+                    "cached": False
                 }
             else:
                 self.logger.error(f"Failed to get satellite image: {response.status_code}")
@@ -133,6 +245,44 @@ class SatelliteProcessor:
             self.logger.error(f"Error getting satellite image: {str(e)}")
             return None
     
+    def get_cached_image(self, bbox, date_from, date_to, cloud_coverage_max=20,
+                         evalscript=DEFAULT_EVALSCRIPT, output_format="image/png", width=512, height=512):
+        """
+        Get a satellite image from the scene cache only, without any network call
+        
+        Args:
+            bbox (list): Bounding box coordinates [min_lon, min_lat, max_lon, max_lat]
+            date_from (str): Start date in format 'YYYY-MM-DD'
+            date_to (str): End date in format 'YYYY-MM-DD'
+            cloud_coverage_max (int): Maximum cloud coverage percentage
+            evalscript (str): Sentinel Hub evalscript rendering the output
+            output_format (str): MIME type of the image
+            width (int): Output width in pixels
+            height (int): Output height in pixels
+            
+        Returns:
+            dict: Image data and metadata as returned by get_satellite_image,
+                or None if the scene is not cached
+        """
+        cache_key = SceneCache.make_key(
+            bbox, date_from, date_to, cloud_coverage_max, evalscript, output_format, (width, height)
+        )
+        cached_image = self.scene_cache.get(cache_key)
+        if cached_image is None:
+            return None
+        
+        # Copy the scene out and unmap it right away, so hits never keep
+        # mappings (of possibly evicted files) open
+        with cached_image:
+            image = BytesIO(cached_image[:])
+        
+        return {
+            "image": image,
+            "date_acquired": date_to,
+            "cloud_coverage": cloud_coverage_max,
+            "cached": True
+        }
+    
     def calculate_ndvi(self, nir_band, red_band):
         """
         Calculate Normalized Difference Vegetation Index
@@ -145,12 +295,16 @@ class SatelliteProcessor:
             numpy.ndarray: NDVI values
         """
         try:
-            # Avoid division by zero
+            nir_band = np.asarray(nir_band, dtype=np.float32)
+            red_band = np.asarray(red_band, dtype=np.float32)
+            
+            # Avoid division by zero (pixels with no signal get 0)
             denominator = nir_band + red_band
-            ndvi = np.where(
-                denominator > 0,
-                (nir_band - red_band) / denominator,
-                0
+            ndvi = np.divide(
+                nir_band - red_band,
+                denominator,
+                out=np.zeros_like(denominator),
+                where=denominator > 0
             )
             return ndvi
         except Exception as e:
@@ -169,45 +323,153 @@ class SatelliteProcessor:
             numpy.ndarray: NDMI values
         """
         try:
-            # Avoid division by zero
+            nir_band = np.asarray(nir_band, dtype=np.float32)
+            swir_band = np.asarray(swir_band, dtype=np.float32)
+            
+            # Avoid division by zero (pixels with no signal get 0)
             denominator = nir_band + swir_band
-            ndmi = np.where(
-                denominator > 0,
-                (nir_band - swir_band) / denominator,
-                0
+            ndmi = np.divide(
+                nir_band - swir_band,
+                denominator,
+                out=np.zeros_like(denominator),
+                where=denominator > 0
             )
             return ndmi
         except Exception as e:
             self.logger.error(f"Error calculating NDMI: {str(e)}")
             return None
     
-    def analyze_crop_health(self, ndvi_values):
+    def decode_bands(self, image):
+        """
+        Decode a raster returned for BAND_EVALSCRIPT into band arrays
+        
+        Args:
+            image (file-like): Raster bytes (BytesIO)
+            
+        Returns:
+            dict: float32 arrays keyed by BAND_NAMES, or None if decoding fails
+        """
+        try:
+            image.seek(0)
+            
+            with MemoryFile(image.read()) as memfile:
+                with memfile.open() as dataset:
+                    raster = dataset.read(out_dtype=np.float32)
+            
+            return dict(zip(BAND_NAMES, raster))
+        except Exception as e:
+            self.logger.error(f"Error decoding satellite bands: {str(e)}")
+            return None
+    
+    def calculate_scene_statistics(self, bands):
+        """
+        Calculate per-scene NDVI and NDMI statistics from band arrays
+        
+        Args:
+            bands (dict): Band arrays as returned by decode_bands
+            
+        Returns:
+            dict: Scene statistics, or None if the scene has no valid pixels
+        """
+        try:
+            ndvi = self.calculate_ndvi(bands["nir"], bands["red"])
+            ndmi = self.calculate_ndmi(bands["nir"], bands["swir"])
+            
+            # Ignore pixels outside the data footprint
+            valid = bands["data_mask"] > 0
+            valid_pixels = int(np.count_nonzero(valid))
+            if valid_pixels == 0:
+                return None
+            
+            ndvi_valid = ndvi[valid]
+            ndmi_valid = ndmi[valid]
+            
+            return {
+                "average_ndvi": float(ndvi_valid.mean()),
+                "ndvi_std": float(ndvi_valid.std()),
+                "ndvi_min": float(ndvi_valid.min()),
+                "ndvi_max": float(ndvi_valid.max()),
+                "average_ndmi": float(ndmi_valid.mean()),
+                "valid_pixel_fraction": valid_pixels / valid.size
+            }
+        except Exception as e:
+            self.logger.error(f"Error calculating scene statistics: {str(e)}")
+            return None
+    
+    def classify_pixels(self, values, thresholds, tile_size=CLASSIFY_TILE_SIZE):
+        """
+        Count pixels per threshold class and compute their mean in a single sweep
+        
+        The raster is read once, one cache-sized tile at a time. Per tile, the
+        number of pixels at or above each threshold is counted and the class
+        counts are the differences between consecutive thresholds. Because
+        only one tile is resident at a time, this also works for rasters
+        larger than memory (e.g. a numpy.memmap). NaN pixels are excluded
+        from the classes and the mean.
+        
+        Args:
+            values (numpy.ndarray): Index values
+            thresholds (list): Increasing class boundaries; class i holds
+                thresholds[i-1] <= value < thresholds[i]
+            tile_size (int): Pixels processed per tile
+            
+        Returns:
+            dict: Per-class pixel counts, number of valid pixels and mean value
+        """
+        thresholds = [float(t) for t in thresholds]
+        at_or_above = np.zeros(len(thresholds), dtype=np.int64)
+        valid_pixels = 0
+        total = 0.0
+        
+        flat = values.reshape(-1)
+        
+        for start in range(0, flat.size, tile_size):
+            tile = flat[start:start + tile_size]
+            
+            for i, threshold in enumerate(thresholds):
+                at_or_above[i] += np.count_nonzero(tile >= threshold)
+            
+            tile_sum = tile.sum(dtype=np.float64)
+            if np.isnan(tile_sum):
+                valid = ~np.isnan(tile)
+                valid_pixels += int(np.count_nonzero(valid))
+                total += float(tile[valid].sum(dtype=np.float64))
+            else:
+                valid_pixels += tile.size
+                total += float(tile_sum)
+        
+        if valid_pixels == 0:
+            raise ValueError("No valid pixels to classify")
+        
+        # Class counts from the cumulative "at or above" counts
+        cumulative = np.concatenate(([valid_pixels], at_or_above, [0]))
+        
+        return {
+            "counts": cumulative[:-1] - cumulative[1:],
+            "valid_pixels": valid_pixels,
+            "mean": total / valid_pixels
+        }
+    
+    def analyze_crop_health(self, ndvi_values, tile_size=CLASSIFY_TILE_SIZE):
         """
         Analyze crop health based on NDVI values
         
         Args:
             ndvi_values (numpy.ndarray): NDVI values
+            tile_size (int): Pixels processed per tile
             
         Returns:
             dict: Dictionary with crop health analysis
         """
         try:
-            # NDVI thresholds for different crop health levels
-            poor_threshold = 0.2
-            fair_threshold = 0.4
-            good_threshold = 0.6
+            # NDVI thresholds for different crop health levels (poor, fair, good)
+            thresholds = [0.2, 0.4, 0.6]
             
             # Calculate percentage of each health level
-            total_pixels = ndvi_values.size
-            poor_pixels = np.sum(ndvi_values < poor_threshold)
-            fair_pixels = np.sum((ndvi_values >= poor_threshold) & (ndvi_values < fair_threshold))
-            good_pixels = np.sum((ndvi_values >= fair_threshold) & (ndvi_values < good_threshold))
-            excellent_pixels = np.sum(ndvi_values >= good_threshold)
-            
-            poor_percent = (poor_pixels / total_pixels) * 100
-            fair_percent = (fair_pixels / total_pixels) * 100
-            good_percent = (good_pixels / total_pixels) * 100
-            excellent_percent = (excellent_pixels / total_pixels) * 100
+            classified = self.classify_pixels(np.asarray(ndvi_values), thresholds, tile_size)
+            poor_percent, fair_percent, good_percent, excellent_percent = (
+                classified["counts"] / classified["valid_pixels"] * 100
+            ).tolist()
             
             # Determine overall health status
             if excellent_percent > 60:
@@ -225,39 +487,32 @@ class SatelliteProcessor:
                 "fair_percent": fair_percent,
                 "good_percent": good_percent,
                 "excellent_percent": excellent_percent,
-                "average_ndvi": np.mean(ndvi_values)
+                "average_ndvi": classified["mean"]
             }
         except Exception as e:
             self.logger.error(f"Error analyzing crop health: {str(e)}")
             return None
     
-    def detect_water_stress(self, ndmi_values):
+    def detect_water_stress(self, ndmi_values, tile_size=CLASSIFY_TILE_SIZE):
         """
         Detect water stress based on NDMI values
         
         Args:
             ndmi_values (numpy.ndarray): NDMI values
+            tile_size (int): Pixels processed per tile
             
         Returns:
             dict: Dictionary with water stress analysis
         """
         try:
-            # NDMI thresholds for different water stress levels
-            severe_threshold = 0.0
-            moderate_threshold = 0.2
-            low_threshold = 0.4
+            # NDMI thresholds for different water stress levels (severe, moderate, low)
+            thresholds = [0.0, 0.2, 0.4]
             
             # Calculate percentage of each stress level
-            total_pixels = ndmi_values.size
-            severe_pixels = np.sum(ndmi_values < severe_threshold)
-            moderate_pixels = np.sum((ndmi_values >= severe_threshold) & (ndmi_values < moderate_threshold))
-            low_pixels = np.sum((ndmi_values >= moderate_threshold) & (ndmi_values < low_threshold))
-            no_stress_pixels = np.sum(ndmi_values >= low_threshold)
-            
-            severe_percent = (severe_pixels / total_pixels) * 100
-            moderate_percent = (moderate_pixels / total_pixels) * 100
-            low_percent = (low_pixels / total_pixels) * 100
-            no_stress_percent = (no_stress_pixels / total_pixels) * 100
+            classified = self.classify_pixels(np.asarray(ndmi_values), thresholds, tile_size)
+            severe_percent, moderate_percent, low_percent, no_stress_percent = (
+                classified["counts"] / classified["valid_pixels"] * 100
+            ).tolist()
             
             # Determine overall water stress status
             if severe_percent > 30:
@@ -275,60 +530,231 @@ class SatelliteProcessor:
                 "moderate_percent": moderate_percent,
                 "low_percent": low_percent,
                 "no_stress_percent": no_stress_percent,
-                "average_ndmi": np.mean(ndmi_values)
+                "average_ndmi": classified["mean"]
             }
         except Exception as e:
             self.logger.error(f"Error detecting water stress: {str(e)}")
             return None
 
-    def get_historical_ndvi_series(self, bbox, start_date, end_date, interval_days=15):
+    def process_large_aoi(self, bbox, date_from, date_to, resolution_m=10, tile_px=512,
+                          work_dir=None, max_workers=None, max_tiles=None):
+        """
+        Analyze an area of interest too large for a single satellite request
+        
+        The AOI is split into tiles which are fetched concurrently. Each tile's
+        bands are written straight into a memory-mapped raster on disk, and
+        NDVI/NDMI are then computed one block of rows at a time, so memory use
+        stays bounded regardless of the AOI size.
+        
+        Args:
+            bbox (list): Bounding box coordinates [min_lon, min_lat, max_lon, max_lat]
+            date_from (str): Start date in format 'YYYY-MM-DD'
+            date_to (str): End date in format 'YYYY-MM-DD'
+            resolution_m (float): Ground resolution of one pixel in metres
+            tile_px (int): Maximum tile width/height in pixels
+            work_dir (str): Directory to keep the rasters in (temporary if None)
+            max_workers (int): Maximum concurrent tile requests
+            max_tiles (int): Maximum number of tiles (default: MAX_AOI_TILES)
+            
+        Returns:
+            dict: Raster size, tile counts, crop health and water stress analysis
+        """
+        temp_dir = None
+        
+        try:
+            plan = plan_tiles(bbox, resolution_m, tile_px)
+            tiles = plan["tiles"]
+            
+            max_tiles = max_tiles or MAX_AOI_TILES
+            if len(tiles) > max_tiles:
+                raise ValueError(
+                    f"Area of interest needs {len(tiles)} tiles at {resolution_m} m "
+                    f"resolution (limit {max_tiles}); use a coarser resolution"
+                )
+            
+            token = self.get_auth_token()
+            if not token:
+                return None
+            
+            if work_dir is None:
+                temp_dir = tempfile.TemporaryDirectory(prefix="aoi_")
+                work_dir = temp_dir.name
+            elif not os.path.exists(work_dir):
+                os.makedirs(work_dir)
+            
+            shape = (plan["height"], plan["width"])
+            
+            # Band raster on disk; pixels never fetched stay masked out (0)
+            bands = np.lib.format.open_memmap(
+                os.path.join(work_dir, "bands.npy"),
+                mode="w+",
+                dtype=np.float32,
+                shape=(len(BAND_NAMES),) + shape
+            )
+            
+            def fetch_tile(tile):
+                image_data = self.get_satellite_image(
+                    tile["bbox"], date_from, date_to, token=token,
+                    evalscript=BAND_EVALSCRIPT, output_format="image/tiff",
+                    width=tile["width"], height=tile["height"]
+                )
+                if not image_data:
+                    return False
+                
+                tile_bands = self.decode_bands(image_data["image"])
+                if not tile_bands:
+                    return False
+                
+                window = (
+                    slice(tile["row"], tile["row"] + tile["height"]),
+                    slice(tile["col"], tile["col"] + tile["width"])
+                )
+                
+                # Tiles cover disjoint windows, so threads can write concurrently
+                for index, name in enumerate(BAND_NAMES):
+                    bands[(index,) + window] = tile_bands[name]
+                return True
+            
+            max_workers = min(max_workers or self.max_concurrent_requests, len(tiles))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                tiles_fetched = sum(executor.map(fetch_tile, tiles))
+            
+            if tiles_fetched == 0:
+                return None
+            
+            ndvi = np.lib.format.open_memmap(
+                os.path.join(work_dir, "ndvi.npy"), mode="w+", dtype=np.float32, shape=shape
+            )
+            ndmi = np.lib.format.open_memmap(
+                os.path.join(work_dir, "ndmi.npy"), mode="w+", dtype=np.float32, shape=shape
+            )
+            
+            red, nir, swir, data_mask = (bands[i] for i in range(len(BAND_NAMES)))
+            
+            for start in range(0, shape[0], AOI_CHUNK_ROWS):
+                rows = slice(start, start + AOI_CHUNK_ROWS)
+                invalid = data_mask[rows] == 0
+                
+                ndvi_chunk = self.calculate_ndvi(nir[rows], red[rows])
+                ndvi_chunk[invalid] = np.nan
+                ndvi[rows] = ndvi_chunk
+                
+                ndmi_chunk = self.calculate_ndmi(nir[rows], swir[rows])
+                ndmi_chunk[invalid] = np.nan
+                ndmi[rows] = ndmi_chunk
+            
+            result = {
+                "height": shape[0],
+                "width": shape[1],
+                "resolution_m": resolution_m,
+                "tiles_total": len(tiles),
+                "tiles_fetched": tiles_fetched,
+                "crop_health": self.analyze_crop_health(ndvi),
+                "water_stress": self.detect_water_stress(ndmi)
+            }
+            
+            if temp_dir is None:
+                result["raster_dir"] = work_dir
+            
+            # Release the maps before the temporary directory is removed
+            del bands, ndvi, ndmi, red, nir, swir, data_mask
+            
+            return result
+            
+        except Exception as e:
+            self.logger.error(f"Error processing area of interest: {str(e)}")
+            return None
+        finally:
+            if temp_dir is not None:
+                temp_dir.cleanup()
+    
+    def get_historical_ndvi_series(self, bbox, start_date, end_date, interval_days=15, max_workers=None):
         """
         Get historical NDVI time series for a specific area
         
+        Cached intervals are served from the scene cache first; only the
+        remaining intervals request an auth token, which they share, and are
+        fetched concurrently with at most max_workers requests in flight.
+        
         Args:
             bbox (list): Bounding box coordinates [min_lon, min_lat, max_lon, max_lat]
             start_date (str): Start date in format 'YYYY-MM-DD'
             end_date (str): End date in format 'YYYY-MM-DD'
             interval_days (int): Interval between images in days
+            max_workers (int): Maximum concurrent image requests (1 fetches serially)
             
         Returns:
-            list: List of dictionaries with date and average NDVI
+            list: List of dictionaries with date and average NDVI, in date order
         """
         try:
             # Convert string dates to datetime objects
             start = datetime.strptime(start_date, '%Y-%m-%d')
             end = datetime.strptime(end_date, '%Y-%m-%d')
             
-            ndvi_series = []
+            # Build the list of (date_from, date_to) intervals
+            intervals = []
             current_date = start
             
             while current_date <= end:
-                # Format the current date and the date after interval_days
                 date_from = current_date.strftime('%Y-%m-%d')
                 date_to = (current_date + timedelta(days=interval_days)).strftime('%Y-%m-%d')
+                intervals.append((date_from, date_to))
+                
+                # Move to the next interval
+                current_date += timedelta(days=interval_days)
+            
+            if not intervals:
+                return []
+            
+            # Serve cached intervals without authenticating
+            images = [
+                self.get_cached_image(bbox, date_from, date_to, evalscript=BAND_EVALSCRIPT, output_format="image/tiff")
+                for date_from, date_to in intervals
+            ]
+            missing = [index for index, image in enumerate(images) if image is None]
+            
+            # Share one token across the interval requests that missed the cache
+            token = self.get_auth_token() if missing else None
+            
+            if token:
+                def fetch(index):
+                    date_from, date_to = intervals[index]
+                    return self.get_satellite_image(
+                        bbox, date_from, date_to, token=token,
+                        evalscript=BAND_EVALSCRIPT, output_format="image/tiff"
+                    )
+                
+                max_workers = min(max_workers or self.max_concurrent_requests, len(missing))
                 
-                # Get image for the current time interval
-                image_data = self.get_satellite_image(bbox, date_from, date_to)
+                if max_workers <= 1:
+                    fetched = [fetch(index) for index in missing]
+                else:
+                    # executor.map keeps results in interval order
+                    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                        fetched = list(executor.map(fetch, missing))
                 
-                if image_data:
-                    # Process the image to get NDVI
-                    # This is a simplified example - in a real system we would extract 
-                    # the bands and calculate actual NDVI
-                    
-                    # For demo purposes, generate a random NDVI value between 0 and 1
-                    # In real implementation, we would calculate this from the image data
-                    average_ndvi = 0.3 + 0.4 * np.random.random()
-                    
+                for index, image in zip(missing, fetched):
+                    images[index] = image
+            
+            ndvi_series = []
+            
+            for (date_from, date_to), image_data in zip(intervals, images):
+                if not image_data:
+                    continue
+                
+                # Extract the bands and reduce them to scene statistics
+                bands = self.decode_bands(image_data["image"])
+                stats = self.calculate_scene_statistics(bands) if bands else None
+                
+                # Skip scenes that could not be decoded or are fully masked
+                if stats:
                     ndvi_series.append({
                         "date": date_to,
-                        "average_ndvi": average_ndvi
+                        **stats
                     })
-                
-                # Move to the next interval
-                current_date += timedelta(days=interval_days)
             
             return ndvi_series
             
         except Exception as e:
             self.logger.error(f"Error getting historical NDVI series: {str(e)}")
-            return None
+            return None
\ No newline at end of file
@@ -0,0 +1,182 @@
+import os
+import mmap
+import json
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Seconds a scene whose window ends today or later is served before refetching
+SCENE_CACHE_OPEN_WINDOW_TTL = float(os.environ.get('SCENE_CACHE_OPEN_WINDOW_TTL', 6 * 3600))
+
+class SceneCache:
+    """On-disk cache for satellite scenes with LRU eviction and a size cap"""
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        """
+        Initialize the scene cache
+
+        Args:
+            cache_dir (str): Directory holding cached scenes
+            max_bytes (int): Maximum total size of cached scenes in bytes
+        """
+        self.cache_dir = cache_dir or os.environ.get('SCENE_CACHE_DIR', 'instance/scene_cache')
+        self.max_bytes = max_bytes or int(os.environ.get('SCENE_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+        # Running size of the cached scenes; re-measured from disk whenever it
+        # exceeds max_bytes, which also corrects drift from other processes
+        self._total_bytes = self._scan()[1]
+
+    @staticmethod
+    def make_key(bbox, date_from, date_to, cloud_coverage_max, evalscript, output_format="image/png",
+                 size=(512, 512), open_window_ttl=None):
+        """
+        Build the cache key for a scene request
+
+        Windows ending today or later can still gain acquisitions, so their
+        keys include the current open_window_ttl period: the entry stops
+        being served when the period ends and is evicted like any other
+        unused scene. Closed windows never change and are keyed by the
+        request alone.
+
+        Args:
+            bbox (list): Bounding box coordinates [min_lon, min_lat, max_lon, max_lat]
+            date_from (str): Start date in format 'YYYY-MM-DD'
+            date_to (str): End date in format 'YYYY-MM-DD'
+            cloud_coverage_max (int): Maximum cloud coverage percentage
+            evalscript (str): Evalscript used to render the scene
+            output_format (str): MIME type of the rendered scene
+            size (tuple): Output (width, height) in pixels
+            open_window_ttl (float): Seconds an open window stays cached
+                (default: SCENE_CACHE_OPEN_WINDOW_TTL)
+
+        Returns:
+            str: Hex digest identifying the scene
+        """
+        open_window_ttl = open_window_ttl or SCENE_CACHE_OPEN_WINDOW_TTL
+        period = None
+        if date_to >= datetime.utcnow().strftime('%Y-%m-%d'):
+            period = int(time.time() // open_window_ttl)
+
+        evalscript_hash = hashlib.sha256(evalscript.encode('utf-8')).hexdigest()
+        key_data = json.dumps([
+            [float(x) for x in bbox], date_from, date_to, cloud_coverage_max,
+            evalscript_hash, output_format, list(size), period
+        ])
+        return hashlib.sha256(key_data.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.scene")
+
+    def get(self, key):
+        """
+        Get a cached scene
+
+        Args:
+            key (str): Cache key from make_key
+
+        Returns:
+            mmap.mmap: Read-only memory map of the scene, or None on a miss.
+                The caller must close it, e.g. by using it as a context
+                manager, so evicted scenes do not stay mapped.
+        """
+        path = self._path(key)
+
+        try:
+            with open(path, 'rb') as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+            # Mark the entry as recently used for LRU eviction
+            os.utime(path)
+            return buffer
+        except (FileNotFoundError, ValueError):
+            return None
+        except Exception as e:
+            self.logger.error(f"Error reading cached scene {key}: {str(e)}")
+            return None
+
+    def put(self, key, content):
+        """
+        Store a scene and evict least recently used scenes over the size cap
+
+        Args:
+            key (str): Cache key from make_key
+            content (bytes): Scene content
+
+        Returns:
+            bool: True if the scene was stored
+        """
+        if not content:
+            return False
+
+        path = self._path(key)
+
+        try:
+            try:
+                replaced_bytes = os.path.getsize(path)
+            except FileNotFoundError:
+                replaced_bytes = 0
+
+            # Write to a temporary file first so readers never see partial scenes
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            self.logger.error(f"Error caching scene {key}: {str(e)}")
+            return False
+
+        with self._lock:
+            self._total_bytes += len(content) - replaced_bytes
+            over_budget = self._total_bytes > self.max_bytes
+
+        if over_budget:
+            self._evict()
+        return True
+
+    def _scan(self):
+        """List cached scenes as (mtime, size, path) with their total size"""
+        entries = []
+        total_bytes = 0
+
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith('.scene'):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total_bytes += stat.st_size
+
+        return entries, total_bytes
+
+    def _evict(self):
+        """Delete least recently used scenes until the cache fits in max_bytes"""
+        with self._lock:
+            entries, total_bytes = self._scan()
+            self._total_bytes = total_bytes
+
+            if total_bytes <= self.max_bytes:
+                return
+
+            entries.sort()
+            for _, size, path in entries:
+                if total_bytes <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total_bytes -= size
+                except FileNotFoundError:
+                    pass
+
+            self._total_bytes = total_bytes
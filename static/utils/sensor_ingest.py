@@ -0,0 +1,360 @@
+import os
+import json
+import time
+import atexit
+import struct
+import logging
+import threading
+import numpy as np
+from datetime import datetime, timezone
+
+from utils.sensor_store import SENSOR_COLUMNS, is_valid_identifier
+
+logger = logging.getLogger(__name__)
+
+# Packed binary frame: magic, field id and sensor id (each prefixed by a
+# one-byte length), a uint32 record count, then the records
+FRAME_MAGIC = b"SRB1"
+FRAME_COUNT = struct.Struct('<I')
+
+# One packed reading: epoch seconds followed by the sensor columns (NaN for
+# columns the probe does not measure)
+RECORD_DTYPE = np.dtype([("timestamp", '<u4')] + [(name, '<f4') for name in SENSOR_COLUMNS])
+
+def _parse_timestamp(value):
+    """Convert an ISO 8601 string or epoch seconds to a naive UTC datetime64"""
+    if isinstance(value, str):
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return np.datetime64(parsed, 'us')
+    return np.datetime64(int(round(float(value) * 1e6)), 'us')
+
+def _check_ids(field_id, sensor_id, store, fields, where):
+    """
+    Reject identifiers the store would refuse when the batch is flushed
+
+    Args:
+        field_id (str): Field the readings are sent under
+        sensor_id (str): Sensor the readings are sent for
+        store (SensorReadingStore): Store whose known fields are checked (optional)
+        fields (dict): Sensor -> field seen so far in this payload
+        where (str): Location of the readings in the payload, for errors
+    """
+    for name, identifier in (("field_id", field_id), ("sensor_id", sensor_id)):
+        if not is_valid_identifier(identifier):
+            raise ValueError(f"{where}: invalid {name} {identifier!r}")
+
+    known_field = fields.get(sensor_id)
+    if known_field is None and store is not None:
+        known_field = store.field_of(sensor_id)
+    if known_field is not None and known_field != field_id:
+        raise ValueError(f"{where}: sensor {sensor_id} belongs to field {known_field}, not {field_id}")
+    fields[sensor_id] = field_id
+
+def parse_ndjson(body, store=None):
+    """
+    Parse newline-delimited JSON readings
+
+    Each line is an object with field_id, sensor_id, timestamp (ISO 8601
+    string or epoch seconds) and any of the sensor columns. Lines with an
+    invalid identifier, or sending a sensor under a field other than its
+    own, raise ValueError so the payload is refused rather than dropped at
+    flush time.
+
+    Args:
+        body (bytes): Request body
+        store (SensorReadingStore): Store to check sensor fields against
+
+    Returns:
+        list: (field_id, sensor_id, timestamps, columns) batches, one per sensor
+    """
+    grouped = {}
+    fields = {}
+
+    for number, line in enumerate(body.splitlines(), start=1):
+        line = line.strip()
+        if not line:
+            continue
+
+        item = json.loads(line)
+        if not isinstance(item, dict):
+            raise ValueError(f"Line {number}: expected a JSON object")
+        key = (str(item["field_id"]), str(item["sensor_id"]))
+        _check_ids(key[0], key[1], store, fields, f"Line {number}")
+        rows = grouped.setdefault(key, {"timestamp": [], **{name: [] for name in SENSOR_COLUMNS}})
+
+        rows["timestamp"].append(_parse_timestamp(item["timestamp"]))
+
+        for name in SENSOR_COLUMNS:
+            value = item.get(name)
+            rows[name].append(np.nan if value is None else value)
+
+    batches = []
+    for (field_id, sensor_id), rows in grouped.items():
+        timestamps = np.asarray(rows.pop("timestamp"), dtype='datetime64[us]')
+        columns = {name: np.asarray(values, dtype=np.float64) for name, values in rows.items()}
+        batches.append((field_id, sensor_id, timestamps, columns))
+
+    return batches
+
+def parse_binary_frames(body, store=None):
+    """
+    Parse packed binary reading frames
+
+    Frames are validated like parse_ndjson lines.
+
+    Args:
+        body (bytes): One or more concatenated frames
+        store (SensorReadingStore): Store to check sensor fields against
+
+    Returns:
+        list: (field_id, sensor_id, timestamps, columns) batches, one per frame
+    """
+    batches = []
+    fields = {}
+    offset = 0
+
+    while offset < len(body):
+        if body[offset:offset + 4] != FRAME_MAGIC:
+            raise ValueError(f"Invalid frame header at byte {offset}")
+        frame_start = offset
+        offset += 4
+
+        ids = []
+        for _ in range(2):
+            length = body[offset]
+            ids.append(body[offset + 1:offset + 1 + length].decode('utf-8'))
+            offset += 1 + length
+        _check_ids(ids[0], ids[1], store, fields, f"Frame at byte {frame_start}")
+
+        count = FRAME_COUNT.unpack_from(body, offset)[0]
+        offset += FRAME_COUNT.size
+
+        if offset + count * RECORD_DTYPE.itemsize > len(body):
+            raise ValueError("Truncated frame")
+        records = np.frombuffer(body, dtype=RECORD_DTYPE, count=count, offset=offset)
+        offset += count * RECORD_DTYPE.itemsize
+
+        timestamps = records["timestamp"].astype(np.int64).astype('datetime64[s]').astype('datetime64[us]')
+        columns = {name: records[name].astype(np.float64) for name in SENSOR_COLUMNS}
+        batches.append((ids[0], ids[1], timestamps, columns))
+
+    return batches
+
+class SensorIngestBuffer:
+    """
+    In-memory buffer that writes pushed sensor readings in micro-batches
+
+    Readings are held per sensor and appended to the reading store by a
+    background flusher when the buffer reaches max_batch_rows or when
+    max_delay_seconds have passed since the last flush. Batches that would
+    take the buffer past max_buffered_rows are refused so callers can apply
+    backpressure, and readings not newer than a sensor's stored readings
+    are refused when they arrive, since the store cannot insert them.
+    """
+
+    def __init__(self, store, max_batch_rows=None, max_delay_seconds=None, max_buffered_rows=None):
+        """
+        Initialize the buffer and start its background flusher
+
+        Args:
+            store (SensorReadingStore): Store the readings are flushed to
+            max_batch_rows (int): Buffered rows that trigger a flush
+            max_delay_seconds (float): Maximum time between flushes
+            max_buffered_rows (int): Buffered rows above which batches are refused
+        """
+        self.store = store
+        self.max_batch_rows = max_batch_rows or int(os.environ.get('SOIL_INGEST_BATCH_ROWS', 5000))
+        self.max_delay_seconds = max_delay_seconds or float(os.environ.get('SOIL_INGEST_MAX_DELAY', 5))
+        self.max_buffered_rows = max_buffered_rows or int(os.environ.get('SOIL_INGEST_MAX_BUFFERED_ROWS', 200000))
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = {}
+        self._buffered_rows = 0
+        self._counters = {
+            "received_rows": 0,
+            "flushed_rows": 0,
+            "rejected_rows": 0,
+            "rejected_batches": 0,
+            "stale_rows": 0,
+            "dropped_rows": 0,
+            "flushes": 0
+        }
+        self._last_flush = time.monotonic()
+
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._flusher = threading.Thread(target=self._run_flusher, name="sensor-ingest-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    def _split_stale(self, batches):
+        """
+        Separate readings not newer than each sensor's stored readings
+
+        Args:
+            batches (list): (field_id, sensor_id, timestamps, columns) batches
+
+        Returns:
+            tuple: (fresh batches, {sensor_id: (stale rows, last stored timestamp)})
+        """
+        fresh = []
+        stale = {}
+
+        for field_id, sensor_id, timestamps, columns in batches:
+            last = self.store.last_timestamp(sensor_id)
+            if last is not None:
+                keep = timestamps > last
+                if not keep.all():
+                    stale[sensor_id] = (int(np.count_nonzero(~keep)), last)
+                    timestamps = timestamps[keep]
+                    columns = {name: values[keep] for name, values in columns.items()}
+            if len(timestamps):
+                fresh.append((field_id, sensor_id, timestamps, columns))
+
+        return fresh, stale
+
+    def add(self, batches):
+        """
+        Buffer parsed reading batches
+
+        Never blocks on the store beyond reading each sensor's last stored
+        timestamp; the background flusher is woken to write full batches.
+
+        Args:
+            batches (list): (field_id, sensor_id, timestamps, columns) batches
+
+        Returns:
+            dict: "accepted" (False if refused because the buffer is full),
+                "accepted_rows", "stale_rows" and, per sensor with stale
+                readings, its last stored timestamp in "stale_sensors"
+        """
+        batches, stale = self._split_stale(batches)
+        rows = sum(len(timestamps) for _, _, timestamps, _ in batches)
+        stale_rows = sum(count for count, _ in stale.values())
+        result = {
+            "accepted": True,
+            "accepted_rows": rows,
+            "stale_rows": stale_rows,
+            "stale_sensors": {
+                sensor_id: last.item().isoformat() for sensor_id, (_, last) in stale.items()
+            }
+        }
+
+        with self._lock:
+            if self._buffered_rows + rows > self.max_buffered_rows:
+                self._counters["rejected_rows"] += rows
+                self._counters["rejected_batches"] += 1
+                return {**result, "accepted": False, "accepted_rows": 0}
+
+            self._counters["stale_rows"] += stale_rows
+
+            for field_id, sensor_id, timestamps, columns in batches:
+                self._pending.setdefault((field_id, sensor_id), []).append((timestamps, columns))
+
+            self._buffered_rows += rows
+            self._counters["received_rows"] += rows
+            flush_now = self._buffered_rows >= self.max_batch_rows
+
+        if flush_now:
+            self._wake.set()
+
+        return result
+
+    def flush(self):
+        """
+        Write all buffered readings to the store
+
+        Returns:
+            int: Number of rows written
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending = self._pending
+                self._pending = {}
+                self._buffered_rows = 0
+                self._last_flush = time.monotonic()
+
+            written = 0
+            dropped = 0
+
+            for (field_id, sensor_id), chunks in pending.items():
+                timestamps = np.concatenate([chunk[0] for chunk in chunks])
+                columns = {
+                    name: np.concatenate([chunk[1][name] for chunk in chunks])
+                    for name in SENSOR_COLUMNS
+                }
+
+                try:
+                    # Stale readings were refused by add(); only a write by
+                    # another process since then can make rows stale here
+                    last = self.store.last_timestamp(sensor_id)
+                    if last is not None:
+                        keep = timestamps > last
+                        if not keep.all():
+                            late = int(np.count_nonzero(~keep))
+                            self.logger.warning(
+                                f"Dropping {late} readings for sensor {sensor_id} that predate "
+                                f"readings stored by another writer"
+                            )
+                            dropped += late
+                            timestamps = timestamps[keep]
+                            columns = {name: values[keep] for name, values in columns.items()}
+
+                    written += self.store.append(field_id, sensor_id, timestamps, columns)
+                except Exception as e:
+                    self.logger.error(f"Error flushing readings for sensor {sensor_id}: {str(e)}")
+                    dropped += len(timestamps)
+
+            with self._lock:
+                self._counters["flushed_rows"] += written
+                self._counters["dropped_rows"] += dropped
+                if pending:
+                    self._counters["flushes"] += 1
+
+            return written
+
+    def _run_flusher(self):
+        """Flush when woken for a full batch, and at least every max_delay_seconds"""
+        while not self._stop.is_set():
+            self._wake.wait(self.max_delay_seconds / 2)
+            self._wake.clear()
+
+            with self._lock:
+                due = self._pending and (
+                    self._buffered_rows >= self.max_batch_rows
+                    or time.monotonic() - self._last_flush >= self.max_delay_seconds
+                )
+            if due and not self._stop.is_set():
+                try:
+                    self.flush()
+                except Exception as e:
+                    self.logger.error(f"Error in ingest flusher: {str(e)}")
+
+    def close(self):
+        """Stop the background flusher and write any buffered readings"""
+        self._stop.set()
+        self._wake.set()
+        self.flush()
+
+    def stats(self):
+        """
+        Get ingestion and backpressure counters
+
+        Returns:
+            dict: Counters, current buffer fill and limits
+        """
+        with self._lock:
+            return {
+                **self._counters,
+                "buffered_rows": self._buffered_rows,
+                "buffered_sensors": len(self._pending),
+                "buffer_utilization": round(self._buffered_rows / self.max_buffered_rows, 3),
+                "seconds_since_flush": round(time.monotonic() - self._last_flush, 1),
+                "max_batch_rows": self.max_batch_rows,
+                "max_delay_seconds": self.max_delay_seconds,
+                "max_buffered_rows": self.max_buffered_rows
+            }
@@ -0,0 +1,320 @@
+import os
+import re
+import logging
+import threading
+import numpy as np
+from collections.abc import Sequence
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; only the thread lock applies
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Soil sensor reading columns and the decimals each is reported with
+SENSOR_COLUMNS = {
+    "moisture": 1,
+    "temperature": 1,
+    "ph": 2,
+    "electrical_conductivity": 3,
+    "nitrogen": 1,
+    "phosphorus": 1,
+    "potassium": 1
+}
+
+# Allowed field and sensor identifiers (they are used as directory names)
+_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-][A-Za-z0-9_.-]*$')
+
+def is_valid_identifier(identifier):
+    """
+    Check whether a field or sensor identifier can be stored
+
+    Args:
+        identifier (str): Field or sensor identifier
+
+    Returns:
+        bool: True if the identifier is a safe directory name
+    """
+    return _ID_PATTERN.fullmatch(str(identifier)) is not None
+
+class SensorReadings(Sequence):
+    """
+    Columnar soil sensor readings with a lazy list-of-dicts view
+
+    The readings are held as one NumPy array per column plus a datetime64
+    timestamp index. Vectorized consumers use the timestamps and columns
+    attributes directly; indexing or iterating yields the legacy reading
+    dicts, which are only built when accessed.
+    """
+
+    def __init__(self, timestamps, columns):
+        self.timestamps = timestamps
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return SensorReadings(
+                self.timestamps[index],
+                {name: values[index] for name, values in self.columns.items()}
+            ).to_list()
+
+        record = {"timestamp": self.timestamps[index].item().isoformat()}
+        for name, values in self.columns.items():
+            record[name] = values[index].item()
+        return record
+
+    def __iter__(self):
+        return iter(self.to_list())
+
+    def latest(self):
+        """
+        Get the most recent measured value of each column
+
+        Probes that do not measure a column store NaN for it, so each column
+        falls back to its last non-NaN reading.
+
+        Returns:
+            dict: Reading dict with the timestamp of the last reading and the
+                latest measured value per column (NaN if never measured)
+        """
+        record = {"timestamp": self.timestamps[-1].item().isoformat()}
+        for name, values in self.columns.items():
+            measured = np.flatnonzero(~np.isnan(values))
+            record[name] = values[measured[-1]].item() if len(measured) else float("nan")
+        return record
+
+    def to_list(self):
+        """Materialize all readings as a list of dicts"""
+        names = list(self.columns)
+        timestamps = [ts.isoformat() for ts in self.timestamps.tolist()]
+        rows = zip(timestamps, *(self.columns[name].tolist() for name in names))
+        return [dict(zip(["timestamp"] + names, row)) for row in rows]
+
+class SensorReadingStore:
+    """
+    Append-only columnar store for soil sensor readings
+
+    Each sensor has one directory per field holding a raw int64 timestamp
+    file (microseconds since the epoch, non-decreasing) and one raw float64
+    file per column. Range queries binary-search the memory-mapped
+    timestamp index and return memory-mapped column slices, so no Python
+    objects are built per reading.
+    """
+
+    def __init__(self, root_dir=None):
+        """
+        Initialize the store
+
+        Args:
+            root_dir (str): Directory holding the store
+        """
+        self.root_dir = root_dir or os.environ.get('SOIL_STORE_DIR', 'instance/soil_store')
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+        if not os.path.exists(self.root_dir):
+            os.makedirs(self.root_dir, exist_ok=True)
+
+        # Map of sensor_id -> field_id; sensors never change field, so entries
+        # stay valid, and misses are re-checked on disk for sensors created
+        # by other processes
+        self._sensor_fields = {}
+        self._scan_sensors()
+
+    def _scan_sensors(self):
+        """Add every sensor found on disk to the sensor -> field map"""
+        for field_id in os.listdir(self.root_dir):
+            field_dir = os.path.join(self.root_dir, field_id)
+            if os.path.isdir(field_dir):
+                for sensor_id in os.listdir(field_dir):
+                    if os.path.isdir(os.path.join(field_dir, sensor_id)):
+                        self._sensor_fields.setdefault(sensor_id, field_id)
+
+    def _sensor_dir(self, field_id, sensor_id):
+        for identifier in (field_id, sensor_id):
+            if not is_valid_identifier(identifier):
+                raise ValueError(f"Invalid identifier: {identifier!r}")
+        return os.path.join(self.root_dir, str(field_id), str(sensor_id))
+
+    @contextmanager
+    def _file_lock(self, directory):
+        """Hold an exclusive lock on a directory across processes"""
+        if fcntl is None:
+            yield
+            return
+
+        with open(os.path.join(directory, ".lock"), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def field_of(self, sensor_id):
+        """Return the field a sensor is stored under, or None if unknown"""
+        field_id = self._sensor_fields.get(sensor_id)
+        if field_id is not None or not is_valid_identifier(sensor_id):
+            return field_id
+
+        # Another process may have created the sensor since it was last seen
+        for field_id in os.listdir(self.root_dir):
+            if os.path.isdir(os.path.join(self.root_dir, field_id, str(sensor_id))):
+                self._sensor_fields[sensor_id] = field_id
+                return field_id
+        return None
+
+    def list_sensors(self, field_id=None):
+        """
+        List stored sensors
+
+        Args:
+            field_id (str): Only list sensors of this field
+
+        Returns:
+            list: Sorted sensor ids
+        """
+        self._scan_sensors()
+        return sorted(
+            sensor_id for sensor_id, field in self._sensor_fields.items()
+            if field_id is None or field == str(field_id)
+        )
+
+    def append(self, field_id, sensor_id, timestamps, columns):
+        """
+        Append readings for a sensor
+
+        Args:
+            field_id (str): Field (farm) the sensor belongs to
+            sensor_id (str): Unique identifier for the sensor
+            timestamps (numpy.ndarray): Reading times (datetime64)
+            columns (dict): Arrays of values keyed by SENSOR_COLUMNS names;
+                missing columns are stored as NaN
+
+        Returns:
+            int: Number of readings appended
+        """
+        timestamps = np.asarray(timestamps, dtype='datetime64[us]').astype(np.int64)
+        count = len(timestamps)
+        if count == 0:
+            return 0
+
+        # Sort the batch so the stored index stays non-decreasing
+        order = np.argsort(timestamps, kind='stable')
+        timestamps = timestamps[order]
+        values = {}
+        for name in SENSOR_COLUMNS:
+            if name in columns:
+                values[name] = np.asarray(columns[name], dtype=np.float64)[order]
+            else:
+                values[name] = np.full(count, np.nan)
+
+        sensor_dir = self._sensor_dir(field_id, sensor_id)
+
+        with self._lock:
+            # Creating a sensor is serialized across processes so it can only
+            # ever be registered under one field
+            if self._sensor_fields.get(sensor_id) != str(field_id):
+                with self._file_lock(self.root_dir):
+                    known_field = self.field_of(sensor_id)
+                    if known_field is not None and known_field != str(field_id):
+                        raise ValueError(f"Sensor {sensor_id} is already stored under field {known_field}")
+                    os.makedirs(sensor_dir, exist_ok=True)
+
+            with self._file_lock(sensor_dir):
+                ts_path = os.path.join(sensor_dir, "timestamps.i8")
+
+                # Drop a torn trailing timestamp left by a crashed writer
+                size = os.path.getsize(ts_path) if os.path.exists(ts_path) else 0
+                if size % 8:
+                    os.truncate(ts_path, size - size % 8)
+
+                stored = self._read_timestamps(ts_path)
+                if len(stored) and timestamps[0] < stored[-1]:
+                    raise ValueError(f"Readings for sensor {sensor_id} must not predate stored readings")
+                offset = len(stored) * 8
+
+                # Write the columns before the index: readers size everything
+                # by the timestamp file. Each column is written at the index
+                # length, which also discards rows a crashed append left
+                # behind in the columns but not the index.
+                for name in SENSOR_COLUMNS:
+                    column_path = os.path.join(sensor_dir, f"{name}.f8")
+                    with open(column_path, 'r+b' if os.path.exists(column_path) else 'wb') as f:
+                        f.truncate(offset)
+                        f.seek(offset)
+                        f.write(values[name].astype('<f8').tobytes())
+                with open(ts_path, 'ab') as f:
+                    f.write(timestamps.astype('<i8').tobytes())
+
+            self._sensor_fields[sensor_id] = str(field_id)
+
+        return count
+
+    def _read_timestamps(self, ts_path):
+        """Memory-map a timestamp index (empty array if missing)"""
+        count = os.path.getsize(ts_path) // 8 if os.path.exists(ts_path) else 0
+        if count == 0:
+            return np.empty(0, dtype='<i8')
+        return np.memmap(ts_path, dtype='<i8', mode='r', shape=(count,))
+
+    def last_timestamp(self, sensor_id):
+        """
+        Get the time of a sensor's latest stored reading
+
+        Args:
+            sensor_id (str): Unique identifier for the sensor
+
+        Returns:
+            numpy.datetime64: Latest reading time, or None if nothing is stored
+        """
+        field_id = self.field_of(sensor_id)
+        if field_id is None:
+            return None
+
+        timestamps = self._read_timestamps(os.path.join(self._sensor_dir(field_id, sensor_id), "timestamps.i8"))
+        if len(timestamps) == 0:
+            return None
+        return np.datetime64(int(timestamps[-1]), 'us')
+
+    def query(self, sensor_id, start=None, end=None, field_id=None):
+        """
+        Get readings for a sensor within a time range
+
+        Args:
+            sensor_id (str): Unique identifier for the sensor
+            start (datetime): Earliest reading time (inclusive)
+            end (datetime): Latest reading time (inclusive)
+            field_id (str): Field of the sensor (looked up if not provided)
+
+        Returns:
+            SensorReadings: Memory-mapped readings, or None if the sensor is unknown
+        """
+        field_id = field_id or self.field_of(sensor_id)
+        if field_id is None:
+            return None
+
+        sensor_dir = self._sensor_dir(field_id, sensor_id)
+        timestamps = self._read_timestamps(os.path.join(sensor_dir, "timestamps.i8"))
+        count = len(timestamps)
+        if count == 0:
+            return None
+
+        # Binary-search the sorted index for the requested range
+        first = 0
+        last = count
+        if start is not None:
+            first = int(np.searchsorted(timestamps, np.datetime64(start, 'us').astype(np.int64), side='left'))
+        if end is not None:
+            last = int(np.searchsorted(timestamps, np.datetime64(end, 'us').astype(np.int64), side='right'))
+
+        columns = {
+            name: np.memmap(os.path.join(sensor_dir, f"{name}.f8"), dtype='<f8', mode='r', shape=(count,))[first:last]
+            for name in SENSOR_COLUMNS
+        }
+
+        return SensorReadings(timestamps[first:last].view('datetime64[us]'), columns)
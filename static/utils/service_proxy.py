@@ -4,6 +4,7 @@ import logging
 import requests
 from datetime import datetime
 from urllib.parse import urljoin
+from utils.http_client import get_session
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +24,7 @@ class ServiceProxy:
         # Use environment variable or default to the provided base_url
         self.base_url = os.environ.get("SERVICE_PROXY_URL", base_url)
         self.service_key = os.environ.get("SERVICE_PROXY_KEY", "")
+        self.session = get_session("service_proxy")
         
     def make_request(self, endpoint, method="POST", payload=None, params=None, headers=None):
         """
@@ -62,13 +64,13 @@ class ServiceProxy:
         try:
             # Make the request
             if method.upper() == "GET":
-                response = requests.get(url, params=params, headers=headers)
+                response = self.session.get(url, params=params, headers=headers)
             elif method.upper() == "POST":
-                response = requests.post(url, json=payload, params=params, headers=headers)
+                response = self.session.post(url, json=payload, params=params, headers=headers)
             elif method.upper() == "PUT":
-                response = requests.put(url, json=payload, params=params, headers=headers)
+                response = self.session.put(url, json=payload, params=params, headers=headers)
             elif method.upper() == "DELETE":
-                response = requests.delete(url, json=payload, params=params, headers=headers)
+                response = self.session.delete(url, json=payload, params=params, headers=headers)
             else:
                 logger.error(f"Unsupported HTTP method: {method}")
                 return {
@@ -4,16 +4,138 @@ import requests
 import json
 import numpy as np
 from datetime import datetime, timedelta
+from utils.crop_catalog import crop_params, crop_section
+from utils.request_rng import DETERMINISTIC_INFERENCE, request_rng
+from utils.sensor_store import SENSOR_COLUMNS, SensorReadings, SensorReadingStore
 
 logger = logging.getLogger(__name__)
 
+# Optimal soil moisture ranges (%) for different crops
+MOISTURE_RANGES = crop_section("moisture_range")
+
+MOISTURE_RECOMMENDATIONS = {
+    "Severely Under-watered": "Immediate irrigation needed. Soil moisture is significantly below optimal levels for the crop.",
+    "Under-watered": "Irrigation recommended. Soil moisture is below optimal levels for the crop.",
+    "Severely Over-watered": "Avoid irrigation. Consider improving drainage to reduce excess soil moisture.",
+    "Over-watered": "Delay irrigation. Current soil moisture is above optimal levels for the crop.",
+    "Optimal": "Maintain current irrigation practices. Soil moisture is at optimal levels for the crop."
+}
+
+# Optimal NPK (ppm) and pH ranges for different crops
+FERTILITY_RANGES = crop_section("fertility")
+
+FERTILITY_NUTRIENTS = ("nitrogen", "phosphorus", "potassium")
+
+NUTRIENT_RECOMMENDATIONS = {
+    "Severely Deficient": "Apply {nutrient}-rich fertilizer as soon as possible.",
+    "Deficient": "Consider applying {nutrient}-rich fertilizer.",
+    "Excess": "Avoid applying {nutrient} fertilizer.",
+    "High": "Reduce {nutrient} fertilizer application.",
+    "Optimal": "Maintain current {nutrient} fertilization practices.",
+    "Unknown": "No recent {nutrient} reading. Measure {nutrient} before changing fertilization."
+}
+
+PH_RECOMMENDATIONS = {
+    "Too Acidic": "Apply lime to increase soil pH.",
+    "Mildly Acidic": "Consider applying lime to increase soil pH slightly.",
+    "Too Alkaline": "Apply sulfur or acidic organic matter to decrease soil pH.",
+    "Mildly Alkaline": "Consider applying acidic organic matter to decrease soil pH slightly.",
+    "Optimal": "Maintain current soil pH management practices.",
+    "Unknown": "No recent pH reading. Measure soil pH before applying lime or sulfur."
+}
+
+FERTILITY_STATUS_SCORES = {
+    "Severely Deficient": 0,
+    "Deficient": 1,
+    "Mildly Acidic": 2,
+    "Mildly Alkaline": 2,
+    "High": 2,
+    "Optimal": 3,
+    "Excess": 1,
+    "Too Acidic": 0,
+    "Too Alkaline": 0
+}
+
+FERTILITY_OVERALL_RECOMMENDATIONS = {
+    "Good": "Maintain current soil fertility management practices.",
+    "Fair": "Follow specific nutrient recommendations to improve soil fertility.",
+    "Poor": "Significant soil fertility issues detected. Follow specific recommendations for each nutrient and consider consulting an agronomist.",
+    "Unknown": "No recent nutrient or pH readings. Take a soil test to assess fertility."
+}
+
+# Percentiles reported by the moisture analysis
+MOISTURE_PERCENTILES = (10, 50, 90)
+
+def moisture_band_statistics(moisture, optimal_range, timestamps=None):
+    """
+    Compute moisture band, percentile and trend statistics per sensor
+    
+    Args:
+        moisture (numpy.ndarray): Moisture readings, 1-D for one sensor or
+            2-D (sensors x readings); NaN marks missing readings
+        optimal_range (tuple): Optimal (low, high) moisture range
+        timestamps (numpy.ndarray): Reading times (datetime64); the trend is
+            per day when given and per reading otherwise
+        
+    Returns:
+        dict: Per-sensor arrays of mean, min, max, below/within/above
+            percentages, percentiles (one row per MOISTURE_PERCENTILES entry)
+            and trend
+    """
+    values = np.ascontiguousarray(moisture, dtype=np.float32)
+    if values.ndim == 1:
+        values = values[np.newaxis, :]
+    if values.ndim != 2 or values.shape[1] == 0:
+        raise ValueError("Moisture readings must be a non-empty 1-D or 2-D array")
+    
+    valid = np.isfinite(values)
+    count = valid.sum(axis=1)
+    if not count.all():
+        raise ValueError("Every sensor needs at least one moisture reading")
+    
+    low, high = float(optimal_range[0]), float(optimal_range[1])
+    below = np.count_nonzero(values < low, axis=1)
+    above = np.count_nonzero(values > high, axis=1)
+    
+    mean = np.sum(values, axis=1, where=valid, dtype=np.float64) / count
+    
+    if valid.all():
+        percentiles = np.percentile(values, MOISTURE_PERCENTILES, axis=1)
+    else:
+        percentiles = np.nanpercentile(values, MOISTURE_PERCENTILES, axis=1)
+    
+    # Least-squares slope against time (days) or reading index
+    if timestamps is not None:
+        x = (np.asarray(timestamps, dtype='datetime64[us]') - np.asarray(timestamps, dtype='datetime64[us]')[0]) / np.timedelta64(1, 'D')
+    else:
+        x = np.arange(values.shape[1], dtype=np.float64)
+    x = np.broadcast_to(x, values.shape)
+    x_mean = np.sum(x, axis=1, where=valid) / count
+    dx = np.where(valid, x - x_mean[:, np.newaxis], 0.0)
+    dy = np.where(valid, values - mean[:, np.newaxis], 0.0)
+    sxx = np.einsum('ij,ij->i', dx, dx)
+    trend = np.divide(np.einsum('ij,ij->i', dx, dy), sxx, out=np.zeros_like(sxx), where=sxx > 0)
+    
+    return {
+        "mean": mean,
+        "min": np.min(values, axis=1, where=valid, initial=np.inf),
+        "max": np.max(values, axis=1, where=valid, initial=-np.inf),
+        "below": below / count * 100,
+        "within": (count - below - above) / count * 100,
+        "above": above / count * 100,
+        "percentiles": percentiles,
+        "trend": trend
+    }
+
 class SoilSensorManager:
     """Class for managing and analyzing data from IoT soil sensors"""
     
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, store=None, deterministic=None):
         self.api_key = api_key or os.environ.get('SOIL_API_KEY', '')
+        self.deterministic = DETERMINISTIC_INFERENCE if deterministic is None else deterministic
         self.base_url = "https://api.soil-sensors.com/v1"  # Placeholder API endpoint
         self.logger = logging.getLogger(__name__)
+        self.store = store or SensorReadingStore()
         
     def get_sensor_data(self, sensor_id, start_date=None, end_date=None):
         """
@@ -25,11 +147,9 @@ class SoilSensorManager:
             end_date (str): End date in format 'YYYY-MM-DD'
             
         Returns:
-            dict: Sensor data
+            dict: Sensor data; "data" is a SensorReadings sequence, read from
+                the reading store when the sensor has stored readings
         """
-        # In a real implementation, this would fetch data from an actual API
-        # For this example, we'll generate realistic soil sensor data
-        
         # Convert string dates to datetime objects or use defaults
         if start_date:
             start = datetime.strptime(start_date, '%Y-%m-%d')
@@ -41,59 +161,125 @@ class SoilSensorManager:
         else:
             end = datetime.now()
             
-        # Generate a date range
-        date_range = []
-        current_date = start
-        while current_date <= end:
-            date_range.append(current_date)
-            current_date += timedelta(hours=1)
-            
-        # Generate sensor data for each date
-        sensor_data = []
+        # Deterministic mode snaps default windows to the hour so repeated
+        # requests generate the same readings
+        if self.deterministic:
+            if not start_date:
+                start = start.replace(minute=0, second=0, microsecond=0)
+            if not end_date:
+                end = end.replace(minute=0, second=0, microsecond=0)
+        
+        # Serve stored readings when the sensor has any
+        try:
+            readings = self.store.query(sensor_id, start, end)
+        except Exception as e:
+            self.logger.error(f"Error reading stored sensor data: {str(e)}")
+            readings = None
+        
+        if readings is not None:
+            field_id = self.store.field_of(sensor_id)
+            return {
+                "sensor_id": sensor_id,
+                "location": f"Farm {field_id}",
+                "data": readings
+            }
         
-        for date in date_range:
-            # Create realistic patterns with some random noise
-            hour = date.hour
-            day_of_year = date.timetuple().tm_yday
-            
-            # Moisture varies throughout the day (lower during hot hours)
-            moisture_base = 45 + 5 * np.sin(day_of_year / 15)  # Seasonal variation
-            moisture_daily = moisture_base - 5 * np.sin(hour / 24 * 2 * np.pi)  # Daily variation
-            moisture = max(5, min(99, moisture_daily + np.random.normal(-2, 2)))  # Add noise
-            
-            # Temperature follows daily patterns
-            temp_base = 25 + 5 * np.sin(day_of_year / 30)  # Seasonal variation
-            temp_daily = temp_base + 5 * np.sin((hour - 14) / 24 * 2 * np.pi)  # Daily variation, peaks at 2pm
-            temperature = max(5, min(45, temp_daily + np.random.normal(-1, 1)))  # Add noise
-            
-            # pH typically stable but can vary slightly
-            ph = 6.5 + np.random.normal(0, 0.1)
-            
-            # Electrical conductivity (proxy for nutrients)
-            ec_base = 0.8 + 0.1 * np.sin(day_of_year / 60)  # Seasonal variation
-            ec = max(0.1, min(2.0, ec_base + np.random.normal(0, 0.05)))
-            
-            # Generate NPK values
-            nitrogen = 20 + 5 * np.random.random()  # ppm
-            phosphorus = 10 + 3 * np.random.random()  # ppm
-            potassium = 15 + 4 * np.random.random()  # ppm
-            
-            sensor_data.append({
-                "timestamp": date.isoformat(),
-                "moisture": round(moisture, 1),
-                "temperature": round(temperature, 1),
-                "ph": round(ph, 2),
-                "electrical_conductivity": round(ec, 3),
-                "nitrogen": round(nitrogen, 1),
-                "phosphorus": round(phosphorus, 1),
-                "potassium": round(potassium, 1)
-            })
-            
         return {
             "sensor_id": sensor_id,
             "location": f"Farm {sensor_id[:2]}",
-            "data": sensor_data
+            "data": self.generate_sensor_readings(
+                start,
+                end,
+                request_rng("soil_readings", sensor_id, start.isoformat(), end.isoformat(), deterministic=self.deterministic)
+            )
+        }
+    
+    def get_latest_reading(self, sensor_id, start_date=None, end_date=None):
+        """
+        Get the most recent reading of a soil sensor
+        
+        Args:
+            sensor_id (str): Unique identifier for the sensor
+            start_date (str): Start date in format 'YYYY-MM-DD'
+            end_date (str): End date in format 'YYYY-MM-DD'
+            
+        Returns:
+            dict: Latest reading, with the last measured value of columns
+                the latest reading lacks, or None if the sensor has no
+                readings in the window
+        """
+        readings = self.get_sensor_data(sensor_id, start_date, end_date)["data"]
+        if not len(readings):
+            return None
+        if isinstance(readings, SensorReadings):
+            return readings.latest()
+        return readings[-1]
+    
+    def generate_sensor_readings(self, start, end, rng=None):
+        """
+        Generate realistic hourly soil sensor readings in one vectorized pass
+        
+        In a real implementation, this would fetch data from an actual API.
+        
+        Args:
+            start (datetime): First reading time
+            end (datetime): Last possible reading time
+            rng (numpy.random.Generator): Noise source (default: global NumPy RNG)
+            
+        Returns:
+            SensorReadings: Hourly readings from start to end
+        """
+        # Hourly index from start to end (inclusive)
+        start = np.datetime64(start, 'us')
+        end = np.datetime64(end, 'us')
+        count = max(0, int((end - start) // np.timedelta64(1, 'h')) + 1)
+        timestamps = start + np.arange(count) * np.timedelta64(1, 'h')
+        
+        rng = rng if rng is not None else np.random
+        
+        # Create realistic patterns with some random noise
+        days = timestamps.astype('datetime64[D]')
+        hour = (timestamps.astype('datetime64[h]') - days).astype(np.float64)
+        day_of_year = (days - days.astype('datetime64[Y]')).astype(np.float64) + 1
+        
+        # Moisture varies throughout the day (lower during hot hours)
+        moisture_base = 45 + 5 * np.sin(day_of_year / 15)  # Seasonal variation
+        moisture_daily = moisture_base - 5 * np.sin(hour / 24 * 2 * np.pi)  # Daily variation
+        moisture = np.clip(moisture_daily + rng.normal(-2, 2, count), 5, 99)  # Add noise
+        
+        # Temperature follows daily patterns
+        temp_base = 25 + 5 * np.sin(day_of_year / 30)  # Seasonal variation
+        temp_daily = temp_base + 5 * np.sin((hour - 14) / 24 * 2 * np.pi)  # Daily variation, peaks at 2pm
+        temperature = np.clip(temp_daily + rng.normal(-1, 1, count), 5, 45)  # Add noise
+        
+        # pH typically stable but can vary slightly
+        ph = 6.5 + rng.normal(0, 0.1, count)
+        
+        # Electrical conductivity (proxy for nutrients)
+        ec_base = 0.8 + 0.1 * np.sin(day_of_year / 60)  # Seasonal variation
+        ec = np.clip(ec_base + rng.normal(0, 0.05, count), 0.1, 2.0)
+        
+        # Generate NPK values (ppm)
+        nitrogen = 20 + 5 * rng.random(count)
+        phosphorus = 10 + 3 * rng.random(count)
+        potassium = 15 + 4 * rng.random(count)
+        
+        values = {
+            "moisture": moisture,
+            "temperature": temperature,
+            "ph": ph,
+            "electrical_conductivity": ec,
+            "nitrogen": nitrogen,
+            "phosphorus": phosphorus,
+            "potassium": potassium
         }
+        
+        columns = {
+            name: np.round(values[name], decimals)
+            for name, decimals in SENSOR_COLUMNS.items()
+        }
+        
+        return SensorReadings(timestamps, columns)
     
     def analyze_soil_moisture(self, sensor_data, crop_type):
         """
@@ -107,73 +293,77 @@ class SoilSensorManager:
             dict: Analysis results
         """
         try:
-            # Define optimal moisture ranges for different crops
-            moisture_ranges = {
-                "maize": (40, 60),
-                "rice": (60, 80),
-                "sorghum": (35, 55),
-                "millet": (30, 50),
-                "cassava": (35, 55),
-                "yam": (45, 65),
-                "sweet_potato": (40, 60),
-                "groundnut": (35, 55),
-                "cowpea": (30, 50),
-                "soybean": (40, 60),
-                # Default range for other crops
-                "default": (40, 60)
-            }
+            readings = sensor_data["data"]
+            if not len(readings):
+                self.logger.warning(f"No soil readings to analyze for sensor {sensor_data.get('sensor_id')}")
+                return None
+            
+            # Use the moisture column directly when the readings are columnar
+            if isinstance(readings, SensorReadings):
+                moisture_values = readings.columns["moisture"]
+                timestamps = readings.timestamps
+            else:
+                moisture_values = [item["moisture"] for item in readings]
+                timestamps = None
             
-            # Get optimal range for the specified crop
-            optimal_range = moisture_ranges.get(crop_type, moisture_ranges["default"])
+            return self.analyze_soil_moisture_batch(moisture_values, crop_type, timestamps)[0]
             
-            # Extract moisture values from sensor data
-            moisture_values = [item["moisture"] for item in sensor_data["data"]]
+        except Exception as e:
+            self.logger.error(f"Error analyzing soil moisture: {str(e)}")
+            return None
+    
+    def analyze_soil_moisture_batch(self, moisture, crop_type, timestamps=None):
+        """
+        Analyze soil moisture levels of several sensors in one pass
+        
+        Args:
+            moisture (numpy.ndarray): Moisture readings, 1-D for one sensor or
+                2-D (sensors x readings) for a fleet; NaN marks missing readings
+            crop_type (str): Type of crop
+            timestamps (numpy.ndarray): Reading times (datetime64) shared by all sensors
             
-            # Calculate average moisture
-            avg_moisture = np.mean(moisture_values)
+        Returns:
+            list: Analysis results, one dict per sensor
+        """
+        try:
+            # Get optimal range for the specified crop
+            optimal_range = crop_params("moisture_range", crop_type)
             
-            # Calculate the percentage of time moisture was below, within, and above optimal range
-            below_optimal = sum(1 for m in moisture_values if m < optimal_range[0]) / len(moisture_values) * 100
-            within_optimal = sum(1 for m in moisture_values if optimal_range[0] <= m <= optimal_range[1]) / len(moisture_values) * 100
-            above_optimal = sum(1 for m in moisture_values if m > optimal_range[1]) / len(moisture_values) * 100
+            stats = moisture_band_statistics(moisture, optimal_range, timestamps)
+            avg_moisture = stats["mean"]
             
             # Determine moisture status
-            if avg_moisture < optimal_range[0]:
-                if avg_moisture < optimal_range[0] - 10:
-                    status = "Severely Under-watered"
-                else:
-                    status = "Under-watered"
-            elif avg_moisture > optimal_range[1]:
-                if avg_moisture > optimal_range[1] + 10:
-                    status = "Severely Over-watered"
-                else:
-                    status = "Over-watered"
-            else:
-                status = "Optimal"
-                
-            # Generate recommendation
-            if status == "Severely Under-watered":
-                recommendation = "Immediate irrigation needed. Soil moisture is significantly below optimal levels for the crop."
-            elif status == "Under-watered":
-                recommendation = "Irrigation recommended. Soil moisture is below optimal levels for the crop."
-            elif status == "Severely Over-watered":
-                recommendation = "Avoid irrigation. Consider improving drainage to reduce excess soil moisture."
-            elif status == "Over-watered":
-                recommendation = "Delay irrigation. Current soil moisture is above optimal levels for the crop."
-            else:
-                recommendation = "Maintain current irrigation practices. Soil moisture is at optimal levels for the crop."
-                
-            return {
-                "average_moisture": round(avg_moisture, 1),
-                "minimum_moisture": round(min(moisture_values), 1),
-                "maximum_moisture": round(max(moisture_values), 1),
-                "optimal_range": optimal_range,
-                "below_optimal_percentage": round(below_optimal, 1),
-                "within_optimal_percentage": round(within_optimal, 1),
-                "above_optimal_percentage": round(above_optimal, 1),
-                "moisture_status": status,
-                "recommendation": recommendation
-            }
+            status = np.select(
+                [
+                    avg_moisture < optimal_range[0] - 10,
+                    avg_moisture < optimal_range[0],
+                    avg_moisture > optimal_range[1] + 10,
+                    avg_moisture > optimal_range[1]
+                ],
+                ["Severely Under-watered", "Under-watered", "Severely Over-watered", "Over-watered"],
+                default="Optimal"
+            )
+            
+            results = []
+            for i in range(len(avg_moisture)):
+                results.append({
+                    "average_moisture": round(float(avg_moisture[i]), 1),
+                    "minimum_moisture": round(float(stats["min"][i]), 1),
+                    "maximum_moisture": round(float(stats["max"][i]), 1),
+                    "optimal_range": optimal_range,
+                    "below_optimal_percentage": round(float(stats["below"][i]), 1),
+                    "within_optimal_percentage": round(float(stats["within"][i]), 1),
+                    "above_optimal_percentage": round(float(stats["above"][i]), 1),
+                    "moisture_percentiles": {
+                        f"p{q}": round(float(stats["percentiles"][j, i]), 1)
+                        for j, q in enumerate(MOISTURE_PERCENTILES)
+                    },
+                    "moisture_trend": round(float(stats["trend"][i]), 3),
+                    "moisture_status": str(status[i]),
+                    "recommendation": MOISTURE_RECOMMENDATIONS[str(status[i])]
+                })
+            
+            return results
             
         except Exception as e:
             self.logger.error(f"Error analyzing soil moisture: {str(e)}")
@@ -191,200 +381,200 @@ class SoilSensorManager:
             dict: Analysis results
         """
         try:
-            # Define optimal NPK ranges and pH for different crops
-            fertility_ranges = {
-                "maize": {
-                    "nitrogen": (20, 30),
-                    "phosphorus": (10, 15),
-                    "potassium": (15, 25),
-                    "ph": (5.8, 7.0)
-                },
-                "rice": {
-                    "nitrogen": (15, 25),
-                    "phosphorus": (8, 13),
-                    "potassium": (15, 25),
-                    "ph": (5.5, 6.5)
-                },
-                "sorghum": {
-                    "nitrogen": (15, 25),
-                    "phosphorus": (10, 15),
-                    "potassium": (15, 20),
-                    "ph": (5.5, 7.5)
-                },
-                # Default ranges for other crops
-                "default": {
-                    "nitrogen": (15, 25),
-                    "phosphorus": (10, 15),
-                    "potassium": (15, 20),
-                    "ph": (6.0, 7.0)
-                }
-            }
-            
-            # Get optimal ranges for the specified crop
-            optimal_ranges = fertility_ranges.get(crop_type, fertility_ranges["default"])
-            
-            # Extract latest fertility values from sensor data
-            latest_data = sensor_data["data"][-1]
-            
-            # Analyze each nutrient and pH
-            fertility_analysis = {}
-            
-            # Nitrogen analysis
-            n_value = latest_data["nitrogen"]
-            n_range = optimal_ranges["nitrogen"]
-            
-            if n_value < n_range[0]:
-                if n_value < n_range[0] * 0.7:
-                    n_status = "Severely Deficient"
-                    n_recommendation = "Apply nitrogen-rich fertilizer as soon as possible."
-                else:
-                    n_status = "Deficient"
-                    n_recommendation = "Consider applying nitrogen-rich fertilizer."
-            elif n_value > n_range[1]:
-                if n_value > n_range[1] * 1.3:
-                    n_status = "Excess"
-                    n_recommendation = "Avoid applying nitrogen fertilizer."
-                else:
-                    n_status = "High"
-                    n_recommendation = "Reduce nitrogen fertilizer application."
+            if not len(sensor_data["data"]):
+                self.logger.warning(f"No soil readings to analyze for sensor {sensor_data.get('sensor_id')}")
+                return None
+            
+            # Extract the latest measured fertility values from sensor data
+            readings = sensor_data["data"]
+            if isinstance(readings, SensorReadings):
+                latest_data = readings.latest()
             else:
-                n_status = "Optimal"
-                n_recommendation = "Maintain current nitrogen fertilization practices."
-                
-            fertility_analysis["nitrogen"] = {
-                "value": n_value,
-                "optimal_range": n_range,
-                "status": n_status,
-                "recommendation": n_recommendation
-            }
+                latest_data = dict(readings[-1])
+                for name in FERTILITY_NUTRIENTS + ("ph",):
+                    measured = [item.get(name) for item in readings if item.get(name) is not None]
+                    measured = [value for value in measured if not np.isnan(value)]
+                    latest_data[name] = measured[-1] if measured else np.nan
             
-            # Phosphorus analysis
-            p_value = latest_data["phosphorus"]
-            p_range = optimal_ranges["phosphorus"]
+            latest = {name: [latest_data[name]] for name in FERTILITY_NUTRIENTS + ("ph",)}
             
-            if p_value < p_range[0]:
-                if p_value < p_range[0] * 0.7:
-                    p_status = "Severely Deficient"
-                    p_recommendation = "Apply phosphorus-rich fertilizer as soon as possible."
-                else:
-                    p_status = "Deficient"
-                    p_recommendation = "Consider applying phosphorus-rich fertilizer."
-            elif p_value > p_range[1]:
-                if p_value > p_range[1] * 1.3:
-                    p_status = "Excess"
-                    p_recommendation = "Avoid applying phosphorus fertilizer."
-                else:
-                    p_status = "High"
-                    p_recommendation = "Reduce phosphorus fertilizer application."
-            else:
-                p_status = "Optimal"
-                p_recommendation = "Maintain current phosphorus fertilization practices."
-                
-            fertility_analysis["phosphorus"] = {
-                "value": p_value,
-                "optimal_range": p_range,
-                "status": p_status,
-                "recommendation": p_recommendation
-            }
+            return self.analyze_soil_fertility_batch(latest, crop_type, [latest_data["timestamp"]])[0]
             
-            # Potassium analysis
-            k_value = latest_data["potassium"]
-            k_range = optimal_ranges["potassium"]
+        except Exception as e:
+            self.logger.error(f"Error analyzing soil fertility: {str(e)}")
+            return None
+    
+    def analyze_soil_fertility_batch(self, latest, crop_type, timestamps):
+        """
+        Analyze soil fertility of several sensors in one pass
+        
+        Args:
+            latest (dict): Arrays of the latest nitrogen, phosphorus,
+                potassium and ph values, one entry per sensor; NaN marks a
+                value that was never measured and is reported as "Unknown"
+            crop_type (str): Type of crop
+            timestamps (list): Time of each sensor's latest reading
             
-            if k_value < k_range[0]:
-                if k_value < k_range[0] * 0.7:
-                    k_status = "Severely Deficient"
-                    k_recommendation = "Apply potassium-rich fertilizer as soon as possible."
-                else:
-                    k_status = "Deficient"
-                    k_recommendation = "Consider applying potassium-rich fertilizer."
-            elif k_value > k_range[1]:
-                if k_value > k_range[1] * 1.3:
-                    k_status = "Excess"
-                    k_recommendation = "Avoid applying potassium fertilizer."
-                else:
-                    k_status = "High"
-                    k_recommendation = "Reduce potassium fertilizer application."
-            else:
-                k_status = "Optimal"
-                k_recommendation = "Maintain current potassium fertilization practices."
+        Returns:
+            list: Analysis results, one dict per sensor
+        """
+        try:
+            # Get optimal ranges for the specified crop
+            optimal_ranges = crop_params("fertility", crop_type)
+            
+            statuses = {}
+            
+            # Nutrient levels: 30% outside the range is severe
+            for name in FERTILITY_NUTRIENTS:
+                values = np.asarray(latest[name], dtype=np.float64)
+                low, high = optimal_ranges[name]
+                statuses[name] = np.select(
+                    [np.isnan(values), values < low * 0.7, values < low, values > high * 1.3, values > high],
+                    ["Unknown", "Severely Deficient", "Deficient", "Excess", "High"],
+                    default="Optimal"
+                )
+            
+            # pH: 0.5 outside the range is severe
+            values = np.asarray(latest["ph"], dtype=np.float64)
+            low, high = optimal_ranges["ph"]
+            statuses["ph"] = np.select(
+                [np.isnan(values), values < low - 0.5, values < low, values > high + 0.5, values > high],
+                ["Unknown", "Too Acidic", "Mildly Acidic", "Too Alkaline", "Mildly Alkaline"],
+                default="Optimal"
+            )
+            
+            results = []
+            for i in range(len(timestamps)):
+                fertility_analysis = {}
+                for name in statuses:
+                    status = str(statuses[name][i])
+                    if name == "ph":
+                        recommendation = PH_RECOMMENDATIONS[status]
+                    else:
+                        recommendation = NUTRIENT_RECOMMENDATIONS[status].format(nutrient=name)
+                    
+                    fertility_analysis[name] = {
+                        "value": None if status == "Unknown" else latest[name][i],
+                        "optimal_range": optimal_ranges[name],
+                        "status": status,
+                        "recommendation": recommendation
+                    }
                 
-            fertility_analysis["potassium"] = {
-                "value": k_value,
-                "optimal_range": k_range,
-                "status": k_status,
-                "recommendation": k_recommendation
-            }
-            
-            # pH analysis
-            ph_value = latest_data["ph"]
-            ph_range = optimal_ranges["ph"]
-            
-            if ph_value < ph_range[0]:
-                if ph_value < ph_range[0] - 0.5:
-                    ph_status = "Too Acidic"
-                    ph_recommendation = "Apply lime to increase soil pH."
-                else:
-                    ph_status = "Mildly Acidic"
-                    ph_recommendation = "Consider applying lime to increase soil pH slightly."
-            elif ph_value > ph_range[1]:
-                if ph_value > ph_range[1] + 0.5:
-                    ph_status = "Too Alkaline"
-                    ph_recommendation = "Apply sulfur or acidic organic matter to decrease soil pH."
+                # Overall fertility assessment over the measured values only
+                scores = [
+                    FERTILITY_STATUS_SCORES.get(item["status"], 0)
+                    for item in fertility_analysis.values()
+                    if item["status"] != "Unknown"
+                ]
+                avg_score = sum(scores) / len(scores) if scores else None
+                
+                if avg_score is None:
+                    overall_status = "Unknown"
+                elif avg_score >= 2.5:
+                    overall_status = "Good"
+                elif avg_score >= 1.5:
+                    overall_status = "Fair"
                 else:
-                    ph_status = "Mildly Alkaline"
-                    ph_recommendation = "Consider applying acidic organic matter to decrease soil pH slightly."
-            else:
-                ph_status = "Optimal"
-                ph_recommendation = "Maintain current soil pH management practices."
+                    overall_status = "Poor"
                 
-            fertility_analysis["ph"] = {
-                "value": ph_value,
-                "optimal_range": ph_range,
-                "status": ph_status,
-                "recommendation": ph_recommendation
-            }
+                results.append({
+                    "timestamp": timestamps[i],
+                    "overall_status": overall_status,
+                    "overall_recommendation": FERTILITY_OVERALL_RECOMMENDATIONS[overall_status],
+                    "nutrients": fertility_analysis
+                })
             
-            # Overall fertility assessment
-            status_scores = {
-                "Severely Deficient": 0,
-                "Deficient": 1,
-                "Mildly Acidic": 2,
-                "Mildly Alkaline": 2,
-                "High": 2,
-                "Optimal": 3,
-                "Excess": 1,
-                "Too Acidic": 0,
-                "Too Alkaline": 0
-            }
-            
-            statuses = [
-                fertility_analysis["nitrogen"]["status"],
-                fertility_analysis["phosphorus"]["status"],
-                fertility_analysis["potassium"]["status"],
-                fertility_analysis["ph"]["status"]
-            ]
-            
-            scores = [status_scores.get(status, 0) for status in statuses]
-            avg_score = sum(scores) / len(scores)
-            
-            if avg_score >= 2.5:
-                overall_status = "Good"
-                overall_recommendation = "Maintain current soil fertility management practices."
-            elif avg_score >= 1.5:
-                overall_status = "Fair"
-                overall_recommendation = "Follow specific nutrient recommendations to improve soil fertility."
-            else:
-                overall_status = "Poor"
-                overall_recommendation = "Significant soil fertility issues detected. Follow specific recommendations for each nutrient and consider consulting an agronomist."
-                
-            return {
-                "timestamp": latest_data["timestamp"],
-                "overall_status": overall_status,
-                "overall_recommendation": overall_recommendation,
-                "nutrients": fertility_analysis
-            }
+            return results
             
         except Exception as e:
             self.logger.error(f"Error analyzing soil fertility: {str(e)}")
             return None
+    
+    def analyze_fleet_fertility(self, sensors, crop_type, start_date=None, end_date=None, batch_size=256):
+        """
+        Analyze soil fertility of many sensors, batch by batch
+        
+        Readings of each batch are concatenated per column so window means
+        and latest values of N/P/K/pH/EC come from single segmented
+        reductions rather than one pass per sensor.
+        
+        Args:
+            sensors (list): (farm_id, sensor_id) pairs
+            crop_type (str): Type of crop
+            start_date (str): Start date in format 'YYYY-MM-DD'
+            end_date (str): End date in format 'YYYY-MM-DD'
+            batch_size (int): Number of sensors analyzed together
+            
+        Yields:
+            dict: Per-sensor result with reading count, window means and
+                fertility analysis, or an "error" entry if the sensor could
+                not be analyzed
+        """
+        for offset in range(0, len(sensors), batch_size):
+            batch = []
+            for farm_id, sensor_id in sensors[offset:offset + batch_size]:
+                try:
+                    readings = self.get_sensor_data(sensor_id, start_date, end_date)["data"]
+                except Exception as e:
+                    self.logger.error(f"Error reading soil sensor {sensor_id}: {str(e)}")
+                    yield {"farm_id": farm_id, "sensor_id": sensor_id, "readings": 0, "error": str(e)}
+                    continue
+                
+                if len(readings):
+                    batch.append((farm_id, sensor_id, readings))
+                else:
+                    yield {"farm_id": farm_id, "sensor_id": sensor_id, "readings": 0, "error": "No readings in range"}
+            
+            if not batch:
+                continue
+            
+            try:
+                results = self._analyze_fleet_batch(batch, crop_type)
+            except Exception as e:
+                # One bad batch must not end the stream for the remaining sensors
+                self.logger.error(f"Error analyzing soil fleet batch: {str(e)}")
+                results = [
+                    {"farm_id": farm_id, "sensor_id": sensor_id, "readings": len(readings), "error": str(e)}
+                    for farm_id, sensor_id, readings in batch
+                ]
+            
+            yield from results
+    
+    def _analyze_fleet_batch(self, batch, crop_type):
+        """Analyze (farm_id, sensor_id, readings) entries that all have readings"""
+        columns = FERTILITY_NUTRIENTS + ("ph", "electrical_conductivity")
+        
+        # Segment boundaries of each sensor in the concatenated columns
+        lengths = np.array([len(readings) for _, _, readings in batch])
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        
+        means = {}
+        latest = {}
+        for name in columns:
+            values = np.concatenate([readings.columns[name] for _, _, readings in batch])
+            valid = np.isfinite(values)
+            totals = np.add.reduceat(np.where(valid, values, 0.0), starts)
+            counts = np.add.reduceat(valid.astype(np.int64), starts)
+            means[name] = np.divide(totals, counts, out=np.full(len(batch), np.nan), where=counts > 0)
+            
+            # Latest measured value per sensor (NaN if never measured)
+            positions = np.where(valid, np.arange(len(values)), -1)
+            last_valid = np.maximum.reduceat(positions, starts)
+            latest[name] = np.where(last_valid >= starts, values[np.maximum(last_valid, 0)], np.nan).tolist()
+        
+        timestamps = [readings[-1]["timestamp"] for _, _, readings in batch]
+        analyses = self.analyze_soil_fertility_batch(latest, crop_type, timestamps)
+        
+        return [
+            {
+                "farm_id": farm_id,
+                "sensor_id": sensor_id,
+                "readings": int(lengths[i]),
+                "window_means": {
+                    name: None if np.isnan(means[name][i]) else round(float(means[name][i]), 3)
+                    for name in columns
+                },
+                "fertility_analysis": analyses[i] if analyses else None
+            }
+            for i, (farm_id, sensor_id, readings) in enumerate(batch)
+        ]
@@ -1,18 +1,219 @@
 import os
 import logging
-import requests
 import numpy as np
 from datetime import datetime, timedelta
+from utils.crop_catalog import crop_params, crop_section
+from utils.response_cache import TTLCache, snap_to_grid
+from utils.http_client import get_session
 
 logger = logging.getLogger(__name__)
 
+# Grid cell size (degrees) that weather responses are shared across; 0.01 is about 1.1 km
+WEATHER_GRID_DEG = float(os.environ.get('WEATHER_CACHE_GRID_DEG', 0.01))
+
+# Weather API responses shared by all WeatherForecaster instances
+weather_cache = TTLCache(
+    ttl_seconds=float(os.environ.get('WEATHER_CACHE_TTL', 600)),
+    max_entries=int(os.environ.get('WEATHER_CACHE_MAX_ENTRIES', 4096))
+)
+
+def parse_current_weather(data):
+    """
+    Extract current conditions from a weather or One Call "current" payload
+    
+    Args:
+        data (dict): Raw current weather data
+        
+    Returns:
+        dict: Current weather data
+    """
+    if "main" in data:
+        # Current weather endpoint format
+        main = data["main"]
+        wind = data["wind"]
+        clouds = data.get("clouds", {}).get("all", 0)
+        temperature, humidity, pressure = main["temp"], main["humidity"], main["pressure"]
+        wind_speed, wind_direction = wind["speed"], wind["deg"]
+    else:
+        # One Call "current" format
+        clouds = data.get("clouds", 0)
+        temperature, humidity, pressure = data["temp"], data["humidity"], data["pressure"]
+        wind_speed, wind_direction = data["wind_speed"], data["wind_deg"]
+    
+    return {
+        "temperature": temperature,
+        "humidity": humidity,
+        "pressure": pressure,
+        "wind_speed": wind_speed,
+        "wind_direction": wind_direction,
+        "weather_description": data["weather"][0]["description"],
+        "icon": data["weather"][0]["icon"],
+        "clouds": clouds,
+        "rain": data.get("rain", {}).get("1h", 0),
+        "timestamp": datetime.utcfromtimestamp(data["dt"]).isoformat()
+    }
+
+def parse_daily_forecast(daily, days=7):
+    """
+    Extract daily forecasts from a One Call "daily" list
+    
+    Args:
+        daily (list): Raw daily forecast data
+        days (int): Number of days to keep
+        
+    Returns:
+        list: List of daily weather forecasts
+    """
+    daily_forecasts = []
+    
+    for day_data in daily[:days]:
+        daily_forecasts.append({
+            "date": datetime.utcfromtimestamp(day_data["dt"]).strftime('%Y-%m-%d'),
+            "temperature": {
+                "min": day_data["temp"]["min"],
+                "max": day_data["temp"]["max"],
+                "day": day_data["temp"]["day"],
+                "night": day_data["temp"]["night"]
+            },
+            "humidity": day_data["humidity"],
+            "pressure": day_data["pressure"],
+            "wind_speed": day_data["wind_speed"],
+            "wind_direction": day_data["wind_deg"],
+            "weather_description": day_data["weather"][0]["description"],
+            "icon": day_data["weather"][0]["icon"],
+            "clouds": day_data.get("clouds", 0),
+            "rain": day_data.get("rain", 0),
+            "probability_precipitation": day_data.get("pop", 0) * 100,
+            "uvi": day_data.get("uvi", 0)
+        })
+    
+    return daily_forecasts
+
+def parse_hourly_forecast(hourly, hours=24):
+    """
+    Extract hourly forecasts from a One Call "hourly" list
+    
+    Args:
+        hourly (list): Raw hourly forecast data
+        hours (int): Number of hours to keep
+        
+    Returns:
+        list: List of hourly weather forecasts
+    """
+    hourly_forecasts = []
+    
+    for hour_data in hourly[:hours]:
+        hourly_forecasts.append({
+            "time": datetime.utcfromtimestamp(hour_data["dt"]).strftime('%Y-%m-%d %H:%M'),
+            "temperature": hour_data["temp"],
+            "humidity": hour_data["humidity"],
+            "pressure": hour_data["pressure"],
+            "wind_speed": hour_data["wind_speed"],
+            "wind_direction": hour_data["wind_deg"],
+            "weather_description": hour_data["weather"][0]["description"],
+            "icon": hour_data["weather"][0]["icon"],
+            "clouds": hour_data.get("clouds", 0),
+            "rain": hour_data.get("rain", {}).get("1h", 0),
+            "probability_precipitation": hour_data.get("pop", 0) * 100
+        })
+    
+    return hourly_forecasts
+
 class WeatherForecaster:
     """Class for hyper-local weather forecasting"""
     
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, combined_fetch=None):
+        """
+        Initialize the forecaster
+        
+        Args:
+            api_key (str): OpenWeatherMap API key
+            combined_fetch (bool): Derive current, daily and hourly views from
+                one shared One Call response (default from WEATHER_COMBINED_FETCH)
+        """
         self.api_key = api_key or os.environ.get('WEATHER_API_KEY', '')
         self.base_url = "https://api.openweathermap.org/data/2.5"
         self.logger = logging.getLogger(__name__)
+        self.session = get_session("weather", read_timeout=float(os.environ.get('WEATHER_READ_TIMEOUT', 10)))
+        
+        if combined_fetch is None:
+            combined_fetch = os.environ.get('WEATHER_COMBINED_FETCH', '1').lower() not in ('0', 'false', 'no')
+        self.combined_fetch = combined_fetch
+    
+    def _fetch(self, endpoint, lat, lon, **params):
+        """
+        Fetch an API response for the grid cell containing a location
+        
+        Responses are cached per grid cell and shared between concurrent
+        callers, so nearby farms reuse one upstream call.
+        
+        Args:
+            endpoint (str): API endpoint (e.g. "weather", "onecall")
+            lat (float): Latitude
+            lon (float): Longitude
+            **params: Extra query parameters
+            
+        Returns:
+            dict: Response data, or None if the call failed
+        """
+        cell_lat, cell_lon = snap_to_grid(lat, lon, WEATHER_GRID_DEG)
+        key = (self.base_url, endpoint, self.api_key, cell_lat, cell_lon, tuple(sorted(params.items())))
+        
+        def load():
+            response = self.session.get(
+                f"{self.base_url}/{endpoint}",
+                params={
+                    "lat": cell_lat,
+                    "lon": cell_lon,
+                    **params,
+                    "appid": self.api_key,
+                    "units": "metric"
+                }
+            )
+            if response.status_code != 200:
+                self.logger.error(f"Weather API {endpoint} request failed: {response.status_code}")
+                return None
+            return response.json()
+        
+        return weather_cache.get_or_load(key, load)
+    
+    def _fetch_onecall(self, lat, lon):
+        """Fetch the One Call response (current, daily and hourly) for a location"""
+        return self._fetch("onecall", lat, lon, exclude="minutely")
+    
+    def get_weather_bundle(self, lat, lon, days=7, hours=24):
+        """
+        Get current weather, daily and hourly forecasts from one API response
+        
+        Args:
+            lat (float): Latitude
+            lon (float): Longitude
+            days (int): Number of days for forecast (max 7)
+            hours (int): Number of hours for forecast (max 48)
+            
+        Returns:
+            dict: current_weather, daily_forecast and hourly_forecast
+        """
+        if not self.api_key:
+            self.logger.warning("No weather API key provided")
+            return None
+            
+        try:
+            data = self._fetch_onecall(lat, lon)
+            
+            if data is not None:
+                return {
+                    "current_weather": parse_current_weather(data["current"]),
+                    "daily_forecast": parse_daily_forecast(data["daily"], days),
+                    "hourly_forecast": parse_hourly_forecast(data["hourly"], hours)
+                }
+            else:
+                self.logger.error("Failed to get weather bundle")
+                return None
+                
+        except Exception as e:
+            self.logger.error(f"Error getting weather bundle: {str(e)}")
+            return None
     
     def get_current_weather(self, lat, lon):
         """
@@ -30,34 +231,16 @@ class WeatherForecaster:
             return None
             
         try:
-            response = requests.get(
-                f"{self.base_url}/weather",
-                params={
-                    "lat": lat,
-                    "lon": lon,
-                    "appid": self.api_key,
-                    "units": "metric"
-                }
-            )
+            if self.combined_fetch:
+                data = self._fetch_onecall(lat, lon)
+                data = data and data["current"]
+            else:
+                data = self._fetch("weather", lat, lon)
             
-            if response.status_code == 200:
-                data = response.json()
-                
-                # Extract relevant information
-                return {
-                    "temperature": data["main"]["temp"],
-                    "humidity": data["main"]["humidity"],
-                    "pressure": data["main"]["pressure"],
-                    "wind_speed": data["wind"]["speed"],
-                    "wind_direction": data["wind"]["deg"],
-                    "weather_description": data["weather"][0]["description"],
-                    "icon": data["weather"][0]["icon"],
-                    "clouds": data.get("clouds", {}).get("all", 0),
-                    "rain": data.get("rain", {}).get("1h", 0),
-                    "timestamp": datetime.utcfromtimestamp(data["dt"]).isoformat()
-                }
+            if data is not None:
+                return parse_current_weather(data)
             else:
-                self.logger.error(f"Failed to get current weather: {response.status_code}")
+                self.logger.error("Failed to get current weather")
                 return None
                 
         except Exception as e:
@@ -81,52 +264,12 @@ class WeatherForecaster:
             return None
             
         try:
-            response = requests.get(
-                f"{self.base_url}/onecall",
-                params={
-                    "lat": lat,
-                    "lon": lon,
-                    "exclude": "minutely",
-                    "appid": self.api_key,
-                    "units": "metric"
-                }
-            )
+            data = self._fetch_onecall(lat, lon)
             
-            if response.status_code == 200:
-                data = response.json()
-                
-                # Process daily forecasts
-                daily_forecasts = []
-                
-                for i, day_data in enumerate(data["daily"]):
-                    if i >= days:
-                        break
-                        
-                    forecast = {
-                        "date": datetime.utcfromtimestamp(day_data["dt"]).strftime('%Y-%m-%d'),
-                        "temperature": {
-                            "min": day_data["temp"]["min"],
-                            "max": day_data["temp"]["max"],
-                            "day": day_data["temp"]["day"],
-                            "night": day_data["temp"]["night"]
-                        },
-                        "humidity": day_data["humidity"],
-                        "pressure": day_data["pressure"],
-                        "wind_speed": day_data["wind_speed"],
-                        "wind_direction": day_data["wind_deg"],
-                        "weather_description": day_data["weather"][0]["description"],
-                        "icon": day_data["weather"][0]["icon"],
-                        "clouds": day_data.get("clouds", 0),
-                        "rain": day_data.get("rain", 0),
-                        "probability_precipitation": day_data.get("pop", 0) * 100,
-                        "uvi": day_data.get("uvi", 0)
-                    }
-                    
-                    daily_forecasts.append(forecast)
-                
-                return daily_forecasts
+            if data is not None:
+                return parse_daily_forecast(data["daily"], days)
             else:
-                self.logger.error(f"Failed to get weather forecast: {response.status_code}")
+                self.logger.error("Failed to get weather forecast")
                 return None
                 
         except Exception as e:
@@ -150,46 +293,15 @@ class WeatherForecaster:
             return None
             
         try:
-            response = requests.get(
-                f"{self.base_url}/onecall",
-                params={
-                    "lat": lat,
-                    "lon": lon,
-                    "exclude": "minutely,daily",
-                    "appid": self.api_key,
-                    "units": "metric"
-                }
-            )
+            if self.combined_fetch:
+                data = self._fetch_onecall(lat, lon)
+            else:
+                data = self._fetch("onecall", lat, lon, exclude="minutely,daily")
             
-            if response.status_code == 200:
-                data = response.json()
-                
-                # Process hourly forecasts
-                hourly_forecasts = []
-                
-                for i, hour_data in enumerate(data["hourly"]):
-                    if i >= hours:
-                        break
-                        
-                    forecast = {
-                        "time": datetime.utcfromtimestamp(hour_data["dt"]).strftime('%Y-%m-%d %H:%M'),
-                        "temperature": hour_data["temp"],
-                        "humidity": hour_data["humidity"],
-                        "pressure": hour_data["pressure"],
-                        "wind_speed": hour_data["wind_speed"],
-                        "wind_direction": hour_data["wind_deg"],
-                        "weather_description": hour_data["weather"][0]["description"],
-                        "icon": hour_data["weather"][0]["icon"],
-                        "clouds": hour_data.get("clouds", 0),
-                        "rain": hour_data.get("rain", {}).get("1h", 0),
-                        "probability_precipitation": hour_data.get("pop", 0) * 100
-                    }
-                    
-                    hourly_forecasts.append(forecast)
-                
-                return hourly_forecasts
+            if data is not None:
+                return parse_hourly_forecast(data["hourly"], hours)
             else:
-                self.logger.error(f"Failed to get hourly forecast: {response.status_code}")
+                self.logger.error("Failed to get hourly forecast")
                 return None
                 
         except Exception as e:
@@ -209,24 +321,8 @@ class WeatherForecaster:
             dict: Irrigation recommendation
         """
         try:
-            # Define crop-specific parameters
-            crop_params = {
-                "maize": {"min_moisture": 40, "optimal_moisture": 60, "max_moisture": 80},
-                "rice": {"min_moisture": 60, "optimal_moisture": 80, "max_moisture": 100},
-                "sorghum": {"min_moisture": 35, "optimal_moisture": 55, "max_moisture": 75},
-                "millet": {"min_moisture": 30, "optimal_moisture": 50, "max_moisture": 70},
-                "cassava": {"min_moisture": 35, "optimal_moisture": 55, "max_moisture": 75},
-                "yam": {"min_moisture": 45, "optimal_moisture": 65, "max_moisture": 85},
-                "sweet_potato": {"min_moisture": 40, "optimal_moisture": 60, "max_moisture": 80},
-                "groundnut": {"min_moisture": 35, "optimal_moisture": 55, "max_moisture": 75},
-                "cowpea": {"min_moisture": 30, "optimal_moisture": 50, "max_moisture": 70},
-                "soybean": {"min_moisture": 40, "optimal_moisture": 60, "max_moisture": 80},
-                # Default parameters for other crops
-                "default": {"min_moisture": 40, "optimal_moisture": 60, "max_moisture": 80}
-            }
-            
             # Get crop parameters
-            params = crop_params.get(crop_type, crop_params["default"])
+            params = crop_params("moisture_limits", crop_type)
             
             # Calculate expected precipitation in the next 3 days
             precipitation_3days = sum(day["rain"] for day in weather_data[:3] if "rain" in day)
@@ -309,49 +405,8 @@ class WeatherForecaster:
             total_precipitation = sum([day.get("rain", 0) for day in forecast])
             precipitation_days = sum([1 for day in forecast if day.get("rain", 0) > 1])
             
-            # Define optimal conditions for different crops
-            crop_conditions = {
-                "maize": {
-                    "min_temp": 10, "optimal_temp": 25, "max_temp": 35,
-                    "min_rain": 10, "max_rain": 50
-                },
-                "rice": {
-                    "min_temp": 15, "optimal_temp": 30, "max_temp": 35,
-                    "min_rain": 20, "max_rain": 100
-                },
-                "sorghum": {
-                    "min_temp": 12, "optimal_temp": 27, "max_temp": 38,
-                    "min_rain": 5, "max_rain": 40
-                },
-                "millet": {
-                    "min_temp": 12, "optimal_temp": 28, "max_temp": 40,
-                    "min_rain": 5, "max_rain": 30
-                },
-                "cassava": {
-                    "min_temp": 18, "optimal_temp": 28, "max_temp": 35,
-                    "min_rain": 10, "max_rain": 60
-                },
-                "yam": {
-                    "min_temp": 20, "optimal_temp": 30, "max_temp": 35,
-                    "min_rain": 15, "max_rain": 70
-                },
-                "sweet_potato": {
-                    "min_temp": 15, "optimal_temp": 24, "max_temp": 35,
-                    "min_rain": 10, "max_rain": 50
-                },
-                "groundnut": {
-                    "min_temp": 15, "optimal_temp": 28, "max_temp": 35,
-                    "min_rain": 5, "max_rain": 40
-                },
-                "cowpea": {
-                    "min_temp": 18, "optimal_temp": 28, "max_temp": 35,
-                    "min_rain": 5, "max_rain": 30
-                },
-                "soybean": {
-                    "min_temp": 15, "optimal_temp": 26, "max_temp": 35,
-                    "min_rain": 10, "max_rain": 50
-                }
-            }
+            # Optimal conditions for different crops
+            crop_conditions = crop_section("planting")
             
             # Evaluate each crop
             recommendations = []